@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""Benchmark for rewrite_by_hand BlocksManager.cut on large config files.
+
+Generates configs of the given sizes in MB, made of plain lines with a marked
+block every BLOCK_EVERY lines, and times cutting each into blocks.
+
+Usage: python benchmarks/bench_blocks_cut.py [MB ...]   (default: 1 50)
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+BLOCK_EVERY = 200
+MARKS = ["laptop", "desktop", "work"]
+
+
+def generate_config(size: int, magic: str) -> str:
+    """Build a config of about `size` bytes with a marked block every BLOCK_EVERY lines."""
+    parts = []
+    total = 0
+    i = 0
+    while total < size:
+        if i % BLOCK_EVERY == 0:
+            mark = MARKS[(i // BLOCK_EVERY) % len(MARKS)]
+            line = f"/* {magic}: {mark}\nset option_{i} = {mark}\n{magic}: {mark} */\n"
+        else:
+            line = f"set option_{i} = value_{i}  # a comment about option {i}\n"
+        parts.append(line)
+        total += len(line)
+        i += 1
+    return "".join(parts)
+
+
+def main() -> None:
+    sizes = [int(arg) for arg in sys.argv[1:]] or [1, 50]
+    with tempfile.TemporaryDirectory() as home:
+        # variables.py resolves ~ at import time, so HOME must be set first
+        os.environ["HOME"] = home
+        os.makedirs(os.path.join(home, ".dotfiles", "user"))
+        os.makedirs(os.path.join(home, ".dotfiles", "system"))
+
+        from rewrite_by_hand.data.variables import MAGIC_STRING
+        from rewrite_by_hand.utils.blocks import blocks_manager
+
+        for mb in sizes:
+            content = generate_config(mb << 20, MAGIC_STRING)
+            expected = content.count(f"/* {MAGIC_STRING}:")
+            start = time.perf_counter()
+            blocks = blocks_manager.cut(content)
+            elapsed = time.perf_counter() - start
+            marked = sum(1 for block in blocks if block.mark is not None)
+            assert marked == expected, (marked, expected)
+            print(f"cut {mb:3} MB: {elapsed:.3f}s, {len(blocks)} blocks ({marked} marked)")
+
+
+if __name__ == "__main__":
+    main()
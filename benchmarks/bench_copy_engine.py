@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""Benchmark for the dot copy engine against shutil.copy2.
+
+Builds a temporary tree of N files of SIZE bytes each and copies it three
+times: with shutil.copy2, with the copy engine into an empty target, and with
+the copy engine again into the now up-to-date target.
+
+Usage: python benchmarks/bench_copy_engine.py [N] [SIZE]
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dot.utils.copy_engine import copy_file, copy_stats
+
+
+def generate_tree(root: str, total: int, size: int) -> None:
+    """Create `total` files of `size` random bytes."""
+    for i in range(total):
+        with open(os.path.join(root, f"file{i}"), "wb") as f:
+            f.write(os.urandom(size))
+
+
+def copy_all(copy, source: str, target: str) -> float:
+    """Copy every file of source into target, returning the elapsed time."""
+    start = time.perf_counter()
+    for name in os.listdir(source):
+        copy(os.path.join(source, name), os.path.join(target, name))
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    total = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000
+    size = int(sys.argv[2]) if len(sys.argv) > 2 else 256 * 1024
+    with tempfile.TemporaryDirectory() as tmp:
+        source = os.path.join(tmp, "source")
+        baseline = os.path.join(tmp, "baseline")
+        target = os.path.join(tmp, "target")
+        for path in (source, baseline, target):
+            os.mkdir(path)
+        generate_tree(source, total, size)
+
+        elapsed = copy_all(shutil.copy2, source, baseline)
+        print(f"shutil.copy2:      {elapsed:.3f}s")
+
+        copy_stats.reset()
+        elapsed = copy_all(copy_file, source, target)
+        print(f"copy_file (cold):  {elapsed:.3f}s, {copy_stats.summary()}")
+        assert copy_stats.copied_files == total
+
+        copy_stats.reset()
+        elapsed = copy_all(copy_file, source, target)
+        print(f"copy_file (again): {elapsed:.3f}s, {copy_stats.summary()}")
+        assert copy_stats.skipped_files == total
+
+
+if __name__ == "__main__":
+    main()
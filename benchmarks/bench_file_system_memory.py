@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""Memory benchmark for dot.utils.file_system.FileSystem.from_dict.
+
+Builds a synthetic config of N nodes (a handful of software owners, a fixed
+directory fan-out), loads it the way ConfigManager does (json.loads followed
+by from_dict) and reports the memory retained by the FileSystem once the
+parsed payload has been dropped.
+
+The same payload is also loaded into a baseline of plain nodes with a
+per-instance __dict__ and the owner strings json.loads produced, the layout
+FileSystem used before its nodes got __slots__ and interned strings.
+
+Usage: python benchmarks/bench_file_system_memory.py [N ...]
+"""
+
+import gc
+import json
+import os
+import sys
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List, Union
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dot.utils.file_system import FileSystem  # noqa: E402
+
+FAN_OUT = 32
+OWNERS = ["nvim", "zsh", "kitty", "fish", "git", "keyd", "kmscon", "hypr"]
+
+
+def build_config(total: int) -> Dict[str, List[Dict[str, Any]]]:
+    """Build a to_dict()-style payload with roughly `total` nodes."""
+    roots: List[Dict[str, Any]] = []
+    remaining = total
+    index = 0
+    while remaining > 0:
+        owner = OWNERS[index % len(OWNERS)]
+        root = {"name": f".config/app{index}", "owner": owner, "contents": []}
+        remaining -= 1
+        frontier = [root]
+        while frontier and remaining > 0:
+            parent = frontier.pop(0)
+            for i in range(FAN_OUT):
+                if remaining <= 0:
+                    break
+                if i % 4 == 0:
+                    child = {"name": f"dir{i}", "owner": owner, "contents": []}
+                    frontier.append(child)
+                else:
+                    child = {"name": f"file{i}.conf", "owner": owner}
+                parent["contents"].append(child)
+                remaining -= 1
+        roots.append(root)
+        index += 1
+    return {"USER": roots, "SYSTEM": []}
+
+
+class BaselineFile:
+    """File node without slots or interning."""
+
+    def __init__(self, name: str, owner: str):
+        self.name = name
+        self.owner = owner
+
+
+class BaselineDir(BaselineFile):
+    """Directory node without slots or interning, children keyed by name."""
+
+    def __init__(self, name: str, owner: str):
+        super().__init__(name, owner)
+        self.children: Dict[str, Union["BaselineDir", BaselineFile]] = {}
+
+
+def baseline_from_dict(data: Dict[str, List[Dict[str, Any]]]) -> Dict[str, list]:
+    """Build baseline nodes for every root of a to_dict()-style payload."""
+    forests: Dict[str, list] = {}
+    for forest_type, roots in data.items():
+        forests[forest_type] = []
+        for root_dict in roots:
+            root = BaselineDir(root_dict["name"], root_dict["owner"])
+            stack = [(root, root_dict)]
+            while stack:
+                dir_node, dir_dict = stack.pop()
+                for child_dict in dir_dict["contents"]:
+                    if "contents" in child_dict:
+                        child = BaselineDir(child_dict["name"], child_dict["owner"])
+                        stack.append((child, child_dict))
+                    else:
+                        child = BaselineFile(child_dict["name"], child_dict["owner"])
+                    dir_node.children[child.name] = child
+            forests[forest_type].append(root)
+    return forests
+
+
+def measure(
+    label: str, load: Callable[[Dict[str, Any]], Any], text: str, total: int
+) -> None:
+    gc.collect()
+    tracemalloc.start()
+    data = json.loads(text)
+    start = time.perf_counter()
+    loaded = load(data)
+    elapsed = time.perf_counter() - start
+    del data
+    gc.collect()
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(
+        f"{total:>9} nodes, {label:8}: retained {retained / 2**20:8.1f} MiB, "
+        f"peak {peak / 2**20:8.1f} MiB, "
+        f"{retained / total:6.0f} B/node, load {elapsed:6.2f}s"
+    )
+    del loaded
+
+
+if __name__ == "__main__":
+    sizes = [int(arg) for arg in sys.argv[1:]] or [10_000, 100_000, 1_000_000]
+    for size in sizes:
+        text = json.dumps(build_config(size))
+        measure("baseline", baseline_from_dict, text, size)
+        measure("slotted", FileSystem.from_dict, text, size)
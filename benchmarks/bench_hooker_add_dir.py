@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""Benchmark for rewrite_by_hand Hooker.add_dir with one versus many copy jobs.
+
+Builds a temporary home with N small files, like a plugin tree, and adds it to
+the repo with COPY_JOBS set to 1 and to JOBS (DOT_JOBS or the default).
+
+Usage: python benchmarks/bench_hooker_add_dir.py [N] [JOBS]
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+FILES_PER_DIR = 50
+
+
+def generate_tree(root: str, total: int) -> None:
+    """Create `total` small files spread over directories of FILES_PER_DIR."""
+    for i in range(total):
+        directory = os.path.join(root, f"dir{i // FILES_PER_DIR}")
+        if i % FILES_PER_DIR == 0:
+            os.mkdir(directory)
+        with open(os.path.join(directory, f"file{i}.lua"), "wb") as f:
+            f.write(os.urandom(2048))
+
+
+def main() -> None:
+    total = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+    with tempfile.TemporaryDirectory() as home:
+        # variables.py resolves ~ at import time, so HOME must be set first
+        os.environ["HOME"] = home
+        if len(sys.argv) > 2:
+            os.environ["DOT_JOBS"] = sys.argv[2]
+        repo_user = os.path.join(home, ".dotfiles", "user")
+        os.makedirs(repo_user)
+        os.makedirs(os.path.join(home, ".dotfiles", "system"))
+        tree = os.path.join(home, ".config", "bench")
+        os.makedirs(tree)
+        generate_tree(tree, total)
+
+        from rewrite_by_hand.utils import hook
+        from rewrite_by_hand.utils.fs_type import Path
+        from rewrite_by_hand.utils.copy_engine import copy_stats
+
+        jobs = hook.COPY_JOBS
+        for hook.COPY_JOBS in (1, jobs):
+            shutil.rmtree(repo_user)
+            os.makedirs(repo_user)
+            copy_stats.reset()
+            start = time.perf_counter()
+            hook.Hooker().add_dir(Path(tree), [])
+            elapsed = time.perf_counter() - start
+            assert copy_stats.copied_files == total, copy_stats.copied_files
+            print(f"add_dir, {hook.COPY_JOBS:2} jobs: {elapsed:.3f}s")
+
+
+if __name__ == "__main__":
+    main()
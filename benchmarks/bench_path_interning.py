@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""Benchmark for a rewrite_by_hand config round-trip through interned Paths.
+
+Builds a temporary home with N files, serializes a FileSystem holding them,
+then measures time and traced memory of from_json followed by to_json with a
+cold Path cache.
+
+Usage: python benchmarks/bench_path_interning.py [N]
+"""
+
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+FILES_PER_DIR = 50
+
+
+def generate_tree(root: str, total: int) -> None:
+    """Create `total` files spread over directories of FILES_PER_DIR files."""
+    for i in range(total):
+        directory = os.path.join(root, f"dir{i // FILES_PER_DIR}")
+        if i % FILES_PER_DIR == 0:
+            os.mkdir(directory)
+        with open(os.path.join(directory, f"file{i}.conf"), "w") as f:
+            f.write("x")
+
+
+def main() -> None:
+    total = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    with tempfile.TemporaryDirectory() as home:
+        # variables.py resolves ~ at import time, so HOME must be set first
+        os.environ["HOME"] = home
+        os.makedirs(os.path.join(home, ".dotfiles", "user"))
+        os.makedirs(os.path.join(home, ".dotfiles", "system"))
+        tree = os.path.join(home, ".config", "bench")
+        os.makedirs(tree)
+        generate_tree(tree, total)
+
+        from rewrite_by_hand.utils.file_system import FileSystem
+        from rewrite_by_hand.utils.fs_type import Path
+
+        fs = FileSystem(if_hook=False)
+        fs.add(tree, "bench")
+        json_str = fs.to_json()
+        del fs
+        Path._interned.clear()
+
+        tracemalloc.start()
+        start = time.perf_counter()
+        loaded = FileSystem.from_json(json_str)
+        loaded_at = time.perf_counter()
+        current, _ = tracemalloc.get_traced_memory()
+        assert loaded.to_json() == json_str
+        end = time.perf_counter()
+        tracemalloc.stop()
+
+        print(f"entries:   {total}")
+        print(f"from_json: {loaded_at - start:.3f}s")
+        print(f"to_json:   {end - loaded_at:.3f}s")
+        print(f"retained:  {current / 2**20:.1f} MiB ({current / total:.0f} B/file)")
+
+
+if __name__ == "__main__":
+    main()
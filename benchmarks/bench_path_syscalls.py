@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""Benchmark for the stat calls made by rewrite_by_hand Path objects.
+
+Builds a temporary home with N files, adds it to a rewrite_by_hand FileSystem,
+walks it and probes it with if_exists, asserting that every location is
+stat'ed once and that lookups and comparisons afterwards cost nothing.
+
+Usage: python benchmarks/bench_path_syscalls.py [N]
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+FILES_PER_DIR = 50
+
+
+def generate_tree(root: str, total: int) -> None:
+    """Create `total` files spread over directories of FILES_PER_DIR files."""
+    for i in range(total):
+        directory = os.path.join(root, f"dir{i // FILES_PER_DIR}")
+        if i % FILES_PER_DIR == 0:
+            os.mkdir(directory)
+        with open(os.path.join(directory, f"file{i}.conf"), "w") as f:
+            f.write("x")
+
+
+def main() -> None:
+    total = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+    with tempfile.TemporaryDirectory() as home:
+        # variables.py resolves ~ at import time, so HOME must be set first
+        os.environ["HOME"] = home
+        os.makedirs(os.path.join(home, ".dotfiles", "user"))
+        os.makedirs(os.path.join(home, ".dotfiles", "system"))
+        tree = os.path.join(home, ".config", "bench")
+        os.makedirs(tree)
+        generate_tree(tree, total)
+        dirs = (total + FILES_PER_DIR - 1) // FILES_PER_DIR
+
+        from rewrite_by_hand.utils.file_system import FileSystem
+        from rewrite_by_hand.utils.fs_type import syscall_counter
+
+        fs = FileSystem(if_hook=False)
+        syscall_counter.reset()
+        start = time.perf_counter()
+        fs.add(tree, "bench")
+        elapsed = time.perf_counter() - start
+        # only the root is stat'ed; the new Dir is not walked until used
+        assert syscall_counter.count == 1, syscall_counter.count
+        print(f"add:       {syscall_counter.count} stats, {elapsed:.3f}s")
+
+        syscall_counter.reset()
+        start = time.perf_counter()
+        fs.forest[0][0][0][0].materialize()
+        elapsed = time.perf_counter() - start
+        # one Path per directory and file below the root
+        assert syscall_counter.count == dirs + total, syscall_counter.count
+        print(f"walk:      {syscall_counter.count} stats, {elapsed:.3f}s")
+
+        probes = [
+            os.path.join(tree, f"dir{i // FILES_PER_DIR}", f"file{i}.conf")
+            for i in range(0, total, max(1, total // 1000))
+        ]
+        syscall_counter.reset()
+        start = time.perf_counter()
+        for probe in probes:
+            assert fs.if_exists(probe)[0]
+        elapsed = time.perf_counter() - start
+        # every probed path was interned by the walk, so probing costs no stat
+        assert syscall_counter.count == 0, syscall_counter.count
+        print(f"if_exists: {syscall_counter.count} stats for {len(probes)} probes, {elapsed:.3f}s")
+
+
+if __name__ == "__main__":
+    main()
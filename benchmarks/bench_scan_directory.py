@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""Benchmark for dot.utils.file_system.FileSystem._scan_directory.
+
+Generates a temporary tree of N entries and compares the scandir-based
+parallel scanner with the previous os.listdir + os.path.isdir recursion,
+checking that both produce the same Dir tree.
+
+Usage: python benchmarks/bench_scan_directory.py [N]
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dot.utils.file_system import Dir, File, FileSystem  # noqa: E402
+
+FILES_PER_DIR = 20
+DIRS_PER_DIR = 4
+
+
+def generate_tree(root: str, total: int) -> None:
+    """Create roughly `total` files and directories below root."""
+    created = 0
+    frontier = [root]
+    while frontier and created < total:
+        current = frontier.pop(0)
+        for i in range(DIRS_PER_DIR):
+            if created >= total:
+                return
+            sub = os.path.join(current, f"dir{i}")
+            os.mkdir(sub)
+            frontier.append(sub)
+            created += 1
+        for i in range(FILES_PER_DIR):
+            if created >= total:
+                return
+            with open(os.path.join(current, f"file{i}.conf"), "w") as f:
+                f.write("x")
+            created += 1
+
+
+def legacy_scan(path: str, owner: str) -> Dir:
+    """The recursive listdir/isdir scanner this benchmark compares against."""
+    dir_node = Dir(os.path.basename(path) or path, owner)
+    for item in os.listdir(path):
+        item_path = os.path.join(path, item)
+        if os.path.isdir(item_path):
+            dir_node.add_node(legacy_scan(item_path, owner))
+        else:
+            dir_node.add_node(File(item, owner))
+    return dir_node
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    total = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    fs = FileSystem()
+    with tempfile.TemporaryDirectory() as tmp:
+        root = os.path.join(tmp, "tree")
+        os.mkdir(root)
+        generate_tree(root, total)
+
+        # Warm the dentry cache so both runs see the same conditions
+        legacy_scan(root, "bench")
+
+        old_tree, old_time = timed(legacy_scan, root, "bench")
+        new_tree, new_time = timed(fs._scan_directory, root, "bench")
+
+    assert old_tree.to_dict() == new_tree.to_dict(), "scanners disagree"
+    print(f"{total} entries")
+    print(f"  listdir + isdir recursion: {old_time:6.3f}s")
+    print(f"  parallel scandir:          {new_time:6.3f}s")
+    print(f"  speedup:                   {old_time / new_time:6.2f}x")
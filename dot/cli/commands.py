@@ -1,5 +1,6 @@
 """Command implementations for the Dot CLI tool."""
 
+import json
 import os
 import shutil
 import subprocess
@@ -11,8 +12,12 @@ from dot.core.config import config_manager
 from dot.core.conflict import conflict_manager
 from dot.core.git import git_manager
 from dot.core.health import check_and_guide
+from dot.core.plan import Plan
 from dot.core.sync import sync_manager
+from dot.utils.exclude import exclude_manager
+from dot.utils.fs_utils import prune_empty_dirs
 from dot.utils.logger import logger
+from dot.utils.object_store import object_store
 
 
 def cmd_init(args: Any) -> int:
@@ -113,6 +118,9 @@ def cmd_init(args: Any) -> int:
     # Create local_config.json
     _create_local_config()
 
+    # Create exclude.json
+    exclude_manager.save_default()
+
     # Create .gitignore
     _create_gitignore()
 
@@ -150,7 +158,11 @@ def _create_gitignore() -> None:
     try:
         with open(gitignore_path, "w", encoding="utf-8") as f:
             f.write("# Local configuration\n")
-            f.write("local_config.json\n\n")
+            f.write("local_config.json\n")
+            f.write("local_config.d/\n")
+            f.write("scan_cache.json\n")
+            f.write("hash_cache.json\n")
+            f.write("objects/\n\n")
             f.write("# Conflict files\n")
             f.write("conflict/\n")
     except OSError as e:
@@ -174,40 +186,63 @@ def _create_conflict_dirs() -> None:
             logger.error(f"Error creating directory {dir_path}: {e}")
 
 
+def _print_plan(plan: Plan) -> None:
+    """Print the operations of a plan and the bytes it would write."""
+    for line in plan.describe():
+        print(line)
+    output_manager.print(
+        "plan_summary", count=len(plan.operations), size=plan.estimated_bytes
+    )
+
+
 def cmd_add(args: Any) -> int:
     """Add a file or directory to the repository."""
     # Check repository health
     if not check_and_guide():
         return 1
 
-    path = args.path
+    paths = args.paths
     software = args.software
 
-    # Expand path
-    real_path = os.path.expanduser(path)
+    # Expand paths
+    real_paths = [os.path.expanduser(path) for path in paths]
 
-    # Check if path exists
-    if not os.path.exists(real_path):
-        output_manager.print_error("add_path_not_found", path=path)
-        return 1
+    # Check if paths exist
+    for path, real_path in zip(paths, real_paths):
+        if not os.path.exists(real_path):
+            output_manager.print_error("add_path_not_found", path=path)
+            return 1
 
     try:
-        # Add file to configuration
-        config_manager.add_file(real_path, software)
+        if args.dry_run:
+            # Plan against the new configuration without saving it
+            config_manager.add_files(real_paths, software, save=False)
+            plan = Plan()
+            for real_path in real_paths:
+                sync_manager.plan_to_repo(real_path, plan)
+            _print_plan(plan)
+            return 0
 
-        # Copy file to repository
-        success = sync_manager.copy_to_repo(real_path)
-        if not success:
-            output_manager.print_error("add_copy_failed", path=path)
-            return 1
+        # Add all paths to the configuration in one batch
+        config_manager.add_files(real_paths, software)
+
+        # Copy files to repository
+        for path, real_path in zip(paths, real_paths):
+            success = sync_manager.copy_to_repo(real_path)
+            if not success:
+                output_manager.print_error("add_copy_failed", path=path)
+                return 1
 
         # Commit changes
-        success, output = git_manager.add_and_commit(f"Add {path} for {software}")
+        success, output = git_manager.add_and_commit(
+            f"Add {' '.join(paths)} for {software}"
+        )
         if not success:
             output_manager.print_error("add_commit_failed", error=output)
             return 1
 
-        output_manager.print("add_success", path=path, software=software)
+        for path in paths:
+            output_manager.print("add_success", path=path, software=software)
         return 0
     except Exception as e:
         output_manager.print_error("add_failed", error=str(e))
@@ -241,16 +276,10 @@ def cmd_remove(args: Any) -> int:
                 os.remove(repo_path)
 
             # Remove parent directories if empty
-            parent_dir = os.path.dirname(repo_path)
-            user_path = os.path.join(os.path.expanduser("~/.dotfiles"), "user")
-            system_path = os.path.join(os.path.expanduser("~/.dotfiles"), "system")
-
-            while parent_dir != user_path and parent_dir != system_path:
-                if not os.listdir(parent_dir):
-                    os.rmdir(parent_dir)
-                    parent_dir = os.path.dirname(parent_dir)
-                else:
-                    break
+            prune_empty_dirs(
+                [repo_path],
+                [sync_manager.user_repo_path, sync_manager.system_repo_path],
+            )
 
         # Commit changes
         success, output = git_manager.add_and_commit(f"Remove {path} for {software}")
@@ -296,6 +325,7 @@ def cmd_edit(args: Any) -> int:
 
     # Open file in editor
     try:
+        object_store.detach(edit_path)
         process = subprocess.run([editor, edit_path], check=False)
 
         if process.returncode != 0:
@@ -337,6 +367,19 @@ def cmd_apply(args: Any) -> int:
         path = args.path
         real_path = os.path.expanduser(path)
 
+        if args.dry_run:
+            if not os.path.exists(sync_manager._get_repo_path(real_path)):
+                output_manager.print_error("apply_failed", path=path)
+                return 1
+            try:
+                plan = sync_manager.plan_from_repo(real_path)
+            except Exception as e:
+                logger.error(f"Error planning copy from repository: {e}")
+                output_manager.print_error("apply_failed", path=path)
+                return 1
+            _print_plan(plan)
+            return 0
+
         # Copy file from repository to system
         success = sync_manager.copy_from_repo(real_path)
         if not success:
@@ -371,6 +414,16 @@ def cmd_sync(args: Any) -> int:
             output_manager.print_error("sync_file_not_found", path=path)
             return 1
 
+        if args.dry_run:
+            try:
+                plan = sync_manager.plan_to_repo(real_path)
+            except Exception as e:
+                logger.error(f"Error planning copy to repository: {e}")
+                output_manager.print_error("sync_failed", path=path)
+                return 1
+            _print_plan(plan)
+            return 0
+
         # Copy file from system to repository
         success = sync_manager.copy_to_repo(real_path)
         if not success:
@@ -424,6 +477,43 @@ def cmd_diff(args: Any) -> int:
         return 1
 
 
+def cmd_compare(args: Any) -> int:
+    """Compare the managed trees of two configurations."""
+    # Check repository health
+    if not check_and_guide():
+        return 1
+
+    file_systems = []
+    for path in (args.old, args.new):
+        if path is None:
+            file_systems.append(None)
+            continue
+        try:
+            file_systems.append(
+                config_manager.load_file_system(os.path.expanduser(path))
+            )
+        except (OSError, ValueError) as e:
+            output_manager.print_error("compare_load_failed", path=path, error=str(e))
+            return 1
+
+    changes = config_manager.compare(*file_systems)
+    if args.json:
+        print(
+            json.dumps(
+                [
+                    {"change": change, "path": path, "old_owner": old, "new_owner": new}
+                    for change, path, old, new in changes
+                ],
+                indent=2,
+            )
+        )
+    else:
+        # One tab-separated record per line, "-" for a missing owner
+        for change, path, old, new in changes:
+            print(f"{change}\t{path}\t{old or '-'}\t{new or '-'}")
+    return 0
+
+
 def cmd_push(args: Any) -> int:
     """Push changes to the remote repository."""
     # Check repository health and remote configuration
@@ -528,6 +618,52 @@ def cmd_manage(args: Any) -> int:
         return 1
 
 
+def cmd_layout(args: Any) -> int:
+    """Switch the layout of the configuration files."""
+    # Check repository health
+    if not check_and_guide():
+        return 1
+
+    layout = args.layout
+
+    try:
+        config_manager.set_layout(layout)
+    except (OSError, ValueError) as e:
+        output_manager.print_error("layout_failed", error=str(e))
+        return 1
+
+    # Commit changes
+    success, output = git_manager.add_and_commit(f"Switch config layout to {layout}")
+    if not success:
+        output_manager.print_error("layout_commit_failed", error=output)
+        return 1
+
+    output_manager.print("layout_success", layout=layout)
+    return 0
+
+
+def cmd_store(args: Any) -> int:
+    """Enable, disable or clean up the object store."""
+    # Check repository health
+    if not check_and_guide():
+        return 1
+
+    try:
+        if args.action == "enable":
+            shared = object_store.enable()
+            output_manager.print("store_enabled", shared=shared)
+        elif args.action == "disable":
+            object_store.disable()
+            output_manager.print("store_disabled")
+        else:
+            removed = object_store.gc()
+            output_manager.print("store_gc_success", removed=removed)
+    except OSError as e:
+        output_manager.print_error("store_failed", error=str(e))
+        return 1
+    return 0
+
+
 def cmd_conflict(args: Any) -> int:
     """Manage conflicts between machines."""
     # Check repository health
@@ -586,6 +722,7 @@ def cmd_conflict(args: Any) -> int:
         editor = os.environ.get("EDITOR", "vi")
 
         try:
+            object_store.detach(conflict_path)
             process = subprocess.run([editor, conflict_path], check=False)
 
             if process.returncode != 0:
@@ -604,7 +741,7 @@ def cmd_conflict(args: Any) -> int:
                 return 1
 
             # Copy conflict file to repository
-            shutil.copy2(conflict_path, repo_path)
+            object_store.copy_file(conflict_path, repo_path)
 
             # Commit changes
             success, output = git_manager.add_and_commit(
@@ -12,14 +12,18 @@ from dot.cli.commands import (
     cmd_apply,
     cmd_sync,
     cmd_diff,
+    cmd_compare,
     cmd_push,
     cmd_pull,
     cmd_update,
     cmd_remote,
     cmd_manage,
+    cmd_layout,
+    cmd_store,
     cmd_conflict,
     cmd_clean,
 )
+from dot.core.config import LAYOUTS
 
 
 def create_parser() -> argparse.ArgumentParser:
@@ -46,8 +50,15 @@ def create_parser() -> argparse.ArgumentParser:
     add_parser = subparsers.add_parser(
         "add", help="Add a file or directory to the repository"
     )
-    add_parser.add_argument("path", help="Path to the file or directory")
+    add_parser.add_argument(
+        "paths", nargs="+", metavar="path", help="Paths to the files or directories"
+    )
     add_parser.add_argument("software", help="Name of the software the file belongs to")
+    add_parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="Print the planned file operations without changing anything",
+    )
     add_parser.set_defaults(func=cmd_add)
 
     # remove command
@@ -71,6 +82,11 @@ def create_parser() -> argparse.ArgumentParser:
     )
     apply_parser.add_argument("path", nargs="?", help="Path to the file or directory")
     apply_parser.add_argument("--all", action="store_true", help="Apply all changes")
+    apply_parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="Print the planned file operations without changing anything",
+    )
     apply_parser.set_defaults(func=cmd_apply)
 
     # sync command
@@ -79,6 +95,11 @@ def create_parser() -> argparse.ArgumentParser:
     )
     sync_parser.add_argument("path", nargs="?", help="Path to the file or directory")
     sync_parser.add_argument("--all", action="store_true", help="Sync all changes")
+    sync_parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="Print the planned file operations without changing anything",
+    )
     sync_parser.set_defaults(func=cmd_sync)
 
     # diff command
@@ -88,6 +109,28 @@ def create_parser() -> argparse.ArgumentParser:
     diff_parser.add_argument("path", nargs="?", help="Path to the file or directory")
     diff_parser.set_defaults(func=cmd_diff)
 
+    # compare command
+    compare_parser = subparsers.add_parser(
+        "compare",
+        help="List paths added, removed or reassigned between two configurations",
+    )
+    compare_parser.add_argument(
+        "--from",
+        dest="old",
+        metavar="FILE",
+        help="Configuration to compare from (default: the repository config.json)",
+    )
+    compare_parser.add_argument(
+        "--to",
+        dest="new",
+        metavar="FILE",
+        help="Configuration to compare to (default: this machine's local config)",
+    )
+    compare_parser.add_argument(
+        "--json", action="store_true", help="Print the changes as a JSON array"
+    )
+    compare_parser.set_defaults(func=cmd_compare)
+
     # push command
     push_parser = subparsers.add_parser(
         "push", help="Push changes to the remote repository"
@@ -121,6 +164,29 @@ def create_parser() -> argparse.ArgumentParser:
     manage_parser.add_argument("software", help="Name of the software to manage")
     manage_parser.set_defaults(func=cmd_manage)
 
+    # layout command
+    layout_parser = subparsers.add_parser(
+        "layout", help="Switch how the configuration files are stored"
+    )
+    layout_parser.add_argument(
+        "layout",
+        choices=LAYOUTS,
+        help="'single' for one config.json, 'sharded' for one file per software",
+    )
+    layout_parser.set_defaults(func=cmd_layout)
+
+    # store command
+    store_parser = subparsers.add_parser(
+        "store", help="Manage the content-addressed object store"
+    )
+    store_parser.add_argument(
+        "action",
+        choices=("enable", "disable", "gc"),
+        help="'enable' to link repository files to one stored copy of each "
+        "content, 'disable' to copy them back, 'gc' to delete unused contents",
+    )
+    store_parser.set_defaults(func=cmd_store)
+
     # conflict command
     conflict_parser = subparsers.add_parser(
         "conflict", help="Manage conflicts between machines"
@@ -2,17 +2,42 @@
 
 import json
 import os
-from typing import Dict, List, Any, Optional, Set, Union
+import shutil
+from typing import Dict, Iterator, List, Any, Optional, Set, Tuple
+from urllib.parse import quote
 
-from dot.utils.file_system import FileSystem, Dir, File
+from dot.utils.file_system import FileSystem, diff_file_systems
+from dot.utils.gitignore import ensure_ignored
 from dot.utils.logger import logger
+from dot.utils.scan_cache import scan_cache
+
+# Config layouts: one document, or a manifest plus one shard per software
+LAYOUTS = ("single", "sharded")
+
+
+def _shard_dir(config_path: str) -> str:
+    """Get the shard directory of a config file, e.g. config.json -> config.d."""
+    return os.path.splitext(config_path)[0] + ".d"
+
+
+def _shard_path(shard_dir: str, owner: str) -> str:
+    """Get the path of the shard holding the roots owned by a software."""
+    return os.path.join(shard_dir, quote(owner, safe="") + ".json")
 
 
 class ConfigManager:
     """Manage configuration files for the Dot CLI tool."""
 
-    def __init__(self) -> None:
-        """Initialize the configuration manager."""
+    def __init__(self, lazy: bool = True) -> None:
+        """
+        Initialize the configuration manager.
+
+        Args:
+            lazy: Read the configuration files on first use and build their
+                trees on demand, so commands that touch one path do not pay
+                for every managed directory at startup
+        """
+        self.lazy = lazy
         self.dotfiles_path = os.path.expanduser("~/.dotfiles")
         self.config_path = os.path.join(self.dotfiles_path, "config.json")
         self.local_config_path = os.path.join(self.dotfiles_path, "local_config.json")
@@ -21,23 +46,137 @@ class ConfigManager:
         # if not os.path.exists(self.dotfiles_path):
         #     os.makedirs(self.dotfiles_path, exist_ok=True)
 
-        # Initialize file system objects
-        self.fs = FileSystem()
-        self.local_fs = FileSystem()
+        # Initialize file system objects; in lazy mode the configuration files
+        # are only read when they are first needed
+        self._fs: Optional[FileSystem] = None
+        self._local_fs: Optional[FileSystem] = None
+        self._conflict_files: Optional[Set[str]] = None
+        self._layout: Optional[str] = None
+        # Layout each config file was last read or written in, by path
+        self._file_layouts: Dict[str, str] = {}
 
         # Load configurations
-        self._load_config()
-        self._load_local_config()
+        if not lazy:
+            self._load_config()
+            self._load_local_config()
+
+    @property
+    def fs(self) -> FileSystem:
+        """The global file system, loaded on first access."""
+        if self._fs is None:
+            self._load_config()
+        return self._fs
+
+    @fs.setter
+    def fs(self, value: FileSystem) -> None:
+        self._fs = value
+
+    @property
+    def conflict_files(self) -> Set[str]:
+        """Paths marked as conflict files, loaded on first access."""
+        if self._conflict_files is None:
+            self._load_config()
+        return self._conflict_files
+
+    @conflict_files.setter
+    def conflict_files(self, value: Set[str]) -> None:
+        self._conflict_files = value
+
+    @property
+    def local_fs(self) -> FileSystem:
+        """The local file system, loaded on first access."""
+        if self._local_fs is None:
+            self._load_local_config()
+        return self._local_fs
+
+    @local_fs.setter
+    def local_fs(self, value: FileSystem) -> None:
+        self._local_fs = value
+
+    @property
+    def layout(self) -> str:
+        """The layout of config.json, "single" or "sharded"."""
+        if self._layout is None:
+            self._load_config()
+        return self._layout
+
+    def _read_config(self, config_path: str) -> Dict[str, Any]:
+        """
+        Read a config file in either layout.
+
+        A sharded config file is a manifest listing the software whose roots
+        live in <name>.d/<software>.json. The shards are merged back into one
+        "file_system" entry, so callers see the same document in both layouts.
+        """
+        with open(config_path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        self._file_layouts[config_path] = data.get("layout", "single")
+        if data.get("layout") != "sharded":
+            return data
+
+        shard_dir = _shard_dir(config_path)
+        file_system: Dict[str, List[Dict[str, Any]]] = {"USER": [], "SYSTEM": []}
+        for owner in data.get("software", []):
+            with open(_shard_path(shard_dir, owner), "r", encoding="utf-8") as f:
+                shard = json.load(f)
+            for forest_type in file_system:
+                file_system[forest_type].extend(shard.get(forest_type, []))
+        data["file_system"] = file_system
+        return data
+
+    def _write_config(
+        self, config_path: str, fs: FileSystem, extra: Dict[str, Any]
+    ) -> None:
+        """
+        Write a config file in the current layout.
+
+        The single layout writes the whole document. The sharded layout only
+        rewrites the shards of fs.dirty_owners, deletes the shards of software
+        that no longer owns a root and then writes the small manifest.
+        """
+        shard_dir = _shard_dir(config_path)
+        if self._file_layouts.get(config_path) != self.layout:
+            # New file or layout change: every shard has to be written
+            fs.dirty_owners.update(fs.root_owners())
+        if self.layout == "sharded":
+            if config_path == self.local_config_path and not os.path.isdir(shard_dir):
+                ensure_ignored(
+                    self.dotfiles_path, ["local_config.d/"], "Local configuration"
+                )
+            os.makedirs(shard_dir, exist_ok=True)
+            owners = fs.root_owners()
+            for owner in fs.dirty_owners:
+                shard_path = _shard_path(shard_dir, owner)
+                if owner in owners:
+                    with open(shard_path, "w", encoding="utf-8") as f:
+                        json.dump(fs.to_dict({owner}), f, indent=2)
+                elif os.path.exists(shard_path):
+                    os.remove(shard_path)
+            data = {"layout": "sharded", "software": sorted(owners), **extra}
+        else:
+            data = {"file_system": fs.to_dict(), **extra}
+
+        with open(config_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=2)
+        fs.dirty_owners.clear()
+        self._file_layouts[config_path] = self.layout
+
+        if self.layout != "sharded" and os.path.isdir(shard_dir):
+            # Left behind by switching back to the single layout
+            shutil.rmtree(shard_dir)
 
     def _load_config(self) -> None:
         """Load the global configuration file."""
+        self._layout = "single"
         if os.path.exists(self.config_path):
             try:
-                with open(self.config_path, "r", encoding="utf-8") as f:
-                    config_data = json.load(f)
-                    self.fs = FileSystem.from_dict(config_data.get("file_system", {}))
-                    self.conflict_files = set(config_data.get("conflict_files", []))
-            except (json.JSONDecodeError, ValueError) as e:
+                config_data = self._read_config(self.config_path)
+                self._layout = config_data.get("layout", "single")
+                self.fs = FileSystem.from_dict(
+                    config_data.get("file_system", {}), lazy=self.lazy
+                )
+                self.conflict_files = set(config_data.get("conflict_files", []))
+            except (OSError, json.JSONDecodeError, ValueError) as e:
                 logger.error(f"Error loading config file: {e}")
                 self.fs = FileSystem()
                 self.conflict_files = set()
@@ -49,42 +188,77 @@ class ConfigManager:
         """Load the local configuration file."""
         if os.path.exists(self.local_config_path):
             try:
-                with open(self.local_config_path, "r", encoding="utf-8") as f:
-                    local_config_data = json.load(f)
-                    self.local_fs = FileSystem.from_dict(
-                        local_config_data.get("file_system", {})
-                    )
-            except (json.JSONDecodeError, ValueError) as e:
+                local_config_data = self._read_config(self.local_config_path)
+                self.local_fs = FileSystem.from_dict(
+                    local_config_data.get("file_system", {}), lazy=self.lazy
+                )
+            except (OSError, json.JSONDecodeError, ValueError) as e:
                 logger.error(f"Error loading local config file: {e}")
                 self.local_fs = FileSystem()
         else:
             self.local_fs = FileSystem()
 
+    def load_file_system(self, path: str) -> FileSystem:
+        """Load the file system stored in a config.json or local_config.json file."""
+        data = self._read_config(path)
+        return FileSystem.from_dict(data.get("file_system", {}), lazy=self.lazy)
+
+    def compare(
+        self, old: Optional[FileSystem] = None, new: Optional[FileSystem] = None
+    ) -> Iterator[Tuple[str, str, Optional[str], Optional[str]]]:
+        """
+        Diff two file systems, by default the global config against the local one.
+
+        With the defaults, "removed" paths are managed in the repository but not
+        on this machine and "added" paths are managed only locally.
+        """
+        return diff_file_systems(
+            self.fs if old is None else old, self.local_fs if new is None else new
+        )
+
     def save_config(self) -> None:
         """Save the global configuration file."""
-        config_data = {
-            "file_system": self.fs.to_dict(),
-            "conflict_files": list(self.conflict_files),
-        }
-
         try:
-            with open(self.config_path, "w", encoding="utf-8") as f:
-                json.dump(config_data, f, indent=2)
+            self._write_config(
+                self.config_path,
+                self.fs,
+                {"conflict_files": list(self.conflict_files)},
+            )
         except (OSError, ValueError) as e:
             logger.error(f"Error saving config file: {e}")
 
     def save_local_config(self) -> None:
-        """Save the local configuration file."""
-        local_config_data = {
-            "file_system": self.local_fs.to_dict(),
-        }
+        """
+        Save the local configuration file.
 
+        It uses the same layout as the global configuration file.
+        """
         try:
-            with open(self.local_config_path, "w", encoding="utf-8") as f:
-                json.dump(local_config_data, f, indent=2)
+            self._write_config(self.local_config_path, self.local_fs, {})
         except (OSError, ValueError) as e:
             logger.error(f"Error saving local config file: {e}")
 
+    def set_layout(self, layout: str) -> None:
+        """
+        Rewrite the global and local configuration files in another layout.
+
+        Args:
+            layout: "single" for one document per config file, "sharded" for a
+                manifest plus one file per software under config.d/ and
+                local_config.d/
+        """
+        if layout not in LAYOUTS:
+            raise ValueError(f"Unknown config layout: {layout}")
+
+        # Read both files in their current layout before switching
+        if self._fs is None:
+            self._load_config()
+        if self._local_fs is None:
+            self._load_local_config()
+        self._layout = layout
+        self.save_config()
+        self.save_local_config()
+
     def add_file(self, path: str, software: str) -> None:
         """Add a file to the configuration."""
         real_path = os.path.expanduser(path)
@@ -101,6 +275,30 @@ class ConfigManager:
         self.save_config()
         self.save_local_config()
 
+    def add_files(self, paths: List[str], software: str, save: bool = True) -> None:
+        """
+        Add several files to the configuration in one batch.
+
+        Args:
+            paths: Paths to add
+            software: Software the paths belong to
+            save: Whether to write the configuration files, False for a dry run
+        """
+        real_paths = [os.path.expanduser(path) for path in paths]
+        for path, real_path in zip(paths, real_paths):
+            if not os.path.exists(real_path):
+                raise FileNotFoundError(f"Path does not exist: {path}")
+
+        # Add to the global and local file systems
+        self.fs.add_many((real_path, software) for real_path in real_paths)
+        self.local_fs.add_many((real_path, software) for real_path in real_paths)
+
+        # Save configurations and the directory listings read while scanning
+        if save:
+            self.save_config()
+            self.save_local_config()
+            scan_cache.save()
+
     def remove_file(self, path: str, software: str) -> None:
         """Remove a file from the configuration."""
         real_path = os.path.expanduser(path)
@@ -151,31 +349,16 @@ class ConfigManager:
 
     def manage_software(self, software: str) -> None:
         """Add software configuration to local config."""
-        # Find nodes in global config with the given owner
-        global_nodes = self._find_nodes_by_owner(self.fs, software)
-
-        # Add these nodes to the local config
-        for node in global_nodes:
-            if isinstance(node, Dir):
-                self.local_fs.add(os.path.join("/", node.name), software)
-            elif isinstance(node, File):
-                self.local_fs.add(os.path.join("/", node.name), software)
+        # Every subtree owned by the software in the global config, nested
+        # ones included, straight from the owner index
+        for path in self.fs.owner_paths(software):
+            if not os.path.exists(path):
+                logger.warning(f"Skipping missing path: {path}")
+                continue
+            self.local_fs.add(path, software)
 
         self.save_local_config()
 
-    def _find_nodes_by_owner(
-        self, fs: FileSystem, owner: str
-    ) -> List[Union[Dir, File]]:
-        """Find all nodes with the given owner in the filesystem."""
-        nodes = []
-
-        for forest_type in ["USER", "SYSTEM"]:
-            for node in fs.forests[forest_type]:
-                if node.owner == owner:
-                    nodes.append(node)
-
-        return nodes
-
 
 # Create a global instance for use throughout the application
 config_manager = ConfigManager()
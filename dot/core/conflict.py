@@ -6,7 +6,10 @@ import shutil
 from typing import List, Tuple, Optional, Dict
 
 from dot.cli.output import output_manager
+from dot.core.plan import Plan
+from dot.utils.fs_utils import prune_empty_dirs
 from dot.utils.logger import logger
+from dot.utils.object_store import object_store
 
 # Magic string for conflict markers
 MAGIC_STRING = "YuriSaveTheWorld"
@@ -64,8 +67,8 @@ class ConflictManager:
             rel_path = real_path.lstrip("/")
             return os.path.join(self.dotfiles_path, "system", rel_path)
 
-    def initialize_conflict(self, path: str) -> bool:
-        """Initialize conflict markers for a file."""
+    def plan_conflict(self, plan: Plan, path: str) -> bool:
+        """Plan initializing the conflict version of a file."""
         real_path = os.path.expanduser(path)
 
         # Check if file exists
@@ -77,12 +80,18 @@ class ConflictManager:
         conflict_file_path = self._get_conflict_file_path(real_path)
         repo_file_path = self._get_repo_file_path(real_path)
 
-        # Create directories if needed
-        os.makedirs(os.path.dirname(conflict_file_path), exist_ok=True)
+        # Copy repo file to conflict file, a reflink when the object store is on
+        plan.mkdir(os.path.dirname(conflict_file_path))
+        plan.copy_into_repo(repo_file_path, conflict_file_path)
+        return True
 
-        # Copy repo file to conflict file
+    def initialize_conflict(self, path: str) -> bool:
+        """Initialize conflict markers for a file."""
+        plan = Plan()
+        if not self.plan_conflict(plan, path):
+            return False
         try:
-            shutil.copy2(repo_file_path, conflict_file_path)
+            plan.execute()
             return True
         except (OSError, shutil.Error) as e:
             logger.error(f"Error copying file: {e}")
@@ -158,10 +167,14 @@ class ConflictManager:
                 else:  # Conflict block
                     merged_blocks.append(repo_blocks[i])
 
-            # Join blocks and write to repository file
+            # Join blocks and replace the repository file, which may be a link
+            # to a blob of the object store and must not be written in place
             merged_content = "".join(merged_blocks)
-            with open(repo_file_path, "w", encoding="utf-8") as f:
+            tmp_path = f"{repo_file_path}.tmp{os.getpid()}"
+            with open(tmp_path, "w", encoding="utf-8") as f:
                 f.write(merged_content)
+            shutil.copymode(repo_file_path, tmp_path)
+            os.replace(tmp_path, repo_file_path)
 
             return True
         except Exception as e:
@@ -237,19 +250,13 @@ class ConflictManager:
 
         try:
             # Copy conflict file to repo file
-            shutil.copy2(conflict_file_path, repo_file_path)
+            object_store.copy_file(conflict_file_path, repo_file_path)
 
             # Remove conflict file
             os.remove(conflict_file_path)
 
             # Remove parent directories if empty
-            parent_dir = os.path.dirname(conflict_file_path)
-            while parent_dir != self.conflict_path:
-                if not os.listdir(parent_dir):
-                    os.rmdir(parent_dir)
-                    parent_dir = os.path.dirname(parent_dir)
-                else:
-                    break
+            prune_empty_dirs([conflict_file_path], [self.conflict_path])
 
             return True
         except Exception as e:
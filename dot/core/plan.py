@@ -0,0 +1,223 @@
+"""Planning and execution of file operations for the Dot CLI tool."""
+
+import os
+import shutil
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+from dot.utils import copy_engine
+from dot.utils.file_system import SCAN_WORKERS
+from dot.utils.object_store import object_store
+
+# Operation kinds
+MKDIR = "mkdir"
+COPY = "copy"
+LINK = "link"
+REMOVE = "remove"
+CHMOD = "chmod"
+
+
+class Operation:
+    """One file operation of a plan."""
+
+    def __init__(
+        self,
+        kind: str,
+        path: str,
+        source: Optional[str] = None,
+        mode: Optional[int] = None,
+        size: int = 0,
+        skip_unchanged: bool = True,
+    ) -> None:
+        """
+        Initialize an operation.
+
+        Args:
+            kind: One of MKDIR, COPY, LINK, REMOVE and CHMOD
+            path: Path the operation changes
+            source: File copied or linked to path
+            mode: Permission bits set by CHMOD
+            size: Estimated bytes written
+            skip_unchanged: Whether a COPY may skip an up-to-date path
+        """
+        self.kind = kind
+        self.path = path
+        self.source = source
+        self.mode = mode
+        self.size = size
+        self.skip_unchanged = skip_unchanged
+
+    def describe(self) -> str:
+        """Describe the operation in one line."""
+        if self.kind in (COPY, LINK):
+            return f"{self.kind}\t{self.source} -> {self.path}\t{self.size} bytes"
+        if self.kind == CHMOD:
+            return f"{self.kind}\t{self.path}\t{self.mode:o}"
+        return f"{self.kind}\t{self.path}"
+
+
+class Plan:
+    """
+    File operations computed for a command before anything is changed.
+
+    A plan can be printed for --dry-run or executed. Execution does not follow
+    the planning order but a fixed one: removals, then every directory once
+    with parents first, then copies and links sorted by source for locality
+    and run on a thread pool, then permission changes. A copy reading the
+    target of another copy waits for it.
+    """
+
+    def __init__(self) -> None:
+        """Initialize an empty plan."""
+        self.operations: List[Operation] = []
+
+    def mkdir(self, path: str) -> None:
+        """Plan creating a directory and its parents."""
+        self.operations.append(Operation(MKDIR, path))
+
+    def copy(self, source: str, path: str, skip_unchanged: bool = True) -> None:
+        """Plan copying a file with copy_engine.copy_file."""
+        self.operations.append(
+            Operation(
+                COPY,
+                path,
+                source=source,
+                size=self._estimate(source, path, skip_unchanged),
+                skip_unchanged=skip_unchanged,
+            )
+        )
+
+    def link(self, source: str, path: str) -> None:
+        """Plan copying a file through the object store, see ObjectStore."""
+        self.operations.append(
+            Operation(LINK, path, source=source, size=self._estimate(source, path))
+        )
+
+    def copy_into_repo(
+        self, source: str, path: str, skip_unchanged: bool = True
+    ) -> None:
+        """Plan copying a file into the repository: a link if the store is on."""
+        if object_store.enabled:
+            self.link(source, path)
+        else:
+            self.copy(source, path, skip_unchanged)
+
+    def remove(self, path: str) -> None:
+        """Plan removing a file or a directory tree."""
+        self.operations.append(Operation(REMOVE, path))
+
+    def chmod(self, path: str, mode: int) -> None:
+        """Plan setting the permission bits of a path."""
+        self.operations.append(Operation(CHMOD, path, mode=mode))
+
+    def copy_tree(
+        self,
+        source: str,
+        target: str,
+        ignore: Optional[Callable[[str, List[str]], List[str]]] = None,
+        into_repo: bool = False,
+    ) -> None:
+        """
+        Plan copying a directory tree, like shutil.copytree.
+
+        Args:
+            source: Directory to copy
+            target: Directory to create
+            ignore: Callable choosing names to skip, as for shutil.copytree
+            into_repo: Whether target is in the repository
+        """
+        add_file = self.copy_into_repo if into_repo else self.copy
+        for root, dirs, files in os.walk(source, followlinks=True):
+            ignored = set(ignore(root, dirs + files)) if ignore else set()
+            dirs[:] = sorted(name for name in dirs if name not in ignored)
+            rel = os.path.relpath(root, source)
+            target_dir = target if rel == "." else os.path.join(target, rel)
+            self.mkdir(target_dir)
+            self.chmod(target_dir, os.stat(root).st_mode & 0o7777)
+            for name in sorted(files):
+                if name not in ignored:
+                    add_file(os.path.join(root, name), os.path.join(target_dir, name))
+
+    @staticmethod
+    def _estimate(source: str, path: str, skip_unchanged: bool = True) -> int:
+        """Estimate the bytes a copy writes: none if path is already up to date."""
+        try:
+            st = os.stat(source)
+        except OSError:
+            return 0
+        if skip_unchanged and copy_engine.is_unchanged(source, path, st):
+            return 0
+        return st.st_size
+
+    @property
+    def estimated_bytes(self) -> int:
+        """Estimated bytes written by the whole plan."""
+        return sum(op.size for op in self.operations)
+
+    def describe(self) -> List[str]:
+        """Describe every operation, in planning order."""
+        return [op.describe() for op in self.operations]
+
+    def execute(self, max_workers: int = SCAN_WORKERS) -> None:
+        """
+        Execute the plan.
+
+        Args:
+            max_workers: Number of threads copying files
+
+        Raises:
+            OSError: A removal or directory creation failed
+            shutil.Error: Some copies failed; the others were still made
+        """
+        by_kind: Dict[str, List[Operation]] = {}
+        for op in self.operations:
+            by_kind.setdefault(op.kind, []).append(op)
+
+        removed: List[str] = []
+        for op in by_kind.get(REMOVE, []):
+            if any(op.path.startswith(path + os.sep) for path in removed):
+                continue
+            if os.path.isdir(op.path) and not os.path.islink(op.path):
+                shutil.rmtree(op.path)
+            elif os.path.lexists(op.path):
+                os.remove(op.path)
+            removed.append(op.path)
+
+        copies = by_kind.get(COPY, []) + by_kind.get(LINK, [])
+        dirs: Set[str] = {op.path for op in by_kind.get(MKDIR, [])}
+        dirs.update(os.path.dirname(op.path) for op in copies)
+        for path in sorted(dirs):
+            os.makedirs(path, exist_ok=True)
+
+        errors: List[Tuple[str, str, str]] = []
+        pending = sorted(copies, key=lambda op: op.source)
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            while pending:
+                targets = {op.path for op in pending}
+                # Copies reading each other's targets in a cycle all run at once
+                wave = [op for op in pending if op.source not in targets] or pending
+                in_wave = set(map(id, wave))
+                pending = [op for op in pending if id(op) not in in_wave]
+                for op, error in zip(wave, pool.map(self._copy, wave)):
+                    if error is not None:
+                        errors.append((op.source, op.path, error))
+
+        for op in by_kind.get(CHMOD, []):
+            os.chmod(op.path, op.mode)
+
+        if errors:
+            raise shutil.Error(errors)
+
+    @staticmethod
+    def _copy(op: Operation) -> Optional[str]:
+        """Run one copy or link, returning the error instead of raising it."""
+        try:
+            if op.kind == LINK:
+                object_store.copy_file(op.source, op.path)
+            else:
+                copy_engine.copy_file(
+                    op.source, op.path, skip_unchanged=op.skip_unchanged
+                )
+        except (OSError, shutil.Error) as e:
+            return str(e)
+        return None
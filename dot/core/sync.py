@@ -1,13 +1,18 @@
 """File synchronization utilities for the Dot CLI tool."""
 
 import os
-import shutil
-from typing import Tuple, List, Optional
+from typing import Callable, Tuple, List, Optional
 
 from dot.cli.output import output_manager
 from dot.core.config import config_manager
 from dot.core.conflict import conflict_manager
+from dot.core.plan import Plan
+from dot.utils.copy_engine import copy_stats
+from dot.utils.exclude import ExcludeMatcher, exclude_manager
+from dot.utils.file_system import Dir, compute_digests, diff_digests
+from dot.utils.hash_cache import hash_cache
 from dot.utils.logger import logger
+from dot.utils.scan_cache import is_special_file, scan_cache
 
 
 class SyncManager:
@@ -39,51 +44,211 @@ class SyncManager:
         if not os.path.exists(parent_dir):
             os.makedirs(parent_dir, exist_ok=True)
 
+    def _exclude_matcher(self, real_path: str) -> Tuple[str, ExcludeMatcher]:
+        """Get the owner of a managed path and its exclusion rules."""
+        _, node, remaining = config_manager.fs._find_node_by_path(real_path)
+        owner = node.owner if node and not remaining else ""
+        return owner, exclude_manager.matcher_for(owner)
+
+    def _exclude_ignore(self, real_path: str) -> Callable[[str, List[str]], List[str]]:
+        """Build a copytree ignore callable from the exclusion rules of a path's owner."""
+        _, exclude = self._exclude_matcher(real_path)
+        return exclude.copytree_ignore(
+            real_path, config_manager.fs._get_relative_path(real_path)
+        )
+
+    def _plan_sync_dir(
+        self,
+        plan: Plan,
+        source: str,
+        target: str,
+        real_path: str,
+        into_repo: bool = False,
+    ) -> None:
+        """
+        Plan making the directory target match source, copying only what changed.
+
+        Both sides are scanned through the listing cache and hashed through the
+        hash cache, then compared top-down by Merkle hash, so unchanged
+        subtrees are neither descended into nor copied. Excluded entries are
+        left alone on both sides, and so are sockets, FIFOs and device nodes,
+        which cannot be copied. The caches are saved once the plan has been
+        executed, see _save_caches, so a dry run writes nothing.
+
+        Args:
+            plan: Plan to add the operations to
+            source: Directory to copy from
+            target: Existing directory to update
+            real_path: System path of the managed directory
+            into_repo: Whether target is in the repository
+        """
+        fs = config_manager.fs
+        rel_path = fs._get_relative_path(real_path)
+        owner, exclude = self._exclude_matcher(real_path)
+
+        trees = []
+        for root in (source, target):
+            tree = Dir(os.path.basename(real_path), owner)
+            fs._scan_tree(root, rel_path, tree, owner, exclude)
+            compute_digests(tree, root)
+            trees.append(tree)
+        to_copy, to_remove = diff_digests(trees[0], trees[1])
+
+        for rel in to_remove:
+            if not is_special_file(os.path.join(target, rel)):
+                plan.remove(os.path.join(target, rel))
+        for rel in to_copy:
+            src = os.path.join(source, rel)
+            dst = os.path.join(target, rel)
+            if is_special_file(src):
+                continue
+            if is_special_file(dst):
+                # Would be opened instead of replaced
+                plan.remove(dst)
+            if os.path.isdir(src):
+                plan.copy_tree(
+                    src,
+                    dst,
+                    ignore=exclude.copytree_ignore(src, os.path.join(rel_path, rel)),
+                    into_repo=into_repo,
+                )
+            elif into_repo:
+                plan.copy_into_repo(src, dst, skip_unchanged=False)
+            else:
+                # Known to differ by hash, so the stat check is not needed
+                plan.copy(src, dst, skip_unchanged=False)
+        logger.info(
+            f"Compared {real_path}: {len(to_copy)} to copy, {len(to_remove)} to remove"
+        )
+
+    @staticmethod
+    def _save_caches() -> None:
+        """Persist the listing and hash caches filled while planning."""
+        scan_cache.save()
+        hash_cache.save()
+
+    def plan_to_repo(self, real_path: str, plan: Optional[Plan] = None) -> Plan:
+        """
+        Plan copying an existing file or directory to the repository.
+
+        Conflict files are copied to the conflict directory; merging them into
+        the repository is left to copy_to_repo.
+
+        Args:
+            real_path: System path to copy
+            plan: Plan to add the operations to, a new one if None
+
+        Returns:
+            Plan: The plan
+        """
+        plan = plan if plan is not None else Plan()
+        repo_path = self._get_repo_path(real_path)
+        plan.mkdir(os.path.dirname(repo_path))
+
+        # Check if it's a conflict file
+        if config_manager.is_conflict(real_path):
+            conflict_path = conflict_manager._get_conflict_file_path(real_path)
+            plan.mkdir(os.path.dirname(conflict_path))
+
+            # Copy to conflict directory
+            if os.path.isdir(real_path):
+                if os.path.exists(conflict_path):
+                    plan.remove(conflict_path)
+                plan.copy_tree(
+                    real_path,
+                    conflict_path,
+                    ignore=self._exclude_ignore(real_path),
+                    into_repo=True,
+                )
+            else:
+                plan.copy_into_repo(real_path, conflict_path)
+        else:
+            # Regular file - copy directly to repo
+            if os.path.isdir(real_path) and os.path.isdir(repo_path):
+                # Only copy what changed since the last sync
+                self._plan_sync_dir(plan, real_path, repo_path, real_path, True)
+            elif os.path.isdir(real_path):
+                if os.path.exists(repo_path):
+                    plan.remove(repo_path)
+                plan.copy_tree(
+                    real_path,
+                    repo_path,
+                    ignore=self._exclude_ignore(real_path),
+                    into_repo=True,
+                )
+            else:
+                plan.copy_into_repo(real_path, repo_path)
+        return plan
+
     def copy_to_repo(self, path: str) -> bool:
         """Copy a file from the system to the repository."""
         real_path = os.path.expanduser(path)
-        repo_path = self._get_repo_path(real_path)
 
         # Check if file exists
         if not os.path.exists(real_path):
             logger.error(f"File not found: {path}")
             return False
 
+        copy_stats.reset()
         try:
-            # Create parent directories if needed
-            self._ensure_parent_dirs(repo_path)
+            self.plan_to_repo(real_path).execute()
+            self._save_caches()
 
-            # Check if it's a conflict file
+            # Merge conflict file with repo file
             if config_manager.is_conflict(real_path):
-                conflict_path = conflict_manager._get_conflict_file_path(real_path)
-
-                # Ensure conflict directory exists
-                self._ensure_parent_dirs(conflict_path)
-
-                # Copy to conflict directory
-                if os.path.isdir(real_path):
-                    if os.path.exists(conflict_path):
-                        shutil.rmtree(conflict_path)
-                    shutil.copytree(real_path, conflict_path)
-                else:
-                    shutil.copy2(real_path, conflict_path)
-
-                # Merge conflict file with repo file
                 conflict_manager.merge_conflict_files(real_path)
-            else:
-                # Regular file - copy directly to repo
-                if os.path.isdir(real_path):
-                    if os.path.exists(repo_path):
-                        shutil.rmtree(repo_path)
-                    shutil.copytree(real_path, repo_path)
-                else:
-                    shutil.copy2(real_path, repo_path)
 
+            logger.info(f"Copied {path} to the repository: {copy_stats.summary()}")
             return True
         except Exception as e:
             logger.error(f"Error copying to repository: {e}")
             return False
 
+    def plan_from_repo(self, real_path: str, plan: Optional[Plan] = None) -> Plan:
+        """
+        Plan copying a file or directory from the repository to the system.
+
+        Args:
+            real_path: System path to update
+            plan: Plan to add the operations to, a new one if None
+
+        Returns:
+            Plan: The plan
+        """
+        plan = plan if plan is not None else Plan()
+        repo_path = self._get_repo_path(real_path)
+        parent_dir = os.path.dirname(real_path)
+        if not os.path.exists(parent_dir):
+            plan.mkdir(parent_dir)
+
+        # Check if it's a conflict file
+        if config_manager.is_conflict(real_path):
+            conflict_path = conflict_manager._get_conflict_file_path(real_path)
+
+            # Check if conflict file exists, otherwise initialize it
+            if not os.path.exists(conflict_path):
+                conflict_manager.plan_conflict(plan, real_path)
+
+            # Copy from conflict directory to system
+            if os.path.isdir(conflict_path):
+                if os.path.exists(real_path):
+                    plan.remove(real_path)
+                plan.copy_tree(conflict_path, real_path)
+            else:
+                plan.copy(conflict_path, real_path)
+        else:
+            # Regular file - copy directly from repo
+            if os.path.isdir(repo_path) and os.path.isdir(real_path):
+                # Only copy what changed, leaving excluded files in place
+                self._plan_sync_dir(plan, repo_path, real_path, real_path)
+            elif os.path.isdir(repo_path):
+                if os.path.exists(real_path):
+                    plan.remove(real_path)
+                plan.copy_tree(repo_path, real_path)
+            else:
+                plan.copy(repo_path, real_path)
+        return plan
+
     def copy_from_repo(self, path: str, confirm: bool = True) -> bool:
         """
         Copy a file from the repository to the system.
@@ -118,34 +283,11 @@ class SyncManager:
                         # Set confirm to False for future calls
                         confirm = False
 
-                # Create parent directory
-                os.makedirs(parent_dir, exist_ok=True)
-
+        copy_stats.reset()
         try:
-            # Check if it's a conflict file
-            if config_manager.is_conflict(real_path):
-                conflict_path = conflict_manager._get_conflict_file_path(real_path)
-
-                # Check if conflict file exists, otherwise initialize it
-                if not os.path.exists(conflict_path):
-                    conflict_manager.initialize_conflict(real_path)
-
-                # Copy from conflict directory to system
-                if os.path.isdir(conflict_path):
-                    if os.path.exists(real_path):
-                        shutil.rmtree(real_path)
-                    shutil.copytree(conflict_path, real_path)
-                else:
-                    shutil.copy2(conflict_path, real_path)
-            else:
-                # Regular file - copy directly from repo
-                if os.path.isdir(repo_path):
-                    if os.path.exists(real_path):
-                        shutil.rmtree(real_path)
-                    shutil.copytree(repo_path, real_path)
-                else:
-                    shutil.copy2(repo_path, real_path)
-
+            self.plan_from_repo(real_path).execute()
+            self._save_caches()
+            logger.info(f"Copied {path} from the repository: {copy_stats.summary()}")
             return True
         except Exception as e:
             logger.error(f"Error copying from repository: {e}")
@@ -0,0 +1,251 @@
+"""Fast file copying for the Dot CLI tool."""
+
+import errno
+import os
+import shutil
+import threading
+
+try:
+    import fcntl
+except ImportError:  # not available on Windows
+    fcntl = None
+
+from dot.utils.hash_cache import hash_cache
+
+# ioctl request of FICLONE on Linux, _IOW(0x94, 9, int)
+FICLONE = 0x40049409
+
+# Bytes requested per copy_file_range/sendfile call
+CHUNK_SIZE = 1 << 30
+
+# Errors meaning "this mechanism does not work for these two files", after
+# which the next, more portable mechanism is tried
+_FALLBACK_ERRNOS = {
+    errno.EXDEV,
+    errno.ENOSYS,
+    errno.EINVAL,
+    errno.ENOTTY,
+    errno.EOPNOTSUPP,
+    errno.EBADF,
+}
+
+
+class CopyStats:
+    """Counters of files and bytes copied, linked, or skipped as unchanged."""
+
+    def __init__(self) -> None:
+        """Initialize the counters."""
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        """Reset all counters to zero."""
+        self.copied_files = 0
+        self.copied_bytes = 0
+        self.skipped_files = 0
+        self.skipped_bytes = 0
+        self.linked_files = 0
+        self.linked_bytes = 0
+
+    def record(self, copied: bool, size: int) -> None:
+        """Count one file as copied or skipped."""
+        with self._lock:
+            if copied:
+                self.copied_files += 1
+                self.copied_bytes += size
+            else:
+                self.skipped_files += 1
+                self.skipped_bytes += size
+
+    def record_link(self, size: int) -> None:
+        """Count one file as reflinked or hard linked from the object store."""
+        with self._lock:
+            self.linked_files += 1
+            self.linked_bytes += size
+
+    def summary(self) -> str:
+        """Describe the counters in one line."""
+        summary = (
+            f"{self.copied_files} files copied ({self.copied_bytes} bytes), "
+            f"{self.skipped_files} unchanged ({self.skipped_bytes} bytes)"
+        )
+        if self.linked_files:
+            summary += f", {self.linked_files} linked ({self.linked_bytes} bytes)"
+        return summary
+
+
+def _reflink(src_fd: int, dst_fd: int) -> bool:
+    """Share the source's extents with the destination (btrfs, XFS, ...)."""
+    if fcntl is None:
+        return False
+    try:
+        fcntl.ioctl(dst_fd, FICLONE, src_fd)
+        return True
+    except OSError as e:
+        if e.errno in _FALLBACK_ERRNOS:
+            return False
+        raise
+
+
+def _copy_file_range(src_fd: int, dst_fd: int) -> bool:
+    """Copy inside the kernel, letting the file system offload it if it can."""
+    if not hasattr(os, "copy_file_range"):
+        return False
+    copied = 0
+    try:
+        while True:
+            n = os.copy_file_range(src_fd, dst_fd, CHUNK_SIZE)
+            if n == 0:
+                break
+            copied += n
+    except OSError as e:
+        if copied == 0 and e.errno in _FALLBACK_ERRNOS:
+            return False
+        raise
+    # Empty files, and files in /proc and the like, copy nothing this way and
+    # are left to the read/write loop
+    return copied > 0
+
+
+def _sendfile(src_fd: int, dst_fd: int) -> bool:
+    """Copy inside the kernel with sendfile, which Linux allows between files."""
+    if not hasattr(os, "sendfile"):
+        return False
+    offset = 0
+    try:
+        while True:
+            n = os.sendfile(dst_fd, src_fd, offset, CHUNK_SIZE)
+            if n == 0:
+                break
+            offset += n
+    except OSError as e:
+        if offset == 0 and e.errno in _FALLBACK_ERRNOS:
+            return False
+        raise
+    return offset > 0
+
+
+def _read_write(src_fd: int, dst_fd: int) -> None:
+    """Copy through a userspace buffer; works everywhere."""
+    while True:
+        chunk = os.read(src_fd, 1 << 20)
+        if not chunk:
+            break
+        view = memoryview(chunk)
+        while view:
+            view = view[os.write(dst_fd, view) :]
+
+
+def is_unchanged(
+    src: str, dst: str, src_stat: os.stat_result, verify_hash: bool = False
+) -> bool:
+    """
+    Check whether dst already holds a copy of src.
+
+    A copy made by copy_file keeps the source's mtime, so equal size and
+    mtime_ns mean the contents are taken to be equal. With verify_hash the
+    contents are compared by hash as well.
+    """
+    try:
+        dst_stat = os.stat(dst)
+    except OSError:
+        return False
+    if (dst_stat.st_size, dst_stat.st_mtime_ns) != (
+        src_stat.st_size,
+        src_stat.st_mtime_ns,
+    ):
+        return False
+    if verify_hash:
+        return hash_cache.file_digest(src) == hash_cache.file_digest(dst)
+    return True
+
+
+def reflink_file(src: str, dst: str) -> bool:
+    """
+    Create dst as a reflink of src, with src's metadata, if the file system can.
+
+    A reflink shares the data of src until either file is written, when the
+    written blocks are copied, so the two stay independent files.
+
+    Returns:
+        bool: True if dst was created, False if reflinks are not supported;
+        dst is then left absent
+    """
+    with open(src, "rb") as fsrc, open(dst, "wb") as fdst:
+        cloned = _reflink(fsrc.fileno(), fdst.fileno())
+    if not cloned:
+        os.remove(dst)
+        return False
+    shutil.copystat(src, dst)
+    return True
+
+
+def copy_file(
+    src: str,
+    dst: str,
+    follow_symlinks: bool = True,
+    skip_unchanged: bool = True,
+    verify_hash: bool = False,
+) -> bool:
+    """
+    Copy a file with its metadata, like shutil.copy2, as cheaply as possible.
+
+    The data is reflinked if the file system supports it, otherwise copied
+    with copy_file_range, then sendfile, then a plain read/write loop. Files
+    that are already up to date are skipped, see is_unchanged. Every call is
+    counted in copy_stats.
+
+    Args:
+        src: Source file
+        dst: Destination file or directory
+        follow_symlinks: Copy what a symlink points to rather than the link
+        skip_unchanged: Skip the copy if dst already matches src
+        verify_hash: Also compare contents by hash before skipping
+
+    Returns:
+        bool: True if the file was copied, False if it was skipped
+    """
+    if os.path.isdir(dst):
+        dst = os.path.join(dst, os.path.basename(src))
+
+    if not follow_symlinks and os.path.islink(src):
+        target = os.readlink(src)
+        if os.path.islink(dst) and os.readlink(dst) == target:
+            copy_stats.record(False, 0)
+            return False
+        if os.path.lexists(dst):
+            os.remove(dst)
+        os.symlink(target, dst)
+        copy_stats.record(True, 0)
+        return True
+
+    src_stat = os.stat(src)
+    if skip_unchanged and is_unchanged(src, dst, src_stat, verify_hash):
+        copy_stats.record(False, src_stat.st_size)
+        return False
+    try:
+        dst_stat = os.stat(dst)
+        if (dst_stat.st_dev, dst_stat.st_ino) == (src_stat.st_dev, src_stat.st_ino):
+            raise shutil.SameFileError(f"{src!r} and {dst!r} are the same file")
+        if dst_stat.st_nlink > 1 and not os.path.islink(dst):
+            # Shared with other names, e.g. a blob of the object store, which
+            # must keep their contents: give dst a new inode instead
+            os.remove(dst)
+    except FileNotFoundError:
+        pass
+
+    with open(src, "rb") as fsrc, open(dst, "wb") as fdst:
+        src_fd, dst_fd = fsrc.fileno(), fdst.fileno()
+        if not (
+            _reflink(src_fd, dst_fd)
+            or _copy_file_range(src_fd, dst_fd)
+            or _sendfile(src_fd, dst_fd)
+        ):
+            _read_write(src_fd, dst_fd)
+    shutil.copystat(src, dst)
+    copy_stats.record(True, src_stat.st_size)
+    return True
+
+
+# Create a global instance for use throughout the application
+copy_stats = CopyStats()
@@ -0,0 +1,202 @@
+"""Gitignore-style exclusion rules for the Dot CLI tool."""
+
+import json
+import os
+import re
+from typing import Callable, Dict, List, Optional, Pattern, Set, Tuple
+
+from dot.utils.logger import logger
+from dot.utils.scan_cache import is_special_file
+
+# Patterns written to exclude.json by 'dot init'
+DEFAULT_EXCLUDE = {
+    "global": [".git/", "node_modules/", "__pycache__/", ".cache/"],
+    "software": {},
+}
+
+_GLOB_CHARS = set("*?[\\")
+
+
+def _translate(pattern: str, anchored: bool) -> str:
+    """Translate a single gitignore glob into a regular expression."""
+    out = []
+    i = 0
+    n = len(pattern)
+    while i < n:
+        c = pattern[i]
+        if c == "*":
+            if pattern.startswith("**/", i):
+                out.append("(?:.*/)?")
+                i += 3
+                continue
+            if pattern.startswith("**", i):
+                out.append(".*")
+                i += 2
+                continue
+            out.append("[^/]*")
+        elif c == "?":
+            out.append("[^/]")
+        elif c == "[":
+            j = pattern.find("]", i + 1)
+            if j == -1:
+                out.append("\\[")
+            else:
+                chars = pattern[i + 1 : j].replace("\\", "\\\\")
+                if chars.startswith("!"):
+                    chars = "^" + chars[1:]
+                out.append(f"[{chars}]")
+                i = j
+        elif c == "\\" and i + 1 < n:
+            i += 1
+            out.append(re.escape(pattern[i]))
+        else:
+            out.append(re.escape(c))
+        i += 1
+
+    prefix = "" if anchored else "(?:.*/)?"
+    return prefix + "".join(out) + r"\Z"
+
+
+class ExcludeMatcher:
+    """
+    A compiled set of gitignore-style patterns.
+
+    Paths are matched relative to the forest root: the home directory for user
+    files and / for system files. Patterns without a slash match a name at any
+    depth, patterns containing a slash are anchored, a trailing slash restricts
+    a pattern to directories and a leading '!' re-includes a path.
+    """
+
+    def __init__(self, patterns: List[str]):
+        # (regex, negate, dir_only) in file order; the last match wins
+        self._rules: List[Tuple[Pattern[str], bool, bool]] = []
+        self._has_negation = False
+
+        # Fast path used when nothing is negated: plain names go into sets and
+        # everything else into one alternation per kind
+        self._names: Set[str] = set()
+        self._dir_names: Set[str] = set()
+        any_regexes: List[str] = []
+        dir_regexes: List[str] = []
+
+        for raw in patterns:
+            line = raw.strip()
+            if not line or line.startswith("#"):
+                continue
+            negate = line.startswith("!")
+            if negate:
+                line = line[1:]
+                self._has_negation = True
+            dir_only = line.endswith("/")
+            line = line.rstrip("/")
+            if not line:
+                continue
+            anchored = "/" in line
+            line = line.lstrip("/")
+
+            regex = _translate(line, anchored)
+            self._rules.append((re.compile(regex), negate, dir_only))
+            if not anchored and not _GLOB_CHARS.intersection(line):
+                (self._dir_names if dir_only else self._names).add(line)
+            else:
+                (dir_regexes if dir_only else any_regexes).append(regex)
+
+        self._any_regex = re.compile("|".join(any_regexes)) if any_regexes else None
+        self._dir_regex = re.compile("|".join(dir_regexes)) if dir_regexes else None
+
+    def __bool__(self) -> bool:
+        return bool(self._rules)
+
+    def is_excluded(self, rel_path: str, is_dir: bool) -> bool:
+        """Check whether a forest-relative path is excluded."""
+        if self._has_negation:
+            for regex, negate, dir_only in reversed(self._rules):
+                if dir_only and not is_dir:
+                    continue
+                if regex.match(rel_path):
+                    return not negate
+            return False
+
+        name = rel_path.rsplit("/", 1)[-1]
+        if name in self._names or (is_dir and name in self._dir_names):
+            return True
+        if self._any_regex is not None and self._any_regex.match(rel_path):
+            return True
+        if is_dir and self._dir_regex is not None and self._dir_regex.match(rel_path):
+            return True
+        return False
+
+    def copytree_ignore(
+        self, base: str, rel_base: str
+    ) -> Callable[[str, List[str]], List[str]]:
+        """
+        Build an ignore callable for shutil.copytree.
+
+        Besides excluded paths it drops sockets, FIFOs and device nodes, which
+        cannot be stored in the repository.
+
+        Args:
+            base: Real path of the directory being copied
+            rel_base: Forest-relative path of that directory
+        """
+
+        def ignore(directory: str, names: List[str]) -> List[str]:
+            rel_dir = os.path.relpath(directory, base)
+            prefix = rel_base if rel_dir == "." else f"{rel_base}/{rel_dir}"
+            ignored = []
+            for name in names:
+                full_path = os.path.join(directory, name)
+                is_dir = os.path.isdir(full_path)
+                if is_special_file(full_path) or self.is_excluded(
+                    f"{prefix}/{name}", is_dir
+                ):
+                    ignored.append(name)
+            return ignored
+
+        return ignore
+
+
+class ExcludeManager:
+    """Load the repository's exclusion rules and hand out compiled matchers."""
+
+    def __init__(self) -> None:
+        """Initialize the exclude manager."""
+        self.dotfiles_path = os.path.expanduser("~/.dotfiles")
+        self.exclude_path = os.path.join(self.dotfiles_path, "exclude.json")
+        self._rules: Optional[Dict] = None
+        self._matchers: Dict[str, ExcludeMatcher] = {}
+
+    def _load(self) -> Dict:
+        """Load exclude.json, falling back to no rules."""
+        if self._rules is None:
+            self._rules = {"global": [], "software": {}}
+            if os.path.exists(self.exclude_path):
+                try:
+                    with open(self.exclude_path, "r", encoding="utf-8") as f:
+                        self._rules.update(json.load(f))
+                except (OSError, json.JSONDecodeError) as e:
+                    logger.error(f"Error loading exclude file: {e}")
+        return self._rules
+
+    def matcher_for(self, software: str) -> ExcludeMatcher:
+        """Get the compiled repo-wide plus per-software matcher for a software."""
+        if software not in self._matchers:
+            rules = self._load()
+            patterns = list(rules.get("global", []))
+            patterns.extend(rules.get("software", {}).get(software, []))
+            self._matchers[software] = ExcludeMatcher(patterns)
+        return self._matchers[software]
+
+    def save_default(self) -> None:
+        """Write the default exclude.json into the repository."""
+        try:
+            with open(self.exclude_path, "w", encoding="utf-8") as f:
+                json.dump(DEFAULT_EXCLUDE, f, indent=2)
+        except OSError as e:
+            logger.error(f"Error creating exclude file: {e}")
+        self._rules = None
+        self._matchers = {}
+
+
+# Create a global instance for use throughout the application
+exclude_manager = ExcludeManager()
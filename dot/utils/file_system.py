@@ -1,17 +1,47 @@
+import hashlib
+import heapq
 import os
 import pathlib
-from typing import List, Dict, Union, Optional, Any, Tuple
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Set,
+    Tuple,
+    Union,
+)
+
+from dot.utils.exclude import ExcludeMatcher, exclude_manager
+from dot.utils.hash_cache import hash_cache
+from dot.utils.logger import logger
+from dot.utils.scan_cache import scan_cache
+
+# Upper bound on threads listing directories in parallel while scanning
+SCAN_WORKERS = min(32, (os.cpu_count() or 1) + 4)
 
 
 class Node:
     """Base class for file system nodes."""
 
+    # Trees can hold hundreds of thousands of nodes, so nodes use slots instead
+    # of a per-instance __dict__ and share interned name/owner strings.
+    # digest is the Merkle hash set by compute_digests; it is not persisted
+    # in the config since it describes one copy of the tree on disk.
+    __slots__ = ("name", "owner", "digest")
+
     def __init__(self, name: str, owner: str):
         if " " in name:
             raise ValueError(f"Node name cannot contain spaces: {name}")
 
-        self.name = name
-        self.owner = owner
+        self.name = sys.intern(name)
+        self.owner = sys.intern(owner)
+        self.digest: Optional[str] = None
 
     def to_dict(self) -> Dict[str, Any]:
         """Convert node to dictionary representation."""
@@ -25,6 +55,8 @@ class Node:
 class File(Node):
     """Represents a file in the file system."""
 
+    __slots__ = ()
+
     def __init__(self, name: str, owner: str):
         if "/" in name:
             raise ValueError(f"File name cannot contain '/': {name}")
@@ -37,6 +69,8 @@ class File(Node):
 class Dir(Node):
     """Represents a directory in the file system."""
 
+    __slots__ = ("_children", "_pending")
+
     def __init__(
         self, name: str, owner: str, contents: Optional[List[Union["Dir", File]]] = None
     ):
@@ -45,7 +79,46 @@ class Dir(Node):
                 f"Directory name cannot contain '/' unless it's a root node: {name}"
             )
         super().__init__(name, owner)
-        self.contents = contents or []
+        # Children keyed by name; dicts keep insertion order, so to_dict output
+        # stays stable while lookups, inserts and removals are O(1).
+        self._children: Dict[str, Union["Dir", File]] = {}
+        # Unparsed "contents" payload of a lazily loaded directory
+        self._pending: Optional[List[Dict[str, Any]]] = None
+        for node in contents or []:
+            self.add_node(node)
+
+    @classmethod
+    def lazy(cls, name: str, owner: str, payload: List[Dict[str, Any]]) -> "Dir":
+        """Create a directory whose children are built from payload on first access."""
+        dir_node = cls(name, owner)
+        if payload:
+            dir_node._pending = payload
+        return dir_node
+
+    @property
+    def children(self) -> Dict[str, Union["Dir", File]]:
+        """Children keyed by name, materializing a lazy payload one level deep."""
+        if self._pending is not None:
+            payload = self._pending
+            self._pending = None
+            for child_dict in payload:
+                name = child_dict.get("name", "")
+                owner = child_dict.get("owner", "")
+                if "contents" in child_dict:
+                    self.add_node(Dir.lazy(name, owner, child_dict["contents"]))
+                else:
+                    self.add_node(File(name, owner))
+        return self._children
+
+    @property
+    def is_loaded(self) -> bool:
+        """Whether the children of this directory have been built."""
+        return self._pending is None
+
+    @property
+    def contents(self) -> List[Union["Dir", File]]:
+        """Children of this directory in insertion order."""
+        return list(self.children.values())
 
     @staticmethod
     def _is_valid_root_name(name: str) -> bool:
@@ -57,42 +130,317 @@ class Dir(Node):
     def to_dict(self) -> Dict[str, Any]:
         """Convert directory to dictionary representation."""
         result = super().to_dict()
-        # if self.contents:
-        #     result["contents"] = [item.to_dict() for item in self.contents]
-        result["contents"] = [item.to_dict() for item in self.contents]
+        if self._pending is not None:
+            # Never loaded, so the original payload is still accurate
+            result["contents"] = self._pending
+            return result
+        result["contents"] = []
+        # Pre-order walk, so every directory's list exists before its children
+        # are appended; directories never loaded reuse their payload as is
+        contents_by_path: Dict[str, List[Dict[str, Any]]] = {".": result["contents"]}
+        walk = iter_subtree(self, ".", prune=lambda _, node: node._pending is not None)
+        next(walk)
+        for path, node in walk:
+            node_dict = Node.to_dict(node)
+            contents_by_path[path[: -len(node.name) - 1]].append(node_dict)
+            if isinstance(node, Dir):
+                if node._pending is not None:
+                    node_dict["contents"] = node._pending
+                else:
+                    node_dict["contents"] = contents_by_path[path] = []
         return result
 
     def find_node(self, name: str) -> Optional[Union["Dir", File]]:
         """Find a node with the given name in the contents."""
-        for node in self.contents:
-            if node.name == name:
-                return node
-        return None
+        return self.children.get(name)
 
     def add_node(self, node: Union["Dir", File]) -> None:
         """Add a node to the contents."""
-        existing = self.find_node(node.name)
-        if existing:
-            if isinstance(existing, Dir) and isinstance(node, Dir):
+        if node.name not in self.children:
+            # The common case, with nothing to merge
+            self._children[node.name] = node
+            return
+        # Walk the incoming tree; a node taking a free name brings its whole
+        # subtree along, so only directories merged into existing ones are
+        # descended into. merged maps their paths to the directory they merge into.
+        merged: Dict[str, Dir] = {".": self}
+        for path, incoming in iter_subtree(
+            node, os.path.join(".", node.name), prune=lambda path, _: path not in merged
+        ):
+            target = merged[path[: -len(incoming.name) - 1]]
+            existing = target.children.get(incoming.name)
+            if existing is None:
+                target.children[incoming.name] = incoming
+                continue
+
+            if isinstance(existing, Dir) and isinstance(incoming, Dir):
                 # Merge directories with the same name if they have the same owner
-                if existing.owner != node.owner:
+                if existing.owner != incoming.owner:
                     raise ValueError(
-                        f"Directory '{node.name}' already exists with different owner"
+                        f"Directory '{incoming.name}' already exists with different owner"
                     )
                 # Merge contents
-                for child in node.contents:
-                    existing.add_node(child)
+                merged[path] = existing
             else:
-                raise ValueError(f"Node with name '{node.name}' already exists")
-        else:
-            self.contents.append(node)
+                raise ValueError(f"Node with name '{incoming.name}' already exists")
 
     def remove_node(self, name: str) -> Optional[Union["Dir", File]]:
         """Remove a node from the contents and return it."""
-        for i, node in enumerate(self.contents):
-            if node.name == name:
-                return self.contents.pop(i)
-        return None
+        return self.children.pop(name, None)
+
+
+def iter_subtree(
+    node: Union[Dir, File],
+    path: str,
+    prune: Optional[Callable[[str, Union[Dir, File]], bool]] = None,
+) -> Iterator[Tuple[str, Union[Dir, File]]]:
+    """
+    Lazily walk a subtree in pre-order, yielding (path, node) pairs.
+
+    The walk uses an explicit stack, so it is not bound by the recursion limit.
+    If prune(path, node) returns True for a directory, the directory itself is
+    yielded but its children are skipped.
+    """
+    stack = [(path, node)]
+    while stack:
+        current_path, current = stack.pop()
+        yield current_path, current
+        if not isinstance(current, Dir):
+            continue
+        if prune is not None and prune(current_path, current):
+            continue
+        # Push in reverse so children come out in insertion order
+        for child in reversed(list(current.children.values())):
+            stack.append((os.path.join(current_path, child.name), child))
+
+
+def _iter_sorted(
+    roots: List[Union[Dir, File]],
+) -> Iterator[Tuple[Tuple[str, ...], Union[Dir, File]]]:
+    """
+    Yield (path components, node) for every node of a forest in sorted order.
+
+    Each root is walked in pre-order with its children sorted by name, which
+    orders its nodes by their component tuples; the roots' streams are then
+    merged. A root nested inside another root's tree shadows that part of
+    the outer tree, as it does for path lookups, so the outer walk skips it
+    and every path comes out once, with the node of its innermost root.
+    """
+    root_parts = {tuple(root.name.split("/")) for root in roots}
+
+    def walk(root: Union[Dir, File]) -> Iterator[Tuple[Tuple[str, ...], Union[Dir, File]]]:
+        stack = [(tuple(root.name.split("/")), root)]
+        while stack:
+            parts, node = stack.pop()
+            yield parts, node
+            if isinstance(node, Dir):
+                children = node.children
+                for name in sorted(children, reverse=True):
+                    child_parts = parts + (name,)
+                    if child_parts not in root_parts:
+                        stack.append((child_parts, children[name]))
+
+    return heapq.merge(*(walk(root) for root in roots), key=lambda item: item[0])
+
+
+def diff_file_systems(
+    old: "FileSystem", new: "FileSystem"
+) -> Iterator[Tuple[str, str, Optional[str], Optional[str]]]:
+    """
+    Compare two file systems in one merge-walk over both.
+
+    Yields (change, absolute path, old owner, new owner) in path order, where
+    change is "added" (only in new), "removed" (only in old) or
+    "owner_changed". A path that turned from a file into a directory or back
+    is reported as removed and added. Runs in time linear in the size of both
+    trees, apart from merging the root streams.
+
+    A root added inside another software's tree takes over its paths:
+
+    >>> config = {"name": ".config", "owner": "A", "contents": [
+    ...     {"name": "nvim", "owner": "A", "contents": [
+    ...         {"name": "init.vim", "owner": "A"}]}]}
+    >>> nvim = {"name": ".config/nvim", "owner": "B", "contents": [
+    ...     {"name": "init.vim", "owner": "B"}]}
+    >>> old = FileSystem.from_dict({"USER": [config]})
+    >>> new = FileSystem.from_dict({"USER": [config, nvim]})
+    >>> for change, path, old_owner, new_owner in diff_file_systems(old, new):
+    ...     print(change, os.path.relpath(path, old.USER_PATH), old_owner, new_owner)
+    owner_changed .config/nvim A B
+    owner_changed .config/nvim/init.vim A B
+    """
+    for forest_type in ("USER", "SYSTEM"):
+        base = old.USER_PATH if forest_type == "USER" else old.SYSTEM_PATH
+        old_items = _iter_sorted(old.forests[forest_type])
+        new_items = _iter_sorted(new.forests[forest_type])
+        old_item = next(old_items, None)
+        new_item = next(new_items, None)
+        while old_item is not None or new_item is not None:
+            if new_item is None or (old_item is not None and old_item[0] < new_item[0]):
+                parts, node = old_item
+                yield "removed", os.path.join(base, *parts), node.owner, None
+                old_item = next(old_items, None)
+            elif old_item is None or new_item[0] < old_item[0]:
+                parts, node = new_item
+                yield "added", os.path.join(base, *parts), None, node.owner
+                new_item = next(new_items, None)
+            else:
+                parts, old_node = old_item
+                new_node = new_item[1]
+                path = os.path.join(base, *parts)
+                if isinstance(old_node, Dir) != isinstance(new_node, Dir):
+                    yield "removed", path, old_node.owner, None
+                    yield "added", path, None, new_node.owner
+                elif old_node.owner != new_node.owner:
+                    yield "owner_changed", path, old_node.owner, new_node.owner
+                old_item = next(old_items, None)
+                new_item = next(new_items, None)
+
+
+def compute_digests(node: Union[Dir, File], real_path: str) -> str:
+    """
+    Set the Merkle hash of every node in a subtree and return the root's.
+
+    Files hash their contents through the persistent hash cache, so only files
+    whose stat changed are read. A directory hashes the sorted names, kinds and
+    hashes of its children, so two directories have equal hashes exactly when
+    their trees match. Nodes are processed children first without recursion.
+    """
+    for path, current in reversed(list(iter_subtree(node, real_path))):
+        if isinstance(current, Dir):
+            digest = hashlib.sha256()
+            for name in sorted(current.children):
+                child = current.children[name]
+                kind = "d" if isinstance(child, Dir) else "f"
+                digest.update(f"{kind} {child.digest} {name}\n".encode())
+            current.digest = digest.hexdigest()
+        else:
+            current.digest = hash_cache.file_digest(path)
+    return node.digest
+
+
+def diff_digests(source: Dir, target: Dir) -> Tuple[List[str], List[str]]:
+    """
+    Find what to change in target to make it match source.
+
+    Both trees need their digests set. The walk only descends into
+    directories whose hashes differ, so a single changed file costs a visit to
+    its ancestors and their direct children.
+
+    Returns:
+        (paths to copy, paths to remove), relative to the two roots; a copied
+        directory is new in target and has to be copied whole
+    """
+    to_copy: List[str] = []
+    to_remove: List[str] = []
+    if source.digest == target.digest:
+        return to_copy, to_remove
+
+    stack: List[Tuple[str, Dir, Dir]] = [("", source, target)]
+    while stack:
+        rel_path, src_dir, dst_dir = stack.pop()
+        src_children = src_dir.children
+        dst_children = dst_dir.children
+        for name, dst_child in dst_children.items():
+            src_child = src_children.get(name)
+            if src_child is None or isinstance(src_child, Dir) != isinstance(
+                dst_child, Dir
+            ):
+                to_remove.append(os.path.join(rel_path, name))
+        for name, src_child in src_children.items():
+            child_rel = os.path.join(rel_path, name)
+            dst_child = dst_children.get(name)
+            if dst_child is None or isinstance(src_child, Dir) != isinstance(
+                dst_child, Dir
+            ):
+                to_copy.append(child_rel)
+            elif src_child.digest != dst_child.digest:
+                if isinstance(src_child, Dir):
+                    stack.append((child_rel, src_child, dst_child))
+                else:
+                    to_copy.append(child_rel)
+    return to_copy, to_remove
+
+
+class _TrieNode:
+    """A single path component in a RootTrie."""
+
+    __slots__ = ("children", "root")
+
+    def __init__(self) -> None:
+        self.children: Dict[str, "_TrieNode"] = {}
+        self.root: Optional[Union[Dir, File]] = None
+
+
+class RootTrie:
+    """Component trie over the path-style names of a forest's root nodes."""
+
+    def __init__(self) -> None:
+        self._head = _TrieNode()
+
+    def insert(self, node: Union[Dir, File]) -> None:
+        """Register a root node under its path-style name."""
+        current = self._head
+        for part in node.name.split("/"):
+            current = current.children.setdefault(part, _TrieNode())
+        current.root = node
+
+    def remove(self, name: str) -> None:
+        """Unregister the root node with the given name, pruning empty branches."""
+        trail = [self._head]
+        parts = name.split("/")
+        for part in parts:
+            next_node = trail[-1].children.get(part)
+            if next_node is None:
+                return
+            trail.append(next_node)
+        trail[-1].root = None
+        for i in range(len(parts), 0, -1):
+            node = trail[i]
+            if node.root is not None or node.children:
+                break
+            del trail[i - 1].children[parts[i - 1]]
+
+    def longest_prefix(self, parts: List[str]) -> Tuple[Optional[Union[Dir, File]], int]:
+        """
+        Find the root whose name is the longest component prefix of parts.
+        Returns (root_node, number_of_matched_components)
+        """
+        best: Optional[Union[Dir, File]] = None
+        best_len = 0
+        current = self._head
+        for i, part in enumerate(parts):
+            current = current.children.get(part)
+            if current is None:
+                break
+            if current.root is not None:
+                best = current.root
+                best_len = i + 1
+        return best, best_len
+
+    def descendants(self, name: str) -> List[Union[Dir, File]]:
+        """Return roots strictly below the given path-style name."""
+        current = self._head
+        for part in name.split("/"):
+            current = current.children.get(part)
+            if current is None:
+                return []
+        found = []
+        stack = list(current.children.values())
+        while stack:
+            node = stack.pop()
+            if node.root is not None:
+                found.append(node.root)
+            stack.extend(node.children.values())
+        return found
+
+    @classmethod
+    def build(cls, roots: List[Union[Dir, File]]) -> "RootTrie":
+        """Build a trie from a list of root nodes."""
+        trie = cls()
+        for root in roots:
+            trie.insert(root)
+        return trie
 
 
 class FileSystem:
@@ -105,6 +453,127 @@ class FileSystem:
             "USER": [],  # List of root nodes in USER forest
             "SYSTEM": [],  # List of root nodes in SYSTEM forest
         }
+        # Per-forest index answering "longest managed root prefix of a path"
+        self.root_tries = {
+            "USER": RootTrie(),
+            "SYSTEM": RootTrie(),
+        }
+        # Owner reverse index over "owner boundaries": roots and nested nodes
+        # whose owner differs from their parent's. Maps absolute path -> owner;
+        # None means it has to be rebuilt from the trees on first use.
+        self._owner_boundaries: Optional[Dict[str, str]] = {}
+        self._owner_index: Dict[str, Set[str]] = {}
+        # Owners of the roots changed since the forests were loaded, so a
+        # sharded config only rewrites the shards that were touched
+        self.dirty_owners: Set[str] = set()
+
+    def _add_root(self, forest_type: str, node: Union[Dir, File]) -> None:
+        """Add a root node to a forest and its prefix trie."""
+        self.forests[forest_type].append(node)
+        self.root_tries[forest_type].insert(node)
+        self.dirty_owners.add(node.owner)
+
+    def _remove_root(self, forest_type: str, node: Union[Dir, File]) -> None:
+        """Remove a root node from a forest and its prefix trie."""
+        self.forests[forest_type].remove(node)
+        self.root_tries[forest_type].remove(node.name)
+        self.dirty_owners.add(node.owner)
+
+    def _mark_dirty(self, forest_type: str, rel_path: str) -> None:
+        """Mark the owner of the root containing a nested change as dirty."""
+        root, _ = self._find_best_root_match(rel_path, forest_type)
+        if root is not None:
+            self.dirty_owners.add(root.owner)
+
+    def _absolute_path(self, forest_type: str, rel_path: str) -> str:
+        """Join a forest-relative path onto its forest base."""
+        base = self.USER_PATH if forest_type == "USER" else self.SYSTEM_PATH
+        return os.path.join(base, rel_path)
+
+    def _index_owner(self, path: str, owner: str) -> None:
+        """Record an owner boundary at an absolute path."""
+        if self._owner_boundaries is None:
+            return
+        self._owner_boundaries[path] = owner
+        self._owner_index.setdefault(owner, set()).add(path)
+
+    def _unindex_owner(self, path: str) -> None:
+        """Forget the owner boundary at path."""
+        if self._owner_boundaries is None or path not in self._owner_boundaries:
+            return
+        owner = self._owner_boundaries.pop(path)
+        owned = self._owner_index[owner]
+        owned.discard(path)
+        if not owned:
+            del self._owner_index[owner]
+
+    @staticmethod
+    def _nested_boundaries(
+        path: str, node: Union[Dir, File]
+    ) -> Iterator[Tuple[str, str]]:
+        """
+        Yield (absolute path, owner) for the owner boundaries strictly below node.
+
+        Lazily loaded directories are read from their raw payloads, so walking
+        them does not materialize them.
+        """
+        if not isinstance(node, Dir):
+            return
+        stack: List[Tuple[str, str, Any]] = [(path, node.owner, node)]
+        while stack:
+            path, owner, item = stack.pop()
+            if isinstance(item, Dir):
+                if item.is_loaded:
+                    children = [
+                        (c.name, c.owner, c if isinstance(c, Dir) else None)
+                        for c in item.children.values()
+                    ]
+                else:
+                    children = [
+                        (c.get("name", ""), c.get("owner", ""), c)
+                        for c in item._pending
+                    ]
+            else:
+                children = [
+                    (c.get("name", ""), c.get("owner", ""), c)
+                    for c in item.get("contents", [])
+                ]
+            for name, child_owner, child in children:
+                child_path = os.path.join(path, name)
+                if child_owner != owner:
+                    yield child_path, child_owner
+                if isinstance(child, Dir) or (
+                    isinstance(child, dict) and "contents" in child
+                ):
+                    stack.append((child_path, child_owner, child))
+
+    def _build_owner_index(self) -> None:
+        """Rebuild the owner index by walking every tree once."""
+        self._owner_boundaries = {}
+        self._owner_index = {}
+        for forest_type, roots in self.forests.items():
+            for root in roots:
+                root_path = self._absolute_path(forest_type, root.name)
+                self._index_owner(root_path, root.owner)
+                for path, owner in self._nested_boundaries(root_path, root):
+                    self._index_owner(path, owner)
+
+    def owner_paths(self, owner: str) -> List[str]:
+        """
+        Absolute paths of the subtrees owned by owner.
+
+        Each path is a root or a nested node whose parent has another owner, so
+        together they cover every node of that software.
+        """
+        if self._owner_boundaries is None:
+            self._build_owner_index()
+        return sorted(self._owner_index.get(owner, ()))
+
+    def owners(self) -> List[str]:
+        """All owners present in the file system."""
+        if self._owner_boundaries is None:
+            self._build_owner_index()
+        return sorted(self._owner_index)
 
     def _normalize_path(self, path: str) -> str:
         """Normalize path, expanding ~ to user's home directory."""
@@ -148,43 +617,12 @@ class FileSystem:
         if not rel_path:
             return None, ""
 
-        best_match = None
-        best_match_len = 0
-        remaining = rel_path
-
-        # First look for exact matches
-        for root in self.forests[forest_type]:
-            if root.name == rel_path:
-                return root, ""
-
-        # Then look for path-style roots that are part of the path
         path_parts = rel_path.split("/")
+        best_match, matched = self.root_tries[forest_type].longest_prefix(path_parts)
+        if best_match is None:
+            return None, rel_path
 
-        for root in self.forests[forest_type]:
-            if "/" in root.name:
-                # This is a path-style root
-                root_parts = root.name.split("/")
-
-                # Check if this root is a prefix of our path
-                if len(root_parts) <= len(path_parts):
-                    match = True
-                    for i, part in enumerate(root_parts):
-                        if part != path_parts[i]:
-                            match = False
-                            break
-
-                    if match and len(root_parts) > best_match_len:
-                        best_match = root
-                        best_match_len = len(root_parts)
-                        remaining = "/".join(path_parts[len(root_parts) :])
-            else:
-                # Single-component root
-                if root.name == path_parts[0] and 1 > best_match_len:
-                    best_match = root
-                    best_match_len = 1
-                    remaining = "/".join(path_parts[1:])
-
-        return best_match, remaining
+        return best_match, "/".join(path_parts[matched:])
 
     def _find_node_by_path(
         self, path: str
@@ -244,20 +682,89 @@ class FileSystem:
 
         dir_name = os.path.basename(real_path) or real_path
         dir_node = Dir(dir_name, owner)
+        scan_cache.reset_stats()
+        self._scan_tree(
+            real_path,
+            self._get_relative_path(real_path),
+            dir_node,
+            owner,
+            exclude_manager.matcher_for(owner),
+        )
+        logger.info(
+            f"Scanned {path}: {scan_cache.skipped} directories unchanged, "
+            f"{scan_cache.relisted} re-listed"
+        )
+        return dir_node
 
-        for item in os.listdir(real_path):
-            item_path = os.path.join(real_path, item)
-
-            if os.path.isdir(item_path):
-                # Recursively scan subdirectories
-                subdir = self._scan_directory(item_path, owner)
-                dir_node.add_node(subdir)
-            else:
-                # Add files
-                file_node = File(item, owner)
-                dir_node.add_node(file_node)
+    def _scan_tree(
+        self,
+        real_path: str,
+        rel_path: str,
+        dir_node: Dir,
+        owner: str,
+        exclude: Optional[ExcludeMatcher] = None,
+        max_workers: int = SCAN_WORKERS,
+    ) -> None:
+        """
+        Fill dir_node with the tree below real_path.
+
+        Directory listings run on a bounded thread pool while nodes are only
+        created on the calling thread, in listing order, so the resulting tree
+        is identical to a sequential walk. Listings come from the scan cache,
+        so only directories whose mtime moved are read again. Entries matched
+        by exclude are dropped before they are listed, so excluded subtrees
+        are never walked.
+        """
+        level: List[Tuple[str, str, Dir]] = [(real_path, rel_path, dir_node)]
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            while level:
+                # One breadth-first level at a time: a single directory is
+                # listed inline, wider levels are fanned out to the pool.
+                if len(level) == 1:
+                    listings = [scan_cache.list_directory(level[0][0])]
+                else:
+                    listings = pool.map(
+                        scan_cache.list_directory, [p for p, _, _ in level]
+                    )
+                next_level: List[Tuple[str, str, Dir]] = []
+                for (parent_path, parent_rel, parent), listing in zip(level, listings):
+                    for name, is_dir in listing:
+                        item_rel = f"{parent_rel}/{name}" if parent_rel else name
+                        if exclude and exclude.is_excluded(item_rel, is_dir):
+                            continue
+                        if is_dir:
+                            subdir = Dir(name, owner)
+                            parent.add_node(subdir)
+                            next_level.append(
+                                (os.path.join(parent_path, name), item_rel, subdir)
+                            )
+                        else:
+                            parent.add_node(File(name, owner))
+                level = next_level
+
+    def _check_add(
+        self, path: str, forest_type: str, rel_path: str, owner: str
+    ) -> List[Union[Dir, File]]:
+        """
+        Check that a path can be added and return the roots it will absorb.
 
-        return dir_node
+        Raises ValueError if the path is already a root or would absorb a root
+        with a different owner.
+        """
+        trie = self.root_tries[forest_type]
+        exact, _ = trie.longest_prefix(rel_path.split("/"))
+        if exact is not None and exact.name == rel_path:
+            raise ValueError(
+                f"Cannot add '{path}' with owner '{owner}' - you already added this path"
+            )
+        existing_subtrees = trie.descendants(rel_path)
+        for root in existing_subtrees:
+            # This is a subtree of the path we're adding
+            if root.owner != owner:
+                raise ValueError(
+                    f"Cannot add '{path}' with owner '{owner}' - conflicts with existing subtree owned by '{root.owner}'"
+                )
+        return existing_subtrees
 
     def add(self, path: str, owner: str) -> None:
         """Add a path to the appropriate forest with the given owner."""
@@ -269,21 +776,77 @@ class FileSystem:
         rel_path = self._get_relative_path(path)
 
         # Check for existing subtrees in this new path
-        existing_subtrees = []
-        for root in list(self.forests[forest_type]):
-            if root.name == rel_path:
+        existing_subtrees = self._check_add(path, forest_type, rel_path, owner)
+        self._add_checked(path, owner, forest_type, rel_path, existing_subtrees)
+        scan_cache.save()
+
+    def add_many(self, paths_with_owners: Iterable[Tuple[str, str]]) -> None:
+        """
+        Add several paths in one pass.
+
+        The paths are sorted component-wise, so a directory always comes before
+        everything below it and no root is scanned only to be absorbed again.
+        Entries already covered by a directory earlier in the batch with the
+        same owner are skipped. The result is the forest that adding the paths
+        one by one, parents first, would build. Missing paths, repeated paths
+        and owner conflicts with existing roots are reported before the forest
+        is touched. Unlike add, the scan cache is not saved, so that a caller
+        planning a dry run writes nothing; see ConfigManager.add_files.
+        """
+        entries = []
+        for path, owner in paths_with_owners:
+            real_path = self._normalize_path(path)
+            if not os.path.exists(real_path):
+                raise FileNotFoundError(f"Path does not exist: {path}")
+            forest_type = self._get_forest_type(path)
+            rel_path = self._get_relative_path(path)
+            entries.append(
+                (forest_type, rel_path.split("/"), rel_path, path, owner, real_path)
+            )
+        entries.sort(key=lambda entry: (entry[0], entry[1]))
+
+        planned = []
+        # Directories of this batch enclosing the current entry, innermost last
+        enclosing: List[Tuple[str, List[str], str]] = []
+        previous: Optional[Tuple[str, List[str]]] = None
+        for forest_type, parts, rel_path, path, owner, real_path in entries:
+            if previous == (forest_type, parts):
                 raise ValueError(
-                    f"Cannot add '{path}' with owner '{owner}' - you already added this path"
+                    f"Cannot add '{path}' with owner '{owner}' - path given more than once"
                 )
-            if root.name.startswith(rel_path + "/"):
-                # if root.name.startswith(rel_path):
-                # This is a subtree of the path we're adding
-                if root.owner != owner:
-                    raise ValueError(
-                        f"Cannot add '{path}' with owner '{owner}' - conflicts with existing subtree owned by '{root.owner}'"
-                    )
-                existing_subtrees.append(root)
-                self.forests[forest_type].remove(root)
+            previous = (forest_type, parts)
+
+            while enclosing and not (
+                enclosing[-1][0] == forest_type
+                and parts[: len(enclosing[-1][1])] == enclosing[-1][1]
+            ):
+                enclosing.pop()
+            if enclosing and enclosing[-1][2] == owner:
+                # Scanned along with the enclosing directory
+                continue
+
+            existing_subtrees = self._check_add(path, forest_type, rel_path, owner)
+            planned.append((path, owner, forest_type, rel_path, existing_subtrees))
+            if os.path.isdir(real_path):
+                enclosing.append((forest_type, parts, owner))
+
+        for path, owner, forest_type, rel_path, existing_subtrees in planned:
+            self._add_checked(path, owner, forest_type, rel_path, existing_subtrees)
+
+    def _add_checked(
+        self,
+        path: str,
+        owner: str,
+        forest_type: str,
+        rel_path: str,
+        existing_subtrees: List[Union[Dir, File]],
+    ) -> None:
+        """Add a path that passed _check_add, absorbing existing_subtrees."""
+        real_path = self._normalize_path(path)
+        for root in existing_subtrees:
+            self._remove_root(forest_type, root)
+            # Absorbed into the new tree with the same owner, so no longer a boundary
+            self._unindex_owner(self._absolute_path(forest_type, root.name))
 
         # For directories, scan them with the actual directory structure
         if os.path.isdir(real_path):
@@ -305,10 +868,12 @@ class FileSystem:
                     # This new directory should be added to an existing parent
                     dir_node.name = os.path.basename(rel_path)
                     parent.add_node(dir_node)
+                    self._mark_dirty(forest_type, rel_path)
                     return
 
             # Add to forest as a root node
-            self.forests[forest_type].append(dir_node)
+            self._add_root(forest_type, dir_node)
+            self._index_owner(self._absolute_path(forest_type, rel_path), owner)
 
             # Reintegrate any existing subtrees we removed
             for subtree in existing_subtrees:
@@ -348,17 +913,23 @@ class FileSystem:
             dir_path = os.path.dirname(rel_path)
             if dir_path:
                 dir_rel_path = dir_path
-                parent, _, _ = self._find_node_by_path(
+                _, parent, remaining = self._find_node_by_path(
                     f"~/{dir_rel_path}" if forest_type == "USER" else f"/{dir_rel_path}"
                 )
 
-                if parent and isinstance(parent, Dir):
+                if parent and isinstance(parent, Dir) and not remaining:
                     parent.add_node(file_node)
+                    self._mark_dirty(forest_type, rel_path)
+                    if parent.owner != owner:
+                        self._index_owner(
+                            self._absolute_path(forest_type, rel_path), owner
+                        )
                     return
 
             # Add as a root file node
             file_node.name = rel_path
-            self.forests[forest_type].append(file_node)
+            self._add_root(forest_type, file_node)
+            self._index_owner(self._absolute_path(forest_type, rel_path), owner)
 
     def remove(self, path: str) -> None:
         """Remove a path from the appropriate forest."""
@@ -367,18 +938,64 @@ class FileSystem:
         if not node or remaining:
             raise ValueError(f"Path not found: {path}")
 
+        forest_type = self._get_forest_type(path)
         if parent:
             parent.remove_node(node.name)
+            self._mark_dirty(forest_type, self._get_relative_path(path))
         else:
             # It's a root node
-            forest_type = self._get_forest_type(path)
-            self.forests[forest_type].remove(node)
+            self._remove_root(forest_type, node)
+
+        # Forget the boundaries of the removed subtree only, which costs a walk
+        # of that subtree. Roots nested below it are separate trees that stay.
+        node_path = self._absolute_path(forest_type, self._get_relative_path(path))
+        self._unindex_owner(node_path)
+        if self._owner_boundaries is not None:
+            trie = self.root_tries[forest_type]
+            for boundary, _ in self._nested_boundaries(node_path, node):
+                rel_path = self._get_relative_path(boundary)
+                root, _ = trie.longest_prefix(rel_path.split("/"))
+                if root is None or root.name != rel_path:
+                    self._unindex_owner(boundary)
+
+    def walk(
+        self,
+        forest_types: Tuple[str, ...] = ("USER", "SYSTEM"),
+        prune: Optional[Callable[[str, Union[Dir, File]], bool]] = None,
+    ) -> Iterator[Tuple[str, Union[Dir, File], str]]:
+        """
+        Lazily walk the given forests, yielding (absolute_path, node, owner).
+
+        Nodes come out in pre-order, root by root. If prune(absolute_path, node)
+        returns True for a directory, its children are not visited.
+        """
+        for forest_type in forest_types:
+            base = self.USER_PATH if forest_type == "USER" else self.SYSTEM_PATH
+            for root in self.forests[forest_type]:
+                for path, node in iter_subtree(root, os.path.join(base, root.name), prune):
+                    yield path, node, node.owner
+
+    def root_owners(self) -> Set[str]:
+        """Get the owners of all root nodes."""
+        return {
+            root.owner for roots in self.forests.values() for root in roots
+        }
+
+    def to_dict(
+        self, owners: Optional[Set[str]] = None
+    ) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        Convert the forests to dictionary representation.
 
-    def to_dict(self) -> Dict[str, List[Dict[str, Any]]]:
-        """Convert the forests to dictionary representation."""
+        If owners is given, only the roots owned by one of them are included.
+        """
         return {
-            "USER": [node.to_dict() for node in self.forests["USER"]],
-            "SYSTEM": [node.to_dict() for node in self.forests["SYSTEM"]],
+            forest_type: [
+                node.to_dict()
+                for node in self.forests[forest_type]
+                if owners is None or node.owner in owners
+            ]
+            for forest_type in ("USER", "SYSTEM")
         }
 
     def to_json(self) -> str:
@@ -388,49 +1005,67 @@ class FileSystem:
         return json.dumps(self.to_dict(), indent=2)
 
     @classmethod
-    def from_dict(cls, data: Dict[str, List[Dict[str, Any]]]) -> "FileSystem":
-        """Create a FileSystem from a dictionary representation."""
+    def from_dict(
+        cls, data: Dict[str, List[Dict[str, Any]]], lazy: bool = False
+    ) -> "FileSystem":
+        """
+        Create a FileSystem from a dictionary representation.
+
+        With lazy=True only the root nodes are built; each directory keeps its
+        "contents" payload and builds its children when they are first accessed.
+        """
         fs = cls()
 
         # Process USER forest
         if "USER" in data:
             for node_dict in data["USER"]:
-                fs.forests["USER"].append(cls._create_node_from_dict(node_dict))
+                fs.forests["USER"].append(cls._create_node_from_dict(node_dict, lazy))
 
         # Process SYSTEM forest
         if "SYSTEM" in data:
             for node_dict in data["SYSTEM"]:
-                fs.forests["SYSTEM"].append(cls._create_node_from_dict(node_dict))
+                fs.forests["SYSTEM"].append(
+                    cls._create_node_from_dict(node_dict, lazy)
+                )
+
+        # Rebuild the root prefix tries
+        for forest_type in fs.forests:
+            fs.root_tries[forest_type] = RootTrie.build(fs.forests[forest_type])
+
+        # Rebuild the owner index; lazy trees defer it until it is first needed
+        fs._owner_boundaries = None
+        if not lazy:
+            fs._build_owner_index()
 
         return fs
 
     @classmethod
-    def _create_node_from_dict(cls, node_dict: Dict[str, Any]) -> Union[Dir, File]:
+    def _create_node_from_dict(
+        cls, node_dict: Dict[str, Any], lazy: bool = False
+    ) -> Union[Dir, File]:
         """Create a node (Dir or File) from a dictionary representation."""
-        name = node_dict.get("name", "")
-        owner = node_dict.get("owner", "")
-
-        if "contents" in node_dict:
-            # This is a directory
-            dir_node = Dir(name, owner)
-
-            # Process contents
-            for child_dict in node_dict.get("contents", []):
-                child_node = cls._create_node_from_dict(child_dict)
-                dir_node.add_node(child_node)
-
-            return dir_node
-        else:
+        if "contents" not in node_dict:
             # This is a file
-            return File(name, owner)
+            return File(node_dict.get("name", ""), node_dict.get("owner", ""))
+
+        root = Dir.lazy(
+            node_dict.get("name", ""),
+            node_dict.get("owner", ""),
+            node_dict["contents"],
+        )
+        if not lazy:
+            # Walking the tree builds every directory from its payload
+            for _ in iter_subtree(root, root.name):
+                pass
+        return root
 
     @classmethod
-    def from_json(cls, json_str: str) -> "FileSystem":
+    def from_json(cls, json_str: str, lazy: bool = False) -> "FileSystem":
         """Create a FileSystem from a JSON string representation."""
         import json
 
         data = json.loads(json_str)
-        return cls.from_dict(data)
+        return cls.from_dict(data, lazy)
 
 
 if __name__ == "__main__":
@@ -1,8 +1,11 @@
 """File system utilities for the Dot CLI tool."""
 
+import heapq
 import os
 import shutil
-from typing import Optional, Tuple, List
+from typing import Iterable, Set, Tuple, List
+
+from dot.utils import copy_engine
 
 
 def ensure_dir_exists(path: str) -> bool:
@@ -22,14 +25,20 @@ def ensure_dir_exists(path: str) -> bool:
         return False
 
 
-def copy_file(src: str, dst: str, follow_symlinks: bool = True) -> bool:
+def copy_file(
+    src: str, dst: str, follow_symlinks: bool = True, verify_hash: bool = False
+) -> bool:
     """
     Copy a file from src to dst.
 
+    Destinations whose size and mtime already match the source are left
+    alone, see dot.utils.copy_engine.
+
     Args:
         src: Source path
         dst: Destination path
         follow_symlinks: Whether to follow symlinks
+        verify_hash: Whether to also compare contents before skipping a copy
 
     Returns:
         bool: True if successful, False otherwise
@@ -40,7 +49,9 @@ def copy_file(src: str, dst: str, follow_symlinks: bool = True) -> bool:
         ensure_dir_exists(dst_dir)
 
         # Copy file
-        shutil.copy2(src, dst, follow_symlinks=follow_symlinks)
+        copy_engine.copy_file(
+            src, dst, follow_symlinks=follow_symlinks, verify_hash=verify_hash
+        )
         return True
     except (OSError, shutil.Error):
         return False
@@ -73,28 +84,65 @@ def copy_dir(src: str, dst: str, follow_symlinks: bool = True) -> bool:
         return False
 
 
-def remove_empty_dirs(path: str, base_path: Optional[str] = None) -> None:
+def find_empty_dirs(removed: Iterable[str], base_paths: Iterable[str]) -> List[str]:
     """
-    Recursively remove empty directories from path up to base_path.
+    Find the directories a batch of removals leaves empty.
+
+    The parents of the removed paths are the first candidates. Candidates are
+    processed deepest first, so every directory is listed once, with a single
+    scandir, after all of its candidate children, and counts as empty when
+    each of its entries is removed or empty itself.
 
     Args:
-        path: Path to start from
-        base_path: Base path to stop at (will not be removed)
+        removed: Paths removed, or about to be
+        base_paths: Directories that, like everything above them, are kept
+
+    Returns:
+        List[str]: Empty directories strictly below a base path, deepest first
+    """
+    gone = {os.path.normpath(path) for path in removed}
+    prefixes = tuple(os.path.normpath(base) + os.sep for base in base_paths)
+    heap: List[Tuple[int, str]] = []
+    for parent in {os.path.dirname(path) for path in gone}:
+        if parent.startswith(prefixes):
+            heapq.heappush(heap, (-parent.count(os.sep), parent))
+
+    seen: Set[str] = set()
+    empty: List[str] = []
+    while heap:
+        _, directory = heapq.heappop(heap)
+        if directory in seen:
+            continue
+        seen.add(directory)
+        try:
+            with os.scandir(directory) as entries:
+                if any(entry.path not in gone for entry in entries):
+                    continue
+        except (FileNotFoundError, NotADirectoryError):
+            continue
+        gone.add(directory)
+        empty.append(directory)
+        parent = os.path.dirname(directory)
+        if parent.startswith(prefixes):
+            heapq.heappush(heap, (-parent.count(os.sep), parent))
+    return empty
+
+
+def prune_empty_dirs(removed: Iterable[str], base_paths: Iterable[str]) -> List[str]:
+    """
+    Remove the directories a batch of finished removals left empty.
+
+    Args:
+        removed: Paths that were removed
+        base_paths: Directories that, like everything above them, are kept
+
+    Returns:
+        List[str]: Directories removed, deepest first
     """
-    if base_path is None:
-        return
-
-    current = path
-    while current != base_path:
-        if os.path.isdir(current) and not os.listdir(current):
-            try:
-                os.rmdir(current)
-                current = os.path.dirname(current)
-            except OSError:
-                # Directory not empty or permission error
-                break
-        else:
-            break
+    empty = find_empty_dirs(removed, base_paths)
+    for directory in empty:
+        os.rmdir(directory)
+    return empty
 
 
 def get_file_permission(path: str) -> int:
@@ -0,0 +1,27 @@
+"""Maintenance of the repository .gitignore for the Dot CLI tool."""
+
+import os
+from typing import List
+
+
+def ensure_ignored(dotfiles_path: str, patterns: List[str], comment: str) -> None:
+    """
+    Append patterns missing from the repository .gitignore.
+
+    dot init writes all of them; repositories created before a pattern was
+    added get it here, so they do not commit the files it covers.
+
+    Args:
+        dotfiles_path: Root of the dotfiles repository
+        patterns: Lines that must be present in .gitignore
+        comment: Heading written above the appended lines
+    """
+    gitignore_path = os.path.join(dotfiles_path, ".gitignore")
+    lines: List[str] = []
+    if os.path.exists(gitignore_path):
+        with open(gitignore_path, "r", encoding="utf-8") as f:
+            lines = f.read().splitlines()
+    missing = [pattern for pattern in patterns if pattern not in lines]
+    if missing:
+        with open(gitignore_path, "a", encoding="utf-8") as f:
+            f.write(f"\n# {comment}\n" + "".join(f"{p}\n" for p in missing))
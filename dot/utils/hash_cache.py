@@ -0,0 +1,97 @@
+"""Persistent file content hash cache for the Dot CLI tool."""
+
+import hashlib
+import json
+import os
+import stat
+import threading
+import time
+from typing import Dict, Optional
+
+from dot.utils.gitignore import ensure_ignored
+from dot.utils.logger import logger
+
+# Files modified this recently are not cached, since another write within the
+# same mtime tick would go unnoticed
+RACY_WINDOW_NS = 2_000_000_000
+
+CHUNK_SIZE = 1 << 20
+
+# Digest of every socket, FIFO and device node, which have no contents to read
+SPECIAL_DIGEST = hashlib.sha256(b"special file").hexdigest()
+
+
+def hash_file(path: str) -> str:
+    """Hash the contents of a file with SHA-256."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class HashCache:
+    """
+    Cache of file content hashes keyed by path and validated by
+    (dev, inode, size, mtime_ns).
+
+    A file whose stat is unchanged is assumed to have unchanged contents, so
+    its hash is reused without reading it again.
+    """
+
+    def __init__(self) -> None:
+        """Initialize the hash cache."""
+        self.dotfiles_path = os.path.expanduser("~/.dotfiles")
+        self.cache_path = os.path.join(self.dotfiles_path, "hash_cache.json")
+        self._entries: Optional[Dict[str, list]] = None
+        self._dirty = False
+        self._lock = threading.Lock()
+        self.hashed = 0
+
+    def _load(self) -> Dict[str, list]:
+        """Load the persisted cache, starting empty if it is missing or invalid."""
+        if self._entries is None:
+            self._entries = {}
+            if os.path.exists(self.cache_path):
+                try:
+                    with open(self.cache_path, "r", encoding="utf-8") as f:
+                        self._entries = json.load(f)
+                except (OSError, json.JSONDecodeError) as e:
+                    logger.warning(f"Ignoring unreadable hash cache: {e}")
+        return self._entries
+
+    def file_digest(self, path: str) -> str:
+        """Get the content hash of a file, hashing it only if it changed."""
+        entries = self._load()
+        st = os.stat(path)
+        if not stat.S_ISREG(st.st_mode):
+            return SPECIAL_DIGEST
+        key = (st.st_dev, st.st_ino, st.st_size, st.st_mtime_ns)
+        cached = entries.get(path)
+        if cached is not None and tuple(cached[:4]) == key:
+            return cached[4]
+
+        digest = hash_file(path)
+        with self._lock:
+            self.hashed += 1
+            if time.time_ns() - st.st_mtime_ns > RACY_WINDOW_NS:
+                entries[path] = [*key, digest]
+                self._dirty = True
+        return digest
+
+    def save(self) -> None:
+        """Persist the cache if it changed and the repository exists."""
+        if not self._dirty or not os.path.isdir(self.dotfiles_path):
+            return
+        try:
+            if not os.path.exists(self.cache_path):
+                ensure_ignored(self.dotfiles_path, ["hash_cache.json"], "Local caches")
+            with open(self.cache_path, "w", encoding="utf-8") as f:
+                json.dump(self._entries, f)
+            self._dirty = False
+        except OSError as e:
+            logger.error(f"Error saving hash cache: {e}")
+
+
+# Create a global instance for use throughout the application
+hash_cache = HashCache()
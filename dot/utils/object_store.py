@@ -0,0 +1,243 @@
+"""Content-addressed storage of repository files for the Dot CLI tool."""
+
+import errno
+import os
+import shutil
+import threading
+from collections import Counter
+from typing import Iterator
+
+from dot.utils import copy_engine
+from dot.utils.copy_engine import copy_stats
+from dot.utils.gitignore import ensure_ignored
+from dot.utils.hash_cache import hash_cache
+from dot.utils.logger import logger
+
+# Errors of os.link meaning "cannot hard link here", after which the blob is
+# copied instead (reflinked where the file system supports it)
+_NO_LINK_ERRNOS = {errno.EXDEV, errno.EPERM, errno.EMLINK, errno.EOPNOTSUPP}
+
+# Working trees whose files are linked to the store
+TREES = ("user", "system", "conflict")
+
+
+def _tmp_path(path: str) -> str:
+    """Get a temporary name next to path, unique to this process and thread."""
+    return f"{path}.tmp{os.getpid()}.{threading.get_ident()}"
+
+
+class ObjectStore:
+    """
+    Optional store of file contents keyed by hash, under ~/.dotfiles/objects.
+
+    When the store is enabled, files copied into the repository are stored
+    once as a blob and reflinked into user/, system/ and conflict/, so
+    identical files share their data on disk while staying independent files
+    that any tool may write in place.
+
+    On file systems without reflinks the files of user/ and system/ are hard
+    linked to the blob instead. Hard links share permissions, so the blob key
+    is the content hash plus the permission bits. A hard linked file must
+    never be written in place, since that would change every other name of
+    the blob: files are always replaced by rename, copy_engine.copy_file
+    unlinks destinations that have other links before writing, and
+    conflict/ copies are never hard linked, so the baseline they keep cannot
+    change along with the repository file.
+    """
+
+    def __init__(self) -> None:
+        """Initialize the object store."""
+        self.dotfiles_path = os.path.expanduser("~/.dotfiles")
+        self.objects_path = os.path.join(self.dotfiles_path, "objects")
+        self.conflict_path = os.path.join(self.dotfiles_path, "conflict")
+
+    @property
+    def enabled(self) -> bool:
+        """Whether repository files are stored in the object store."""
+        return os.path.isdir(self.objects_path)
+
+    def _blob_path(self, digest: str, mode: int) -> str:
+        """Get the path of the blob holding contents with given permissions."""
+        return os.path.join(self.objects_path, digest[:2], f"{digest[2:]}.{mode:o}")
+
+    def store(self, path: str) -> str:
+        """
+        Add the contents of a file to the store.
+
+        Args:
+            path: Regular file to store
+
+        Returns:
+            str: Path of the blob, which already existed if the contents did
+        """
+        st = os.stat(path)
+        blob_path = self._blob_path(hash_cache.file_digest(path), st.st_mode & 0o7777)
+        if not os.path.exists(blob_path):
+            os.makedirs(os.path.dirname(blob_path), exist_ok=True)
+            tmp_path = _tmp_path(blob_path)
+            copy_engine.copy_file(path, tmp_path, skip_unchanged=False)
+            os.replace(tmp_path, blob_path)
+        return blob_path
+
+    def copy_file(
+        self,
+        src: str,
+        dst: str,
+        follow_symlinks: bool = True,
+        skip_unchanged: bool = True,
+        verify_hash: bool = False,
+    ) -> bool:
+        """
+        Copy a file into a working tree, through the store if it is enabled.
+
+        Takes the arguments of copy_engine.copy_file, so it can be passed to
+        shutil.copytree. With the store enabled, a destination that is already
+        a hard link to the right blob is left alone regardless of
+        skip_unchanged and verify_hash, since equal blobs mean equal contents.
+
+        Returns:
+            bool: True if dst was replaced, False if it was already up to date
+        """
+        if not self.enabled or (not follow_symlinks and os.path.islink(src)):
+            return copy_engine.copy_file(
+                src,
+                dst,
+                follow_symlinks=follow_symlinks,
+                skip_unchanged=skip_unchanged,
+                verify_hash=verify_hash,
+            )
+        if os.path.isdir(dst):
+            dst = os.path.join(dst, os.path.basename(src))
+
+        blob_path = self.store(src)
+        blob_stat = os.stat(blob_path)
+        try:
+            dst_stat = os.stat(dst)
+            if (dst_stat.st_dev, dst_stat.st_ino) == (
+                blob_stat.st_dev,
+                blob_stat.st_ino,
+            ):
+                copy_stats.record(False, blob_stat.st_size)
+                return False
+        except FileNotFoundError:
+            pass
+        if skip_unchanged and copy_engine.is_unchanged(
+            blob_path, dst, blob_stat, verify_hash
+        ):
+            copy_stats.record(False, blob_stat.st_size)
+            return False
+
+        # Link next to dst and rename over it, so an existing dst, which may
+        # be a hard link to another blob, is replaced rather than written through
+        tmp_path = _tmp_path(dst)
+        if copy_engine.reflink_file(blob_path, tmp_path) or self._hard_link(
+            blob_path, tmp_path, dst
+        ):
+            copy_stats.record_link(blob_stat.st_size)
+        else:
+            copy_engine.copy_file(blob_path, tmp_path, skip_unchanged=False)
+        os.replace(tmp_path, dst)
+        return True
+
+    def _hard_link(self, blob_path: str, tmp_path: str, dst: str) -> bool:
+        """
+        Hard link a blob to tmp_path, in place of dst, where that is allowed.
+
+        Conflict copies are never hard linked: they keep the contents a
+        repository file had, which must not change when that file does.
+
+        Returns:
+            bool: True if the link was made, False if dst needs a copy
+        """
+        if dst.startswith(self.conflict_path + os.sep):
+            return False
+        try:
+            os.link(blob_path, tmp_path)
+        except OSError as e:
+            if e.errno not in _NO_LINK_ERRNOS:
+                raise
+            return False
+        return True
+
+    def _blob_of(self, path: str) -> str:
+        """Get the path of the blob holding a file's current contents."""
+        mode = os.stat(path).st_mode & 0o7777
+        return self._blob_path(hash_cache.file_digest(path), mode)
+
+    def detach(self, path: str) -> None:
+        """
+        Give a hard linked file its own copy before it is edited in place.
+
+        Editors such as vim write files with several links in place, which
+        would change the blob and every other file linked to it. Reflinked
+        files are independent already and are left alone.
+        """
+        if os.path.isfile(path) and os.stat(path).st_nlink > 1:
+            tmp_path = _tmp_path(path)
+            copy_engine.copy_file(path, tmp_path, skip_unchanged=False)
+            os.replace(tmp_path, path)
+
+    def _tree_files(self) -> Iterator[str]:
+        """Yield every regular file of the working trees."""
+        for tree in TREES:
+            for root, _, files in os.walk(os.path.join(self.dotfiles_path, tree)):
+                for name in files:
+                    path = os.path.join(root, name)
+                    if not os.path.islink(path):
+                        yield path
+
+    def enable(self) -> int:
+        """
+        Create the store and move the existing repository files into it.
+
+        Returns:
+            int: Number of files that now share their contents with another
+        """
+        # Keep the store out of git in repositories created before it existed
+        ensure_ignored(self.dotfiles_path, ["objects/"], "Object store")
+        os.makedirs(self.objects_path, exist_ok=True)
+        copy_stats.reset()
+        users: Counter = Counter()
+        for path in list(self._tree_files()):
+            users[self.store(path)] += 1
+            # Files already hold their blob's contents, so replace them anyway
+            self.copy_file(path, path, skip_unchanged=False)
+        hash_cache.save()
+        return sum(count for count in users.values() if count > 1)
+
+    def disable(self) -> None:
+        """Give every hard linked file its own copy again and delete the store."""
+        if not self.enabled:
+            return
+        for path in self._tree_files():
+            self.detach(path)
+        shutil.rmtree(self.objects_path)
+
+    def gc(self) -> int:
+        """
+        Delete the blobs whose contents no working tree file holds anymore.
+
+        Reflinked files do not show in the link count of their blob, so the
+        blobs in use are found by hashing the working trees, through the hash
+        cache.
+
+        Returns:
+            int: Number of blobs deleted
+        """
+        removed = 0
+        if not self.enabled:
+            return removed
+        used = {self._blob_of(path) for path in self._tree_files()}
+        hash_cache.save()
+        for root, _, files in os.walk(self.objects_path):
+            for name in files:
+                path = os.path.join(root, name)
+                if path not in used:
+                    os.remove(path)
+                    removed += 1
+        logger.info(f"Removed {removed} unused blobs from the object store")
+        return removed
+
+
+# Create a global instance for use throughout the application
+object_store = ObjectStore()
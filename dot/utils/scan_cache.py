@@ -0,0 +1,113 @@
+"""Persistent directory listing cache for the Dot CLI tool."""
+
+import json
+import os
+import stat
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+from dot.utils.gitignore import ensure_ignored
+from dot.utils.logger import logger
+
+# Listings of directories modified this recently are not cached, since another
+# change within the same mtime tick would go unnoticed
+RACY_WINDOW_NS = 2_000_000_000
+
+
+def list_entries(path: str) -> List[Tuple[str, bool]]:
+    """
+    List a directory as (name, is_dir) pairs, reusing the d_type from readdir.
+
+    Sockets, FIFOs and device nodes are listed as files, as the scanner has
+    always recorded them; they are only skipped when copying, see
+    is_special_file.
+    """
+    with os.scandir(path) as it:
+        return [(entry.name, entry.is_dir()) for entry in it]
+
+
+def is_special_file(path: str) -> bool:
+    """Check whether path is a socket, FIFO or device node, which cannot be copied."""
+    try:
+        mode = os.lstat(path).st_mode
+    except OSError:
+        return False
+    return not (stat.S_ISREG(mode) or stat.S_ISDIR(mode) or stat.S_ISLNK(mode))
+
+
+class ScanCache:
+    """
+    Cache of directory listings keyed by path and validated by (dev, inode, mtime_ns).
+
+    A directory's mtime changes whenever an entry is added, removed or renamed
+    in it, so an unchanged stat means the cached listing can be reused without
+    reading the directory again.
+    """
+
+    def __init__(self) -> None:
+        """Initialize the scan cache."""
+        self.dotfiles_path = os.path.expanduser("~/.dotfiles")
+        self.cache_path = os.path.join(self.dotfiles_path, "scan_cache.json")
+        self._entries: Optional[Dict[str, list]] = None
+        self._dirty = False
+        self._lock = threading.Lock()
+        self.skipped = 0
+        self.relisted = 0
+
+    def _load(self) -> Dict[str, list]:
+        """Load the persisted cache, starting empty if it is missing or invalid."""
+        if self._entries is None:
+            self._entries = {}
+            if os.path.exists(self.cache_path):
+                try:
+                    with open(self.cache_path, "r", encoding="utf-8") as f:
+                        self._entries = json.load(f)
+                except (OSError, json.JSONDecodeError) as e:
+                    logger.warning(f"Ignoring unreadable scan cache: {e}")
+        return self._entries
+
+    def reset_stats(self) -> None:
+        """Reset the skipped/re-listed directory counters."""
+        self.skipped = 0
+        self.relisted = 0
+
+    def list_directory(self, path: str) -> List[Tuple[str, bool]]:
+        """List a directory, reusing the cached listing if it has not changed."""
+        entries = self._load()
+        st = os.stat(path)
+        cached = entries.get(path)
+        if (
+            cached is not None
+            and cached[0] == st.st_dev
+            and cached[1] == st.st_ino
+            and cached[2] == st.st_mtime_ns
+        ):
+            with self._lock:
+                self.skipped += 1
+            return [(name, is_dir) for name, is_dir in cached[3]]
+
+        listing = list_entries(path)
+        with self._lock:
+            self.relisted += 1
+            if time.time_ns() - st.st_mtime_ns > RACY_WINDOW_NS:
+                entries[path] = [st.st_dev, st.st_ino, st.st_mtime_ns, listing]
+                self._dirty = True
+        return listing
+
+    def save(self) -> None:
+        """Persist the cache if it changed and the repository exists."""
+        if not self._dirty or not os.path.isdir(self.dotfiles_path):
+            return
+        try:
+            if not os.path.exists(self.cache_path):
+                ensure_ignored(self.dotfiles_path, ["scan_cache.json"], "Local caches")
+            with open(self.cache_path, "w", encoding="utf-8") as f:
+                json.dump(self._entries, f)
+            self._dirty = False
+        except OSError as e:
+            logger.error(f"Error saving scan cache: {e}")
+
+
+# Create a global instance for use throughout the application
+scan_cache = ScanCache()
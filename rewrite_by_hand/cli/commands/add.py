@@ -2,7 +2,6 @@ from typing import Any
 import sys
 from rewrite_by_hand.core.health import checker, HealthStatus
 from rewrite_by_hand.cli.output import output_manager
-from rewrite_by_hand.core.git import git_manager
 
 
 def cmd_add(args: Any):
@@ -23,17 +22,18 @@ def cmd_add(args: Any):
     from rewrite_by_hand.core.config import ConfigManager
 
     config_manager = ConfigManager.load(if_hook=True)
-    path = args.path
+    paths = args.paths
     software = args.software
-    if args.pure:
-        config_manager.pure_add(path_str=path, owner=software)
-        config_manager.save()
-    else:
-        config_manager.add(path_str=path, owner=software)
-        config_manager.save()
-    success, output = git_manager.add_and_commit(f"Added {path} for {software}")
-    if not success:
-        output_manager.err("Add_commit_failed", error=output)
-        sys.exit(1)
+    path = " ".join(paths)
+    # the copies, the config save and the commit are applied as one group
+    with config_manager.transaction(
+        f"Added {path} for {software}", dry_run=args.dry_run
+    ):
+        if args.pure:
+            config_manager.pure_add_many(path_strs=paths, owner=software)
+        else:
+            config_manager.add_many(path_strs=paths, owner=software)
+    if args.dry_run:
+        sys.exit(0)
     output_manager.out("Add_Success", path=path, owner=software)
     sys.exit(0)
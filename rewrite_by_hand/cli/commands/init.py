@@ -9,6 +9,7 @@ from rewrite_by_hand.data.variables import (
     README_FIRST_LINE,
     README_ORIGIN,
     CONFIG_ORIGIN,
+    EXCLUDE_ORIGIN,
     IGNORE_ORIGIN,
 )
 from rewrite_by_hand.utils.fs_utils import ensure_dir_exists
@@ -87,6 +88,9 @@ def cmd_init(args: Any):
     # Create local_config.json
     _create_local_config()
 
+    # Create exclude.json
+    _create_exclude()
+
     # Create .gitignore
     _create_gitignore()
 
@@ -138,6 +142,18 @@ def _create_config() -> None:
         sys.exit(1)
 
 
+def _create_exclude() -> None:
+    """Create the exclude.json file."""
+    exclude_path = os.path.join(REPOPATH, "exclude.json")
+
+    try:
+        shutil.copy2(EXCLUDE_ORIGIN, exclude_path)
+    except OSError as e:
+        output_manager.err("Init_Create_Exclude_Failed", output=e)
+        output_manager.err("Init_Tell_User_To_Clean", REPOPATH=REPOPATH)
+        sys.exit(1)
+
+
 def _create_local_config() -> None:
     """Create the local_config.json file."""
     readme_path = os.path.join(REPOPATH, "local_config.json")
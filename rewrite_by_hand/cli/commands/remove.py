@@ -2,7 +2,6 @@ from typing import Any
 import sys
 from rewrite_by_hand.core.health import checker, HealthStatus
 from rewrite_by_hand.cli.output import output_manager
-from rewrite_by_hand.core.git import git_manager
 
 
 def cmd_remove(args: Any):
@@ -24,11 +23,9 @@ def cmd_remove(args: Any):
 
     config_manager = ConfigManager.load(if_hook=True)
     path = args.path
-    config_manager.remove(path_str=path)
-    config_manager.save()
-    success, output = git_manager.add_and_commit(f"Remove {path}")
-    if not success:
-        output_manager.err("Add_commit_failed", error=output)
-        sys.exit(1)
+    with config_manager.transaction(f"Remove {path}", dry_run=args.dry_run):
+        config_manager.remove(path_str=path)
+    if args.dry_run:
+        sys.exit(0)
     output_manager.out("Remove_Success", path=path)
     sys.exit(0)
@@ -24,21 +24,21 @@ def cmd_unmanage(args: Any):
 
     if args.all:
         config_manager = ConfigManager.load(if_hook=True)
-        config_manager.local_config = FileSystem(if_hook=False, local=True)
-        config_manager.save()
+        with config_manager.transaction():
+            config_manager.local_config = FileSystem(if_hook=False, local=True)
         output_manager.out("Unmanage_All_Success")
         sys.exit(0)
     if args.path:
         config_manager = ConfigManager.load(if_hook=True)
         path = args.path
-        config_manager.unmanage(path_str=path)
-        config_manager.save()
+        with config_manager.transaction():
+            config_manager.unmanage(path_str=path)
         output_manager.out("Unmanage_Success", path=path)
         sys.exit(0)
     else:
         config_manager = ConfigManager.load(if_hook=True)
         software = args.software
-        config_manager.unmanage_software(software)
-        config_manager.save()
+        with config_manager.transaction():
+            config_manager.unmanage_software(software)
         output_manager.out("Unmanage_software_Success", software=software)
         sys.exit(0)
@@ -9,6 +9,7 @@ from rewrite_by_hand.cli.commands.unmanage import cmd_unmanage
 from rewrite_by_hand.cli.commands.remote import cmd_remote
 from rewrite_by_hand.cli.commands.push import cmd_push
 from rewrite_by_hand.cli.commands.pull import cmd_pull
+from rewrite_by_hand.cli.commands.layout import cmd_layout
 
 
 from rewrite_by_hand.cli.output import output_manager
@@ -49,9 +50,16 @@ def create_parser() -> argparse.ArgumentParser:
     add_parser = subparsers.add_parser(
         "add", help="Add a file or directory to the repository"
     )
-    add_parser.add_argument("path", help="Path to the file or directory")
+    add_parser.add_argument(
+        "paths", nargs="+", metavar="path", help="Paths to the files or directories"
+    )
     add_parser.add_argument("software", help="Name of the software the file belongs to")
     add_parser.add_argument("--pure", action="store_true", help="Add without managing")
+    add_parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="Print the planned repo changes without making them",
+    )
     add_parser.set_defaults(func=cmd_add)
 
     # manage command
@@ -74,6 +82,11 @@ def create_parser() -> argparse.ArgumentParser:
         "remove", help="Remove a file or directory from the repository"
     )
     remove_parser.add_argument("path", help="Path to the file or directory")
+    remove_parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="Print the planned repo changes without making them",
+    )
     remove_parser.set_defaults(func=cmd_remove)
 
     # unmanage command
@@ -108,6 +121,15 @@ def create_parser() -> argparse.ArgumentParser:
     )
     pull_parser.set_defaults(func=cmd_pull)
 
+    # layout command
+    layout_parser = subparsers.add_parser(
+        "layout", help="Store the config in one file or one file per software"
+    )
+    layout_parser.add_argument(
+        "layout", choices=["single", "sharded"], help="Layout of the config files"
+    )
+    layout_parser.set_defaults(func=cmd_layout)
+
     # edit command
     # edit_parser = subparsers.add_parser("edit", help="Edit a file in the repository")
     # edit_parser.add_argument("path", help="Path to the file")
@@ -1,8 +1,110 @@
-from typing import Tuple
+from typing import Dict, Iterator, List, Optional, Tuple
+from typing_extensions import Literal
+from contextlib import contextmanager
+from urllib.parse import quote
+import json
+import os
 import sys
 from rewrite_by_hand.utils.file_system import FileSystem, Owner
+from rewrite_by_hand.utils.scan_cache import scan_cache
+from rewrite_by_hand.core.journal import Journal, Operation, apply_operation, recover
 from rewrite_by_hand.cli.output import output_manager
-from rewrite_by_hand.data.variables import REPO_CONFIG_PATH, REPO_LOCAL_CONFIG_PATH
+from rewrite_by_hand.data.variables import (
+    REPOPATH,
+    REPO_CONFIG_PATH,
+    REPO_LOCAL_CONFIG_PATH,
+    REPO_CONFIG_DIR,
+    REPO_LOCAL_CONFIG_DIR,
+    REPO_SCAN_CACHE_PATH,
+)
+
+# "single" keeps a whole forest in config.json, "sharded" keeps a manifest
+# there and one file per software under config.d
+Layout = Literal["single", "sharded"]
+
+
+def _shard_path(config_dir: str, software: Owner) -> str:
+    return os.path.join(config_dir, quote(software, safe="") + ".json")
+
+
+def _read_config(config_path: str, config_dir: str) -> Tuple[Dict, Layout]:
+    with open(config_path, "r") as config_file:
+        data = json.load(config_file)
+    if data.get("layout") != "sharded":
+        return data, "single"
+    merged: Dict = {
+        "USER": {"top_dirs": [], "top_files": []},
+        "SYSTEM": {"top_dirs": [], "top_files": []},
+    }
+    for software in data["software"]:
+        with open(_shard_path(config_dir, software), "r") as shard_file:
+            shard = json.load(shard_file)
+        for forest_name, forest in merged.items():
+            forest["top_dirs"].extend(shard[forest_name]["top_dirs"])
+            forest["top_files"].extend(shard[forest_name]["top_files"])
+    return merged, "sharded"
+
+
+def _ignore_operations(patterns: List[str]) -> List[Operation]:
+    # repos created before a pattern was added to data/ignore do not have it,
+    # so append it in the same group that first writes the ignored file
+    if not patterns:
+        return []
+    gitignore_path = os.path.join(REPOPATH, ".gitignore")
+    try:
+        with open(gitignore_path, "r") as gitignore_file:
+            content = gitignore_file.read()
+    except FileNotFoundError:
+        content = ""
+    lines = content.splitlines()
+    missing = [pattern for pattern in patterns if pattern not in lines]
+    if not missing:
+        return []
+    if content and not content.endswith("\n"):
+        content += "\n"
+    content += "".join(pattern + "\n" for pattern in missing)
+    return [{"op": "write", "path": gitignore_path, "content": content}]
+
+
+def _config_operations(
+    fs: FileSystem, config_path: str, config_dir: str, layout: Layout
+) -> List[Operation]:
+    # the writes and removals that bring the files on disk in line with fs
+    if layout == "single":
+        ops: List[Operation] = [
+            {"op": "write", "path": config_path, "content": fs.to_json()}
+        ]
+        if os.path.isdir(config_dir):
+            ops.append({"op": "remove", "path": config_dir})
+        fs.dirty_owners = set()
+        return ops
+    ops = []
+    softwares = set(fs.owner_index)
+    if fs.dirty_owners is None:
+        # nothing is known about the shards on disk: rewrite every shard and
+        # drop the ones whose software is gone
+        dirty = softwares
+        keep = {_shard_path(config_dir, software) for software in softwares}
+        if os.path.isdir(config_dir):
+            for name in os.listdir(config_dir):
+                shard_path = os.path.join(config_dir, name)
+                if shard_path not in keep:
+                    ops.append({"op": "remove", "path": shard_path})
+    else:
+        dirty = fs.dirty_owners
+    for software in sorted(dirty):
+        shard_path = _shard_path(config_dir, software)
+        if software in softwares:
+            content = json.dumps(fs.to_dict({software}), indent=2)
+            ops.append({"op": "write", "path": shard_path, "content": content})
+        elif os.path.exists(shard_path):
+            ops.append({"op": "remove", "path": shard_path})
+    manifest = {"layout": "sharded", "software": sorted(softwares)}
+    ops.append(
+        {"op": "write", "path": config_path, "content": json.dumps(manifest, indent=2)}
+    )
+    fs.dirty_owners = set()
+    return ops
 
 
 class ConfigManager:
@@ -10,6 +112,9 @@ class ConfigManager:
         self.if_hook = if_hook
         self.config = FileSystem(if_hook=if_hook)
         self.local_config = FileSystem(if_hook=False, local=True)
+        self.layout: Layout = "single"
+        # set inside transaction(): saves are recorded instead of written
+        self.journal: Optional[Journal] = None
 
     def pure_add(self, path_str: str, owner: Owner) -> None:
         self.config.add(path_str, owner)
@@ -18,7 +123,7 @@ class ConfigManager:
         self.config.remove(path_str)
 
     def manage(self, path_str: str) -> None:
-        match self.config.if_exists(path_str):
+        match self.config.if_exists_many([path_str])[path_str]:
             case True, owner:
                 self.local_config.add(path_str, owner)
             case False, _:
@@ -43,43 +148,59 @@ class ConfigManager:
         self.pure_add(path_str, owner)
         self.manage(path_str)
 
+    def pure_add_many(self, path_strs: List[str], owner: Owner) -> None:
+        self.config.add_many([(path_str, owner) for path_str in path_strs])
+
+    def add_many(self, path_strs: List[str], owner: Owner) -> None:
+        self.pure_add_many(path_strs, owner)
+        self.local_config.add_many([(path_str, owner) for path_str in path_strs])
+
     def remove(self, path_str: str) -> None:
         self.unmanage(path_str)
         self.pure_remove(path_str)
 
     def manage_software(self, software: Owner) -> None:
-        flag = True
-        for super_forests in self.config.forest:
-            for super_forest in super_forests:
-                for top_tree, owner in super_forest:
-                    if owner == software:
-                        flag = False
-                        match self.local_config.if_exists(top_tree.path.path):
-                            case True, _:
-                                pass
-                            case False, _:
-                                self.local_config.add(top_tree.path.path, owner)
-        if flag:
+        top_trees = list(self.config.owner_index.get(software, {}).values())
+        if not top_trees:
             output_manager.err(
                 "Do_Not_Have_Software",
                 software=software,
             )
             sys.exit(1)
+        managed = self.local_config.if_exists_many(
+            [top_tree.path.path for top_tree in top_trees]
+        )
+        for top_tree in top_trees:
+            match managed[top_tree.path.path]:
+                case True, _:
+                    pass
+                case False, _:
+                    self.local_config.add(top_tree.path.path, software)
 
     def unmanage_software(self, software: Owner) -> None:
-        flag = True
-        for super_forests in self.local_config.forest:
-            for super_forest in super_forests:
-                for top_tree, owner in super_forest:
-                    if owner == software:
-                        flag = False
-                        self.local_config.remove(top_tree.path.path)
-        if flag:
+        # copy first, removing a top tree also drops it from the index
+        top_trees = list(self.local_config.owner_index.get(software, {}).values())
+        if not top_trees:
             output_manager.err(
                 "Do_Not_Have_Software_Under_Manage",
                 software=software,
             )
             sys.exit(1)
+        for top_tree in top_trees:
+            self.local_config.remove(top_tree.path.path)
+
+    def manage_all(self) -> None:
+        # a copy rather than the same object, so saving config.json does not
+        # clear the dirty owners of the local config
+        self.local_config = FileSystem.from_dict(
+            self.config.to_dict(), if_hook=False, local=True
+        )
+        self.local_config.dirty_owners = None
+
+    def set_layout(self, layout: Layout) -> None:
+        self.layout = layout
+        self.config.dirty_owners = None
+        self.local_config.dirty_owners = None
 
     @classmethod
     def from_json(
@@ -97,37 +218,110 @@ class ConfigManager:
         local_config_json_str = self.local_config.to_json()
         return config_json_str, local_config_json_str
 
+    @contextmanager
+    def transaction(
+        self, message: Optional[str] = None, dry_run: bool = False
+    ) -> Iterator[None]:
+        # every repo change and config save made in the block is recorded in
+        # the journal first, then applied as one group with a single save and,
+        # if message is given, a single commit; an error in the block leaves
+        # the repo untouched. A dry run prints the group instead of applying it.
+        # Directories scanned in the block are reported once, and the scan
+        # cache is only written once the group is applied.
+        journal = Journal()
+        hooker = self.config.hooker if self.config.if_hook else None
+        self.journal = journal
+        if hooker is not None:
+            hooker.journal = journal
+        scan_cache.reset_stats()
+        try:
+            yield
+            if hooker is not None:
+                hooker.prune()
+            self.save()
+            if scan_cache.skipped or scan_cache.relisted:
+                output_manager.out(
+                    "Scan_Report",
+                    skipped=scan_cache.skipped,
+                    relisted=scan_cache.relisted,
+                )
+            if dry_run:
+                journal.report()
+                journal.discard()
+                return
+            journal.commit(message)
+        except BaseException:
+            journal.discard()
+            raise
+        finally:
+            self.journal = None
+            if hooker is not None:
+                hooker.journal = None
+                hooker.removed = []
+        success, output = journal.apply()
+        if not success:
+            output_manager.err("Add_Commit_Failed", error=output)
+            sys.exit(1)
+        scan_cache.save()
+
     @classmethod
     def load(cls, if_hook: bool = False) -> "ConfigManager":
+        recover()
         try:
-            with open(REPO_CONFIG_PATH, "r") as config_file:
-                config_json_str = config_file.read()
+            config_dict, layout = _read_config(REPO_CONFIG_PATH, REPO_CONFIG_DIR)
         except FileNotFoundError:
             output_manager.err("Can_Not_Load_Config")
             sys.exit(1)
         try:
-            with open(REPO_LOCAL_CONFIG_PATH, "r") as local_config_file:
-                local_config_json_str = local_config_file.read()
+            local_config_dict, local_layout = _read_config(
+                REPO_LOCAL_CONFIG_PATH, REPO_LOCAL_CONFIG_DIR
+            )
         except FileNotFoundError:
             output_manager.err("Can_Not_Load_Local_Config")
             sys.exit(1)
-        return cls.from_json(config_json_str, local_config_json_str, if_hook=if_hook)
+        config_manager = cls()
+        config_manager.layout = layout
+        config_manager.config = FileSystem.from_dict(config_dict, if_hook=if_hook)
+        config_manager.local_config = FileSystem.from_dict(
+            local_config_dict, if_hook=False, local=True
+        )
+        if local_layout != layout:
+            # the local config follows the layout of config.json
+            config_manager.local_config.dirty_owners = None
+        return config_manager
 
-    def save(self) -> None:
-        config_json_str, local_config_json_str = self.to_json()
+    def _write(self, ops: List[Operation], error: str) -> None:
+        if self.journal is not None:
+            for op in ops:
+                self.journal.record(op)
+            return
         try:
-            with open(REPO_CONFIG_PATH, "w") as config_file:
-                config_file.write(config_json_str)
+            for op in ops:
+                apply_operation(op)
         except PermissionError:
-            output_manager.err(
-                "Can_Not_Save_Config",
-            )
+            output_manager.err(error)
             sys.exit(1)
-        try:
-            with open(REPO_LOCAL_CONFIG_PATH, "w") as local_config_file:
-                local_config_file.write(local_config_json_str)
-        except PermissionError:
-            output_manager.err(
-                "Can_Not_Save_Local_Config",
+
+    def save(self) -> None:
+        # a sharded layout only rewrites the shards of the software touched
+        groups = [
+            (_config_operations(fs, config_path, config_dir, self.layout), error)
+            for fs, config_path, config_dir, error in (
+                (self.config, REPO_CONFIG_PATH, REPO_CONFIG_DIR, "Can_Not_Save_Config"),
+                (
+                    self.local_config,
+                    REPO_LOCAL_CONFIG_PATH,
+                    REPO_LOCAL_CONFIG_DIR,
+                    "Can_Not_Save_Local_Config",
+                ),
             )
-            sys.exit(1)
+        ]
+        # checked after serializing, which is when lazy trees are scanned
+        ignored = []
+        if self.layout == "sharded" and not os.path.isdir(REPO_LOCAL_CONFIG_DIR):
+            ignored.append("local_config.d/")
+        if scan_cache.dirty and not os.path.exists(REPO_SCAN_CACHE_PATH):
+            ignored.append("scan_cache.json")
+        self._write(_ignore_operations(ignored), "Can_Not_Save_Local_Config")
+        for ops, error in groups:
+            self._write(ops, error)
@@ -0,0 +1,196 @@
+from typing import Dict, List, Optional, Set, Tuple
+import json
+import os
+import shutil
+import sys
+
+from rewrite_by_hand.data.variables import (
+    REPO_JOURNAL_PATH,
+    COPY_VERIFY_HASH,
+    COPY_JOBS,
+)
+from rewrite_by_hand.utils.copy_engine import copy_file, copy_files, copy_stats
+from rewrite_by_hand.core.git import git_manager
+from rewrite_by_hand.cli.output import output_manager
+
+# A journal is a JSON-lines file of repo operations followed by a commit
+# record. Nothing in the repo is touched until the commit record is on disk,
+# and every operation can be applied twice, so an interrupted group is either
+# dropped (no commit record) or replayed from the start (commit record).
+#
+# operations:
+#   {"op": "mkdir", "path": ...}
+#   {"op": "copy", "source": ..., "target": ...}
+#   {"op": "write", "path": ..., "content": ...}
+#   {"op": "remove", "path": ...}
+#   {"op": "commit", "message": ...}   message is None when git is not involved
+
+Operation = Dict[str, Optional[str]]
+
+
+def apply_operation(op: Operation) -> None:
+    match op["op"]:
+        case "mkdir":
+            os.makedirs(op["path"], exist_ok=True)
+        case "copy":
+            os.makedirs(os.path.dirname(op["target"]), exist_ok=True)
+            copy_file(op["source"], op["target"], verify_hash=COPY_VERIFY_HASH)
+        case "write":
+            os.makedirs(os.path.dirname(op["path"]), exist_ok=True)
+            with open(op["path"], "w") as f:
+                f.write(op["content"])
+        case "remove":
+            path = op["path"]
+            if os.path.isdir(path) and not os.path.islink(path):
+                shutil.rmtree(path)
+            elif os.path.lexists(path):
+                os.remove(path)
+
+
+class Journal:
+    def __init__(self, path: str = REPO_JOURNAL_PATH) -> None:
+        self.path = path
+        # the planned group; nothing is written before commit, so a plan can
+        # also be printed and dropped (dry run)
+        self.ops: List[Operation] = []
+
+    def record(self, op: Operation) -> None:
+        self.ops.append(op)
+
+    def commit(self, message: Optional[str]) -> None:
+        with open(self.path, "w") as f:
+            for op in self.ops + [{"op": "commit", "message": message}]:
+                f.write(json.dumps(op) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        self.ops = []
+
+    def discard(self) -> None:
+        self.ops = []
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+    def report(self) -> None:
+        # print the planned group with the bytes it would write
+        size = 0
+        for op in self.ops:
+            if op["op"] == "copy":
+                try:
+                    op_size = os.stat(op["source"]).st_size
+                except OSError:
+                    op_size = 0
+                size += op_size
+                output_manager.out(
+                    "Plan_Copy",
+                    source=op["source"],
+                    target=op["target"],
+                    size=op_size,
+                )
+            elif op["op"] == "write":
+                size += len(op["content"].encode())
+                output_manager.out("Plan_Operation", op="write", path=op["path"])
+            else:
+                output_manager.out("Plan_Operation", op=op["op"], path=op["path"])
+        output_manager.out("Plan_Summary", count=len(self.ops), size=size)
+
+    def read(self) -> Tuple[List[Operation], bool, Optional[str]]:
+        # returns (operations, committed, message); a torn last line can only
+        # come from a crash before the commit record was synced
+        ops: List[Operation] = []
+        if not os.path.exists(self.path):
+            return ops, False, None
+        with open(self.path, "r") as f:
+            for line in f:
+                try:
+                    op = json.loads(line)
+                except json.JSONDecodeError:
+                    break
+                if op["op"] == "commit":
+                    return ops, True, op["message"]
+                ops.append(op)
+        return ops, False, None
+
+    def apply(self) -> Tuple[bool, str]:
+        ops, committed, message = self.read()
+        if not committed:
+            self.discard()
+            return True, ""
+        copy_stats.reset()
+        copies: List[Tuple[str, str]] = []
+        made_dirs: Set[str] = set()
+        for op in ops + [{"op": "commit"}]:
+            if op["op"] == "copy":
+                copies.append((op["source"], op["target"]))
+                continue
+            if copies:
+                self._apply_copies(copies, made_dirs)
+                copies = []
+            if op["op"] == "commit":
+                break
+            if op["op"] == "mkdir":
+                if op["path"] in made_dirs:
+                    continue
+                made_dirs.add(op["path"])
+            elif op["op"] == "remove":
+                # may take created directories with it
+                made_dirs.clear()
+            try:
+                apply_operation(op)
+            except OSError as e:
+                # keep the journal, the next command replays it
+                output_manager.err(
+                    "Journal_Apply_Failed",
+                    op=op["op"],
+                    path=op.get("path") or op.get("target"),
+                    error=e,
+                )
+                sys.exit(1)
+        if copy_stats.copied_files or copy_stats.skipped_files:
+            output_manager.out(
+                "Copy_Report",
+                copied=copy_stats.copied_files,
+                copied_bytes=copy_stats.copied_bytes,
+                skipped=copy_stats.skipped_files,
+                skipped_bytes=copy_stats.skipped_bytes,
+            )
+        success, output = True, ""
+        if message is not None:
+            success, output = git_manager.add_and_commit(message)
+        self.discard()
+        return success, output
+
+    def _apply_copies(
+        self, copies: List[Tuple[str, str]], made_dirs: Set[str]
+    ) -> None:
+        # a run of copy operations: each target directory is created once and
+        # the files are copied on the thread pool, in source order for
+        # locality. A file that fails is reported and left out; adding it
+        # again copies it since its target is missing or stale.
+        target_dirs = {os.path.dirname(target) for _, target in copies} - made_dirs
+        for target_dir in sorted(target_dirs):
+            try:
+                os.makedirs(target_dir, exist_ok=True)
+            except OSError as e:
+                output_manager.err(
+                    "Journal_Apply_Failed", op="mkdir", path=target_dir, error=e
+                )
+                sys.exit(1)
+        made_dirs.update(target_dirs)
+        copies.sort()
+        for source, error in copy_files(copies, COPY_JOBS, COPY_VERIFY_HASH):
+            output_manager.err("Hooker_Copy_Failed", path=source, error=error)
+
+
+def recover() -> None:
+    # finish or drop a group left behind by an interrupted command
+    journal = Journal()
+    if not os.path.exists(journal.path):
+        return
+    committed = journal.read()[1]
+    success, output = journal.apply()
+    if not committed:
+        return
+    if not success:
+        output_manager.err("Add_Commit_Failed", error=output)
+        sys.exit(1)
+    output_manager.out("Journal_Replayed")
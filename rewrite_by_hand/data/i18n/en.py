@@ -12,6 +12,8 @@ class OutputText(Enum):
     Init_Next_Step = "Next step: You can\n1. run 'dot add <path> <software>' to manage your dotfiles\n2. run 'dot remote <url>' to set a remote repository."
     # clean
     Clean_Success = "Cleaned {REPOPATH} successfully."
+    # scan
+    Scan_Report = "Scanned directories: {skipped} unchanged, {relisted} re-listed."
     # add
     Add_Success = "Added {path} for {owner} successfully."
     # manage
@@ -31,6 +33,16 @@ class OutputText(Enum):
     Push_Success = "Pushed to remote repository successfully."
     # pull
     Pull_Success = "Pulled from remote repository successfully."
+    # copy
+    Copy_Report = "Copied {copied} files ({copied_bytes} bytes), {skipped} unchanged ({skipped_bytes} bytes)."
+    # journal
+    Journal_Replayed = "Finished an interrupted operation from the journal."
+    # layout
+    Layout_Success = "Switched the config layout to {layout} successfully."
+    # plan
+    Plan_Operation = "{op}\t{path}"
+    Plan_Copy = "copy\t{source} -> {target}\t{size} bytes"
+    Plan_Summary = "Dry run: {count} operations, about {size} bytes to write. Nothing was changed."
 
 
 class ErrorText(Enum):
@@ -65,6 +77,7 @@ class ErrorText(Enum):
         "Failed to create local_config.json. Error: {output}"
     )
     Init_Create_Gitignore_Failed = "Failed to create .gitignore. Error: {output}"
+    Init_Create_Exclude_Failed = "Failed to create exclude.json. Error: {output}"
     Init_Create_Conflict_Dirs_Failed = (
         "Failed to create conflict directories when creating {dir}."
     )
@@ -75,8 +88,11 @@ class ErrorText(Enum):
     Clean_Abort = "Aborting clean command."
     # hook
     Hooker_Add_File_Failed = "Permission denied for copy {path}."
+    Hooker_Copy_Failed = "Failed to copy {path} with error: {error}"
     Hooker_Remove_Failed = "Failed to remove {path} with error: {error}"
     Hooker_Remove_Failed_File_Not_Found = "You are trying to remove a file or directory {path} that does not exist in the repo. This error would never happen if your repo is healthy. Please check if your repo is healthy by running 'dot check'."
+    # journal
+    Journal_Apply_Failed = "Failed to {op} {path} with error: {error}. It will be retried by the next command."
     # file_system
     File_Already_Managed = "The path {path} is already managed."
     File_Already_Exists = "Path {path} already exists in repo, maybe you want to use `dot manage` instead of `dot add`"
@@ -101,6 +117,7 @@ class ErrorText(Enum):
         "Can not load config.json. Please check if the file exists and is valid JSON."
     )
     Can_Not_Load_Local_Config = "Can not load local_config.json. Please check if the file exists and is valid JSON."
+    Can_Not_Load_Exclude = "Can not load exclude.json. Please check if the file is valid JSON."
     Can_Not_Save_Config = (
         "Can not save config.json. Please check if the file is writable."
     )
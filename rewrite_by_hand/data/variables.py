@@ -4,6 +4,16 @@ import os
 REPOPATH = os.path.expanduser("~/.dotfiles")
 DEFAULT_LANGUAGE = "en"
 MAGIC_STRING = "hello world"
+# also compare contents by hash before skipping a copy whose target has the
+# same size and mtime as its source
+COPY_VERIFY_HASH = False
+# number of threads copying files into the repo, DOT_JOBS in the environment
+_jobs = os.environ.get("DOT_JOBS", "")
+COPY_JOBS = (
+    int(_jobs)
+    if _jobs.isdigit() and int(_jobs) > 0
+    else min(32, (os.cpu_count() or 1) + 4)
+)
 
 ## Variables that should not be changed by the user
 VARIABLES_PATH = os.path.abspath(__file__)
@@ -13,6 +23,12 @@ REPO_USER_PATH = os.path.join(REPOPATH, "user")
 REPO_SYSTEM_PATH = os.path.join(REPOPATH, "system")
 REPO_CONFIG_PATH = os.path.join(REPOPATH, "config.json")
 REPO_LOCAL_CONFIG_PATH = os.path.join(REPOPATH, "local_config.json")
+REPO_CONFIG_DIR = os.path.join(REPOPATH, "config.d")
+REPO_LOCAL_CONFIG_DIR = os.path.join(REPOPATH, "local_config.d")
+REPO_EXCLUDE_PATH = os.path.join(REPOPATH, "exclude.json")
+REPO_SCAN_CACHE_PATH = os.path.join(REPOPATH, "scan_cache.json")
+# inside .git so it is never committed, whatever the .gitignore says
+REPO_JOURNAL_PATH = os.path.join(REPOPATH, ".git", "dot_journal.jsonl")
 
 MESSAGES_PATH = "rewrite_by_hand.data.i18n"
 
@@ -24,6 +40,9 @@ with open(README_ORIGIN, "r") as f:
 CONFIG_ORIGIN = os.path.join(
     os.path.dirname(os.path.dirname(__file__)), "data", "config.json"
 )
+EXCLUDE_ORIGIN = os.path.join(
+    os.path.dirname(os.path.dirname(__file__)), "data", "exclude.json"
+)
 IGNORE_ORIGIN = os.path.join(
     os.path.dirname(os.path.dirname(__file__)), "data", "ignore"
 )
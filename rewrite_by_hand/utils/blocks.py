@@ -1,6 +1,6 @@
 import re
 import sys
-from typing import Optional, List
+from typing import Any, Dict, List, Optional, Tuple
 from rewrite_by_hand.data.variables import MAGIC_STRING
 from rewrite_by_hand.cli.output import output_manager
 
@@ -11,6 +11,18 @@ class Block:
         self.mark = mark
 
 
+# one marker token: "MAGIC: mark", which opens a block when "/*" comes right
+# before it on the same line and closes one when "*/" follows it. The pattern
+# starts with the literal MAGIC_STRING so the scan can skip ahead quickly, and
+# only consumes MAGIC_STRING itself so a mark running into the next marker
+# does not hide it.
+MARKER_PATTERN = re.compile(
+    rf"{MAGIC_STRING}(?=[^\S\n]*:[^\S\n]*(\w+)([^\S\n]*\*/)?)"
+)
+# blanks allowed between "/*" and MAGIC_STRING
+BLANKS = " \t\r\f\v"
+
+
 class BlocksManager:
     def __init__(self):
         pass
@@ -18,117 +30,108 @@ class BlocksManager:
     def cut(self, file_content: str) -> List[Block]:
         """
         Cut the file content into blocks.
-        Raises BlockParsingError if there are nested blocks, unclosed blocks, or mismatched marks.
+        A block starts with "/* MAGIC: mark" and ends with "MAGIC: mark */". The
+        blanks around "/*", ":" and "*/" may not contain a newline, so every
+        marker sits on one line; a "/*" on the line above does not open a block.
+        A marker that is both, "/* MAGIC: mark */", is a block of its own.
+        Exits with an error if there are nested blocks, unclosed blocks, or mismatched marks.
         """
-        # Find all possible start and end markers to validate the structure
-        start_pattern = re.compile(rf"/\*\s*{MAGIC_STRING}\s*:\s*(\w+)")
-        end_pattern = re.compile(rf"{MAGIC_STRING}\s*:\s*(\w+)\s*\*/")
-
-        # Validate block structure
-        lines = file_content.splitlines()
-        starts = []
-        ends = []
-
-        # Track line numbers for better error messages
-        for i, line in enumerate(lines):
-            line_number = i + 1
-            for m in start_pattern.finditer(line):
-                starts.append((m.group(1), m.start(), line_number))
-            for m in end_pattern.finditer(line):
-                ends.append((m.group(1), m.end(), line_number))
-
-        # Check for block nesting or unclosed blocks
-        if len(starts) != len(ends):
-            if len(starts) > len(ends):
-                # Find the unclosed block(s)
-                unclosed = [
-                    f"'{mark}' (started on line {line})"
-                    for mark, _, line in starts
-                    if mark not in [m for m, _, _ in ends]
-                ]
-                unclosed_str = ", ".join(unclosed)
-                output_manager.err("Unclosed_Block", unclosed_str=unclosed_str)
-                sys.exit(1)
-            else:
-                # Find the unopened block(s)
-                unopened = [
-                    f"'{mark}' (ended on line {line})"
-                    for mark, _, line in ends
-                    if mark not in [m for m, _, _ in starts]
-                ]
-                unopened_str = ", ".join(unopened)
-                output_manager.err("Unopened_Block", unopened_str=unopened_str)
-                sys.exit(1)
-
-        # Combine and sort all markers by position in file
-        all_markers = [(mark, pos, line, "start") for mark, pos, line in starts]
-        all_markers.extend([(mark, pos, line, "end") for mark, pos, line in ends])
-        all_markers.sort(
-            key=lambda x: (x[2], x[1])
-        )  # Sort by line number, then position
-
-        # Track open blocks to detect nesting
-        open_blocks = []  # Stack of (mark, line_number) tuples
-        for mark, _, line_num, marker_type in all_markers:
-            if marker_type == "start":
-                # Opening a new block
-                if open_blocks:
-                    # If there's already an open block, this is nested
-                    parent_mark, parent_line = open_blocks[-1]
-                    output_manager.err(
-                        "Nested_Block",
-                        mark=mark,
-                        line_num=line_num,
-                        parent_mark=parent_mark,
-                        parent_line=parent_line,
-                    )
-                    sys.exit(1)
-                open_blocks.append((mark, line_num))
-            else:
-                # Closing a block
-                if not open_blocks:
-                    output_manager.err(
-                        "Not_Matching_Block", mark=mark, line_num=line_num
-                    )
-                    sys.exit(1)
-                last_mark, start_line = open_blocks[-1]
-                if last_mark != mark:
-                    output_manager.err(
-                        "Missmatched_Block",
-                        mark=mark,
-                        line_num=line_num,
-                        last_mark=last_mark,
-                        start_line=start_line,
-                    )
-                    sys.exit(1)
-                open_blocks.pop()
-
-        # Regular expressions for block markers - more flexible patterns
-        block_pattern = re.compile(
-            rf"/\*\s*{MAGIC_STRING}\s*:\s*(\w+)[\s\S]*?{MAGIC_STRING}\s*:\s*\1\s*\*/"
-        )
-
-        # Find all possible blocks, including those with mismatched start/end marks
-        all_blocks = []
-        for match in re.finditer(block_pattern, file_content):
-            all_blocks.append(
-                (match.group(1), match.start(), match.end(), match.group(0))
+        # a single scan over the markers validates the structure and collects
+        # the (start, end, mark) spans of the blocks. Only the first structural
+        # error is kept, since a different number of start and end markers is
+        # reported in preference to it.
+        starts: List[Tuple[str, int]] = []  # (mark, line) of every start
+        ends: List[Tuple[str, int]] = []  # (mark, line) of every end
+        spans: List[Tuple[int, int, str]] = []
+        open_block: Optional[Tuple[str, int, int]] = None  # (mark, line, start)
+        error: Optional[Tuple[str, Dict[str, Any]]] = None
+        line_num = 1
+        scanned = 0
+        for match in MARKER_PATTERN.finditer(file_content):
+            marker_start = match.start()
+            while marker_start > 0 and file_content[marker_start - 1] in BLANKS:
+                marker_start -= 1
+            is_start = marker_start >= 2 and file_content.startswith(
+                "/*", marker_start - 2
+            )
+            is_end = match.group(2) is not None
+            if not (is_start or is_end):
+                continue
+            line_num += file_content.count("\n", scanned, match.start())
+            scanned = match.start()
+            mark = match.group(1)
+            if is_start:
+                starts.append((mark, line_num))
+                if error is None:
+                    if open_block is not None:
+                        error = (
+                            "Nested_Block",
+                            {
+                                "mark": mark,
+                                "line_num": line_num,
+                                "parent_mark": open_block[0],
+                                "parent_line": open_block[1],
+                            },
+                        )
+                    else:
+                        open_block = (mark, line_num, marker_start - 2)
+            if is_end:
+                ends.append((mark, line_num))
+                if error is None:
+                    if open_block is None:
+                        error = (
+                            "Not_Matching_Block",
+                            {"mark": mark, "line_num": line_num},
+                        )
+                    elif open_block[0] != mark:
+                        error = (
+                            "Missmatched_Block",
+                            {
+                                "mark": mark,
+                                "line_num": line_num,
+                                "last_mark": open_block[0],
+                                "start_line": open_block[1],
+                            },
+                        )
+                    else:
+                        spans.append((open_block[2], match.end(2), mark))
+                        open_block = None
+
+        # Check for unclosed or unopened blocks
+        if len(starts) > len(ends):
+            end_marks = {mark for mark, _ in ends}
+            unclosed_str = ", ".join(
+                f"'{mark}' (started on line {line})"
+                for mark, line in starts
+                if mark not in end_marks
             )
+            output_manager.err("Unclosed_Block", unclosed_str=unclosed_str)
+            sys.exit(1)
+        if len(starts) < len(ends):
+            start_marks = {mark for mark, _ in starts}
+            unopened_str = ", ".join(
+                f"'{mark}' (ended on line {line})"
+                for mark, line in ends
+                if mark not in start_marks
+            )
+            output_manager.err("Unopened_Block", unopened_str=unopened_str)
+            sys.exit(1)
+        if error is not None:
+            output_manager.err(error[0], **error[1])
+            sys.exit(1)
 
         # Now that we've validated the structure, extract the blocks
         result = []
         last_end = 0
-
-        # Process blocks in order of appearance
-        for mark, start, end, content in sorted(all_blocks, key=lambda x: x[1]):
+        for start, end, mark in spans:
             # If there's content before this block, add it as a non-marked block
             if start > last_end:
                 non_block = file_content[last_end:start]
                 if non_block.strip():
                     result.append(Block(non_block, None))
 
-            # Add the matched block with its mark
-            result.append(Block(content, mark))
+            # Add the block with its mark
+            result.append(Block(file_content[start:end], mark))
 
             last_end = end
 
@@ -0,0 +1,188 @@
+from typing import List, Optional, Tuple
+import errno
+import hashlib
+import os
+import shutil
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    import fcntl
+except ImportError:  # not available on Windows
+    fcntl = None
+
+# ioctl request of FICLONE on Linux, _IOW(0x94, 9, int)
+FICLONE = 0x40049409
+# bytes requested per copy_file_range/sendfile call
+CHUNK_SIZE = 1 << 30
+
+# "this mechanism does not work for these two files": try the next one
+_FALLBACK_ERRNOS = {
+    errno.EXDEV,
+    errno.ENOSYS,
+    errno.EINVAL,
+    errno.ENOTTY,
+    errno.EOPNOTSUPP,
+    errno.EBADF,
+}
+
+
+class CopyStats:
+    """
+    Files and bytes copied versus skipped because the target was up to date.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        self.copied_files = 0
+        self.copied_bytes = 0
+        self.skipped_files = 0
+        self.skipped_bytes = 0
+
+    def record(self, copied: bool, size: int) -> None:
+        with self._lock:
+            if copied:
+                self.copied_files += 1
+                self.copied_bytes += size
+            else:
+                self.skipped_files += 1
+                self.skipped_bytes += size
+
+
+def _reflink(src_fd: int, dst_fd: int) -> bool:
+    # share the extents of the source (btrfs, XFS, ...)
+    if fcntl is None:
+        return False
+    try:
+        fcntl.ioctl(dst_fd, FICLONE, src_fd)
+        return True
+    except OSError as e:
+        if e.errno in _FALLBACK_ERRNOS:
+            return False
+        raise
+
+
+def _copy_file_range(src_fd: int, dst_fd: int) -> bool:
+    if not hasattr(os, "copy_file_range"):
+        return False
+    copied = 0
+    try:
+        while True:
+            n = os.copy_file_range(src_fd, dst_fd, CHUNK_SIZE)
+            if n == 0:
+                break
+            copied += n
+    except OSError as e:
+        if copied == 0 and e.errno in _FALLBACK_ERRNOS:
+            return False
+        raise
+    # empty files, and files in /proc and the like, copy nothing this way and
+    # are left to the read/write loop
+    return copied > 0
+
+
+def _sendfile(src_fd: int, dst_fd: int) -> bool:
+    if not hasattr(os, "sendfile"):
+        return False
+    offset = 0
+    try:
+        while True:
+            n = os.sendfile(dst_fd, src_fd, offset, CHUNK_SIZE)
+            if n == 0:
+                break
+            offset += n
+    except OSError as e:
+        if offset == 0 and e.errno in _FALLBACK_ERRNOS:
+            return False
+        raise
+    return offset > 0
+
+
+def _read_write(src_fd: int, dst_fd: int) -> None:
+    while True:
+        chunk = os.read(src_fd, 1 << 20)
+        if not chunk:
+            break
+        view = memoryview(chunk)
+        while view:
+            view = view[os.write(dst_fd, view) :]
+
+
+def _hash_file(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def is_unchanged(
+    src: str, dst: str, src_stat: os.stat_result, verify_hash: bool = False
+) -> bool:
+    # copies keep the mtime of their source, so equal size and mtime_ns are
+    # taken to mean equal contents unless verify_hash asks to compare them
+    try:
+        dst_stat = os.stat(dst)
+    except OSError:
+        return False
+    if (dst_stat.st_size, dst_stat.st_mtime_ns) != (
+        src_stat.st_size,
+        src_stat.st_mtime_ns,
+    ):
+        return False
+    return not verify_hash or _hash_file(src) == _hash_file(dst)
+
+
+def copy_file(
+    src: str, dst: str, skip_unchanged: bool = True, verify_hash: bool = False
+) -> bool:
+    # copy2 with the data reflinked if possible, else copied by
+    # copy_file_range, sendfile or a read/write loop, in that order; returns
+    # whether the file was copied rather than skipped as up to date
+    src_stat = os.stat(src)
+    if skip_unchanged and is_unchanged(src, dst, src_stat, verify_hash):
+        copy_stats.record(False, src_stat.st_size)
+        return False
+    try:
+        dst_stat = os.stat(dst)
+        if (dst_stat.st_dev, dst_stat.st_ino) == (src_stat.st_dev, src_stat.st_ino):
+            raise shutil.SameFileError(f"{src!r} and {dst!r} are the same file")
+    except FileNotFoundError:
+        pass
+    with open(src, "rb") as fsrc, open(dst, "wb") as fdst:
+        src_fd, dst_fd = fsrc.fileno(), fdst.fileno()
+        if not (
+            _reflink(src_fd, dst_fd)
+            or _copy_file_range(src_fd, dst_fd)
+            or _sendfile(src_fd, dst_fd)
+        ):
+            _read_write(src_fd, dst_fd)
+    shutil.copystat(src, dst)
+    copy_stats.record(True, src_stat.st_size)
+    return True
+
+
+def copy_files(
+    pairs: List[Tuple[str, str]], jobs: int, verify_hash: bool = False
+) -> List[Tuple[str, OSError]]:
+    # copy (source, target) pairs into existing directories on up to jobs
+    # threads; failures are returned per source instead of stopping the rest
+    def copy(pair: Tuple[str, str]) -> Optional[Tuple[str, OSError]]:
+        try:
+            copy_file(pair[0], pair[1], verify_hash=verify_hash)
+        except OSError as e:
+            return pair[0], e
+        return None
+
+    if jobs <= 1 or len(pairs) <= 1:
+        results = [copy(pair) for pair in pairs]
+    else:
+        with ThreadPoolExecutor(max_workers=jobs) as pool:
+            results = list(pool.map(copy, pairs))
+    return [result for result in results if result is not None]
+
+
+copy_stats = CopyStats()
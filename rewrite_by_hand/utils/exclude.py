@@ -0,0 +1,138 @@
+from typing import Dict, List, Pattern, Set, Tuple
+import json
+import os
+import re
+import sys
+
+from rewrite_by_hand.data.variables import REPO_EXCLUDE_PATH
+from rewrite_by_hand.cli.output import output_manager
+
+
+_GLOB_CHARS = set("*?[\\")
+
+
+def _translate(pattern: str, anchored: bool) -> str:
+    out = []
+    i = 0
+    n = len(pattern)
+    while i < n:
+        c = pattern[i]
+        if c == "*":
+            if pattern.startswith("**/", i):
+                out.append("(?:.*/)?")
+                i += 3
+                continue
+            if pattern.startswith("**", i):
+                out.append(".*")
+                i += 2
+                continue
+            out.append("[^/]*")
+        elif c == "?":
+            out.append("[^/]")
+        elif c == "[":
+            j = pattern.find("]", i + 1)
+            if j == -1:
+                out.append("\\[")
+            else:
+                chars = pattern[i + 1 : j].replace("\\", "\\\\")
+                if chars.startswith("!"):
+                    chars = "^" + chars[1:]
+                out.append(f"[{chars}]")
+                i = j
+        elif c == "\\" and i + 1 < n:
+            i += 1
+            out.append(re.escape(pattern[i]))
+        else:
+            out.append(re.escape(c))
+        i += 1
+    prefix = "" if anchored else "(?:.*/)?"
+    return prefix + "".join(out) + r"\Z"
+
+
+class ExcludeMatcher:
+    """
+    Gitignore-style patterns compiled once, matched against Path.relative_path.
+    A pattern without '/' matches a name at any depth, one with '/' is anchored
+    at USERPATH/SYSTEMPATH, a trailing '/' only matches directories and a
+    leading '!' re-includes. The last matching pattern wins.
+    """
+
+    def __init__(self, patterns: List[str]):
+        self.rules: List[Tuple[Pattern[str], bool, bool]] = []
+        self.has_negation = False
+        # without negation, plain names are set lookups and the rest is one regex
+        self.names: Set[str] = set()
+        self.dir_names: Set[str] = set()
+        any_regexes: List[str] = []
+        dir_regexes: List[str] = []
+        for raw in patterns:
+            line = raw.strip()
+            if not line or line.startswith("#"):
+                continue
+            negate = line.startswith("!")
+            if negate:
+                line = line[1:]
+                self.has_negation = True
+            dir_only = line.endswith("/")
+            line = line.rstrip("/")
+            if not line:
+                continue
+            anchored = "/" in line
+            line = line.lstrip("/")
+            regex = _translate(line, anchored)
+            self.rules.append((re.compile(regex), negate, dir_only))
+            if not anchored and not _GLOB_CHARS.intersection(line):
+                (self.dir_names if dir_only else self.names).add(line)
+            else:
+                (dir_regexes if dir_only else any_regexes).append(regex)
+        self.any_regex = re.compile("|".join(any_regexes)) if any_regexes else None
+        self.dir_regex = re.compile("|".join(dir_regexes)) if dir_regexes else None
+
+    def __bool__(self) -> bool:
+        return bool(self.rules)
+
+    def is_excluded(self, relative_path: str, is_dir: bool) -> bool:
+        if self.has_negation:
+            for regex, negate, dir_only in reversed(self.rules):
+                if dir_only and not is_dir:
+                    continue
+                if regex.match(relative_path):
+                    return not negate
+            return False
+        name = relative_path.rsplit("/", 1)[-1]
+        if name in self.names or (is_dir and name in self.dir_names):
+            return True
+        if self.any_regex is not None and self.any_regex.match(relative_path):
+            return True
+        if is_dir and self.dir_regex is not None and self.dir_regex.match(relative_path):
+            return True
+        return False
+
+
+class ExcludeManager:
+    def __init__(self):
+        self.rules: Dict | None = None
+        self.matchers: Dict[str, ExcludeMatcher] = {}
+
+    def _load(self) -> Dict:
+        if self.rules is None:
+            self.rules = {"global": [], "software": {}}
+            if os.path.exists(REPO_EXCLUDE_PATH):
+                try:
+                    with open(REPO_EXCLUDE_PATH, "r") as exclude_file:
+                        self.rules.update(json.load(exclude_file))
+                except (OSError, json.JSONDecodeError):
+                    output_manager.err("Can_Not_Load_Exclude")
+                    sys.exit(1)
+        return self.rules
+
+    def matcher_for(self, owner: str) -> ExcludeMatcher:
+        if owner not in self.matchers:
+            rules = self._load()
+            patterns = list(rules.get("global", []))
+            patterns.extend(rules.get("software", {}).get(owner, []))
+            self.matchers[owner] = ExcludeMatcher(patterns)
+        return self.matchers[owner]
+
+
+exclude_manager = ExcludeManager()
@@ -1,4 +1,5 @@
-from typing import List, Dict, Tuple, Union
+from typing import List, Dict, Optional, Set, Tuple, Union
+import bisect
 import os
 import json
 import sys
@@ -7,6 +8,7 @@ from typing_extensions import Literal
 from rewrite_by_hand.utils.hook import Hooker
 from rewrite_by_hand.data.variables import USERPATH, SYSTEMPATH
 from rewrite_by_hand.utils.fs_type import Path, File, Dir, Owner
+from rewrite_by_hand.utils.exclude import exclude_manager
 from rewrite_by_hand.cli.output import output_manager
 
 
@@ -18,13 +20,28 @@ def merge_two_trees_dir(source: Dir, target: Dir) -> None:
     for part in source_parts[len(target_parts) : -1]:
         if part not in current_dir.subdirs:
             current_dir.subdirs[part] = Dir(
-                Path(os.path.join(current_dir.path.path, part)), auto_fill=False
+                Path.child(current_dir.path, part), auto_fill=False
             )
         current_dir = current_dir.subdirs[part]
 
     current_dir.subdirs[source.name] = source
 
 
+def merge_two_trees_file(source: File, target: Dir) -> None:
+    target_parts = target.path.cut_path
+    source_parts = source.path.cut_path
+
+    current_dir = target
+    for part in source_parts[len(target_parts) : -1]:
+        if part not in current_dir.subdirs:
+            current_dir.subdirs[part] = Dir(
+                Path.child(current_dir.path, part), auto_fill=False
+            )
+        current_dir = current_dir.subdirs[part]
+
+    current_dir.files[source.name] = source
+
+
 def add_file_to_dir(source: File, target: Dir, local: bool = False) -> None:
     target_parts = target.path.cut_path
     source_parts = source.path.cut_path
@@ -33,7 +50,7 @@ def add_file_to_dir(source: File, target: Dir, local: bool = False) -> None:
     for part in source_parts[len(target_parts) : -1]:
         if part not in current_dir.subdirs:
             current_dir.subdirs[part] = Dir(
-                Path(os.path.join(current_dir.path.path, part)), auto_fill=False
+                Path.child(current_dir.path, part), auto_fill=False
             )
         current_dir = current_dir.subdirs[part]
     if source.name in current_dir.files:
@@ -45,6 +62,53 @@ def add_file_to_dir(source: File, target: Dir, local: bool = False) -> None:
     current_dir.files[source.name] = source
 
 
+class TopIndex:
+    # the top trees of one forest keyed by cut_path, with the keys also kept
+    # sorted: a proper ancestor is found with one dict probe per shorter
+    # prefix, and the descendants of a path are the keys right after it, so
+    # both cost O(log n + k) rather than a scan of the forest. Comparing
+    # tuples of parts also keeps /etc/key from matching /etc/keyd.
+    def __init__(self) -> None:
+        self.keys: List[Tuple[str, ...]] = []
+        self.tops: Dict[Tuple[str, ...], Tuple[Union[Dir, File], Owner]] = {}
+
+    def insert(self, node: Union[Dir, File], owner: Owner) -> None:
+        key = node.path.cut_path
+        if key not in self.tops:
+            bisect.insort(self.keys, key)
+        self.tops[key] = (node, owner)
+
+    def remove(self, node: Union[Dir, File]) -> None:
+        key = node.path.cut_path
+        if self.tops.pop(key, None) is not None:
+            del self.keys[bisect.bisect_left(self.keys, key)]
+
+    def get(self, key: Tuple[str, ...]) -> Optional[Tuple[Union[Dir, File], Owner]]:
+        return self.tops.get(key)
+
+    def ancestor(
+        self, key: Tuple[str, ...]
+    ) -> Optional[Tuple[Union[Dir, File], Owner]]:
+        # top trees never nest, so the first proper prefix found is the only one
+        for length in range(len(key) - 1, 0, -1):
+            top = self.tops.get(key[:length])
+            if top is not None:
+                return top
+        return None
+
+    def descendants(
+        self, key: Tuple[str, ...]
+    ) -> List[Tuple[Union[Dir, File], Owner]]:
+        found = []
+        length = len(key)
+        for i in range(bisect.bisect_right(self.keys, key), len(self.keys)):
+            candidate = self.keys[i]
+            if candidate[:length] != key:
+                break
+            found.append(self.tops[candidate])
+        return found
+
+
 class FileSystem:
     def __init__(self, if_hook: bool = False, local: bool = False) -> None:
         self.forest: Tuple[
@@ -57,188 +121,272 @@ class FileSystem:
                 List[Tuple[File, Owner]],
             ],
         ] = (([], []), ([], []))
+        # top trees of each forest by cut_path, for ancestor and descendant
+        # lookups that respect component boundaries
+        self.top_index: Tuple[TopIndex, TopIndex] = (TopIndex(), TopIndex())
+        # owner -> {path: top tree}, so software-level operations do not
+        # have to scan every top tree of both forests
+        self.owner_index: Dict[Owner, Dict[str, Union[Dir, File]]] = {}
+        # owners whose top trees changed since loading, so a sharded config
+        # only rewrites their shards; None means every shard must be written
+        self.dirty_owners: Optional[Set[Owner]] = None
         self.local = local
         self.if_hook = if_hook
         if if_hook:
             self.hooker = Hooker()
 
+    def _mark_dirty(self, owner: Owner) -> None:
+        if self.dirty_owners is not None:
+            self.dirty_owners.add(owner)
+
+    def _index_top(self, node: Union[Dir, File], owner: Owner) -> None:
+        self.top_index[node.path.type.value].insert(node, owner)
+        self.owner_index.setdefault(owner, {})[node.path.path] = node
+        self._mark_dirty(owner)
+
+    def _unindex_top(self, node: Union[Dir, File], owner: Owner) -> None:
+        self.top_index[node.path.type.value].remove(node)
+        self._mark_dirty(owner)
+        tops = self.owner_index.get(owner)
+        if tops is None:
+            return
+        tops.pop(node.path.path, None)
+        if not tops:
+            del self.owner_index[owner]
+
+    def _already_exists(self, path: Path) -> None:
+        if self.local:
+            output_manager.err("File_Already_Managed", path=path.path)
+        else:
+            output_manager.err("File_Already_Exists", path=path.path)
+        sys.exit(1)
+
     def add(self, path_str: str, owner: Owner, if_hook: bool = True) -> None:
         new_path = Path(path_str)
-        isdir = new_path.is_dir
-        if isdir:
-            new_node = Dir(new_path)
+        index = self.top_index[new_path.type.value]
+        if index.get(new_path.cut_path) is not None:
+            self._already_exists(new_path)
+        ancestor = index.ancestor(new_path.cut_path)
+        if ancestor is not None and not isinstance(ancestor[0], Dir):
+            ancestor = None
+        if new_path.is_dir:
+            exclude = exclude_manager.matcher_for(owner)
+            new_node = Dir(new_path, exclude=exclude)
+            if ancestor is not None:
+                existing_top_tree, existing_owner = ancestor
+                if existing_owner != owner:
+                    output_manager.err(
+                        "Super_Dir_With_Differnet_Owner",
+                        path=new_path.path,
+                        owner=existing_owner,
+                    )
+                    sys.exit(1)
+                merge_two_trees_dir(new_node, existing_top_tree)
+                self._mark_dirty(owner)
+                if self.if_hook and if_hook:
+                    self.hooker.add_dir(new_node.path, [], exclude)
+                return
             dir_wait_for_merge_to: List[Tuple[Dir, Owner]] = []
             file_wait_for_merge_to: List[Tuple[File, Owner]] = []
-            for existing_top_dir in self.forest[new_path.type.value][0]:
-                existing_top_tree = existing_top_dir[0]
-                existing_owner = existing_top_dir[1]
-                if new_node.path == existing_top_tree.path:
-                    if self.local:
-                        output_manager.err("File_Already_Managed", path=new_path.path)
-                    else:
-                        output_manager.err("File_Already_Exists", path=new_path.path)
+            for existing_top in index.descendants(new_path.cut_path):
+                existing_top_tree, existing_owner = existing_top
+                isdir = isinstance(existing_top_tree, Dir)
+                if existing_owner != owner:
+                    output_manager.err(
+                        "Sub_Dir_With_Different_Owner"
+                        if isdir
+                        else "Sub_File_With_Different_Owner",
+                        path=new_path.path,
+                        owner=existing_owner,
+                    )
                     sys.exit(1)
-                if new_node.is_proper_subtree_of(existing_top_tree.path):
-                    if existing_owner == owner:
-                        merge_two_trees_dir(new_node, existing_top_tree)
-                        if self.if_hook and if_hook:
-                            self.hooker.add_dir(new_node.path, [])
-                        return
-                    else:
-                        output_manager.err(
-                            "Super_Dir_With_Differnet_Owner",
-                            path=new_path.path,
-                            owner=existing_owner,
-                        )
-                        sys.exit(1)
-                if existing_top_tree.is_proper_subtree_of(new_node.path):
-                    if existing_owner == owner:
-                        dir_wait_for_merge_to.append(existing_top_dir)
-                    else:
-                        output_manager.err(
-                            "Sub_Dir_With_Different_Owner",
-                            path=new_path.path,
-                            owner=existing_owner,
-                        )
-                        sys.exit(1)
-            for existing_top_file in self.forest[new_path.type.value][1]:
-                existing_top_tree = existing_top_file[0]
-                existing_owner = existing_top_file[1]
-                if existing_top_tree.is_proper_subtree_of(new_node.path):
-                    if existing_owner == owner:
-                        file_wait_for_merge_to.append(existing_top_file)
-                    else:
-                        output_manager.err(
-                            "Sub_File_With_Different_Owner",
-                            path=new_path.path,
-                            owner=existing_owner,
-                        )
-                        sys.exit(1)
+                if isdir:
+                    dir_wait_for_merge_to.append(existing_top)
+                else:
+                    file_wait_for_merge_to.append(existing_top)
             for existing_top_tree in dir_wait_for_merge_to:
                 merge_two_trees_dir(existing_top_tree[0], new_node)
-            # do not need to merge file trees, because they are already there
-            # for existing_top_tree in file_wait_for_merge_to:
-            #     merge_two_trees_file(existing_top_tree[0], new_node)
+            # the scan may have skipped an excluded top file, keep it managed
+            for existing_top_tree in file_wait_for_merge_to:
+                merge_two_trees_file(existing_top_tree[0], new_node)
             # remove the existing top trees after merging to make add atomic
             for existing_top_tree in dir_wait_for_merge_to:
                 self.forest[new_path.type.value][0].remove(existing_top_tree)
+                self._unindex_top(*existing_top_tree)
             for existing_top_tree in file_wait_for_merge_to:
                 self.forest[new_path.type.value][1].remove(existing_top_tree)
+                self._unindex_top(*existing_top_tree)
             self.forest[new_path.type.value][0].append((new_node, owner))
+            self._index_top(new_node, owner)
             if self.if_hook and if_hook:
                 self.hooker.add_dir(
-                    new_node.path, [dir[0] for dir in dir_wait_for_merge_to]
+                    new_node.path, [dir[0] for dir in dir_wait_for_merge_to], exclude
                 )
         else:
             new_node = File(new_path)
-            for existing_top_file in self.forest[new_path.type.value][1]:
-                existing_top_tree = existing_top_file[0]
-                existing_owner = existing_top_file[1]
-                if new_node.path == existing_top_tree.path:
-                    if self.local:
-                        output_manager.err("File_Already_Managed", path=new_path.path)
-                    else:
-                        output_manager.err("File_Already_Exists", path=new_path.path)
+            if ancestor is not None:
+                existing_top_tree, existing_owner = ancestor
+                if existing_owner != owner:
+                    output_manager.err(
+                        "Super_Dir_With_Differnet_Owner",
+                        path=new_path.path,
+                        owner=existing_owner,
+                    )
                     sys.exit(1)
-            for existing_top_dir in self.forest[new_path.type.value][0]:
-                existing_top_tree = existing_top_dir[0]
-                existing_owner = existing_top_dir[1]
-                if new_node.is_proper_subtree_of(existing_top_tree.path):
-                    if existing_owner == owner:
-                        add_file_to_dir(new_node, existing_top_tree, local=self.local)
-                        if self.if_hook and if_hook:
-                            self.hooker.add_file(new_node.path)
-                        return
-                    else:
-                        output_manager.err(
-                            "Super_Dir_With_Differnet_Owner",
-                            path=new_path.path,
-                            owner=existing_owner,
-                        )
-                        sys.exit(1)
+                add_file_to_dir(new_node, existing_top_tree, local=self.local)
+                self._mark_dirty(owner)
+                if self.if_hook and if_hook:
+                    self.hooker.add_file(new_node.path)
+                return
             self.forest[new_path.type.value][1].append((new_node, owner))
+            self._index_top(new_node, owner)
             if self.if_hook and if_hook:
                 self.hooker.add_file(new_node.path)
 
+    def add_many(
+        self, paths_with_owners: List[Tuple[str, Owner]], if_hook: bool = True
+    ) -> None:
+        # sort so every directory comes before everything below it, then drop
+        # the entries an enclosing directory of the batch already covers
+        entries = sorted(
+            ((Path(path_str), owner) for path_str, owner in paths_with_owners),
+            key=lambda entry: (entry[0].type.value, entry[0].cut_path),
+        )
+        planned: List[Tuple[str, Owner]] = []
+        enclosing: List[Tuple[Path, Owner]] = []
+        previous = None
+        for path, owner in entries:
+            if previous is not None and previous == path:
+                if self.local:
+                    output_manager.err("File_Already_Managed", path=path.path)
+                else:
+                    output_manager.err("File_Already_Exists", path=path.path)
+                sys.exit(1)
+            previous = path
+            while enclosing and not (
+                enclosing[-1][0].type == path.type
+                and path.is_proper_subtree_of(enclosing[-1][0])
+            ):
+                enclosing.pop()
+            if enclosing:
+                if enclosing[-1][1] != owner:
+                    output_manager.err(
+                        "Super_Dir_With_Differnet_Owner",
+                        path=path.path,
+                        owner=enclosing[-1][1],
+                    )
+                    sys.exit(1)
+                continue
+            planned.append((path.path, owner))
+            if path.is_dir:
+                enclosing.append((path, owner))
+        for path_str, owner in planned:
+            self.add(path_str, owner, if_hook)
+
     def remove(self, path_str: str, if_hook: bool = True) -> None:
         target_path = Path(path_str)
-        isdir = target_path.is_dir
-        if isdir:
-            for existing_top_dir in self.forest[target_path.type.value][0]:
-                existing_top_tree = existing_top_dir[0]
-                if existing_top_tree.path == target_path:
-                    self.forest[target_path.type.value][0].remove(existing_top_dir)
-                    if self.if_hook and if_hook:
-                        self.hooker.remove_top(target_path)
-                    return
-                if target_path.path.startswith(existing_top_tree.path.path):
-                    parent = self._find_parent_dir(
-                        existing_top_tree, target_path, local=self.local
-                    )
-                    name = target_path.name
-                    self._remove_from_parent(parent, name, isdir, local=self.local)
-                    if self.if_hook and if_hook:
-                        self.hooker.remove(target_path)
-                    return
-            output_manager.err("Path_Not_Found", path=target_path.path)
-            sys.exit(1)
+        index = self.top_index[target_path.type.value]
+        kind = 0 if target_path.is_dir else 1
+        top = index.get(target_path.cut_path)
+        if top is not None and isinstance(top[0], Dir) == target_path.is_dir:
+            self.forest[target_path.type.value][kind].remove(top)
+            self._unindex_top(*top)
+            if self.if_hook and if_hook:
+                self.hooker.remove_top(target_path)
+            return
+        ancestor = index.ancestor(target_path.cut_path)
+        if ancestor is not None and isinstance(ancestor[0], Dir):
+            parent = self._find_parent_dir(
+                ancestor[0], target_path, local=self.local
+            )
+            name = target_path.name
+            self._remove_from_parent(
+                parent, name, target_path.is_dir, local=self.local
+            )
+            self._mark_dirty(ancestor[1])
+            if self.if_hook and if_hook:
+                self.hooker.remove(target_path)
+            return
+        if self.local and not target_path.is_dir:
+            output_manager.err(
+                "Path_Does_Not_Contain_Local_Config", path=target_path.path
+            )
         else:
-            for existing_top_file in self.forest[target_path.type.value][1]:
-                existing_top_tree = existing_top_file[0]
-                if existing_top_tree.path == target_path:
-                    self.forest[target_path.type.value][1].remove(existing_top_file)
-                    if self.if_hook and if_hook:
-                        self.hooker.remove_top(target_path)
-                    return
-            for existing_top_tree, _ in self.forest[target_path.type.value][0]:
-                if target_path.path.startswith(existing_top_tree.path.path):
-                    parent = self._find_parent_dir(
-                        existing_top_tree, target_path, local=self.local
-                    )
-                    name = target_path.name
-                    self._remove_from_parent(parent, name, isdir, local=self.local)
-                    if self.if_hook and if_hook:
-                        self.hooker.remove(target_path)
-                    return
-            if self.local:
-                output_manager.err(
-                    "Path_Does_Not_Contain_Local_Config", path=target_path.path
-                )
-            else:
-                output_manager.err("Path_Not_Found", path=target_path.path)
-            sys.exit(1)
+            output_manager.err("Path_Not_Found", path=target_path.path)
+        sys.exit(1)
 
     def if_exists(
         self, path_str: str
     ) -> Union[Tuple[Literal[True], Owner], Tuple[Literal[False], None]]:
         path = Path(path_str)
-        isdir = path.is_dir
-        if isdir:
-            for existing_top_tree, owner in self.forest[path.type.value][0]:
-                if existing_top_tree.path == path:
-                    return True, owner
-                if path.path.startswith(existing_top_tree.path.path):
-                    current = existing_top_tree
-                    for part in path.cut_path[len(current.path.cut_path) :]:
-                        if part not in current.subdirs:
-                            return False, None
-                        current = current.subdirs[part]
-                    return True, owner
+        index = self.top_index[path.type.value]
+        top = index.get(path.cut_path)
+        if top is not None:
+            if isinstance(top[0], Dir) == path.is_dir:
+                return True, top[1]
             return False, None
-        else:
-            for existing_top_tree, owner in self.forest[path.type.value][1]:
-                if existing_top_tree.path == path:
-                    return True, owner
-            for existing_top_tree, owner in self.forest[path.type.value][0]:
-                if path.path.startswith(existing_top_tree.path.path):
-                    current = existing_top_tree
-                    for part in path.cut_path[len(current.path.cut_path) : -1]:
-                        if part not in current.subdirs:
-                            return False, None
-                        current = current.subdirs[part]
-                    if path.name in current.files:
-                        return True, owner
+        ancestor = index.ancestor(path.cut_path)
+        if ancestor is None or not isinstance(ancestor[0], Dir):
             return False, None
+        current, owner = ancestor
+        for part in path.cut_path[len(current.path.cut_path) : -1]:
+            if part not in current.subdirs:
+                return False, None
+            current = current.subdirs[part]
+        if path.is_dir:
+            return (True, owner) if path.name in current.subdirs else (False, None)
+        return (True, owner) if path.name in current.files else (False, None)
+
+    def if_exists_many(
+        self, path_strs: List[str]
+    ) -> Dict[str, Union[Tuple[Literal[True], Owner], Tuple[Literal[False], None]]]:
+        # answers if_exists for every path in one pass per forest: queries are
+        # sorted by cut_path and merged against the sorted top keys, and the
+        # directories walked below a top tree are reused by later queries
+        results: Dict[
+            str, Union[Tuple[Literal[True], Owner], Tuple[Literal[False], None]]
+        ] = {}
+        queries: Tuple[List[Tuple[Path, str]], List[Tuple[Path, str]]] = ([], [])
+        for path_str in path_strs:
+            path = Path(path_str)
+            queries[path.type.value].append((path, path_str))
+        for index, forest_queries in zip(self.top_index, queries):
+            forest_queries.sort(key=lambda query: query[0].cut_path)
+            keys = index.keys
+            i = -1
+            walked: Dict[Tuple[str, ...], Dir] = {}
+            for path, path_str in forest_queries:
+                key = path.cut_path
+                # the last top key <= key is the only one that can contain it
+                while i + 1 < len(keys) and keys[i + 1] <= key:
+                    i += 1
+                    walked = {}
+                results[path_str] = False, None
+                if i < 0:
+                    continue
+                top_key = keys[i]
+                top, owner = index.tops[top_key]
+                if top_key == key:
+                    if isinstance(top, Dir) == path.is_dir:
+                        results[path_str] = True, owner
+                    continue
+                if key[: len(top_key)] != top_key or not isinstance(top, Dir):
+                    continue
+                parent_key = key[:-1]
+                current = walked.get(parent_key)
+                if current is None:
+                    current = top
+                    for depth in range(len(top_key), len(parent_key)):
+                        current = current.subdirs.get(key[depth])
+                        if current is None:
+                            break
+                    if current is None:
+                        continue
+                    walked[parent_key] = current
+                entries = current.subdirs if path.is_dir else current.files
+                if path.name in entries:
+                    results[path_str] = True, owner
+        return results
 
     def _find_parent_dir(self, root: Dir, target: Path, local: bool = False) -> Dir:
         current = root
@@ -284,70 +432,87 @@ class FileSystem:
         name = node.path.relative_path if full_path else node.name
         return {"name": name, "blocks": node.blocks}
 
-    def to_json(self) -> str:
-        dict_ = {
-            "USER": {
-                "top_dirs": [
-                    {"tree": self._serialize_node_dir(node[0], True), "owner": node[1]}
-                    for node in self.forest[0][0]
-                ],
-                "top_files": [
-                    {"tree": self._serialize_node_file(node[0], True), "owner": node[1]}
-                    for node in self.forest[0][1]
-                ],
-            },
-            "SYSTEM": {
+    def to_dict(self, owners: Optional[Set[Owner]] = None) -> Dict:
+        # with owners given, only their top trees are serialized
+        def keep(owner: Owner) -> bool:
+            return owners is None or owner in owners
+
+        return {
+            forest_name: {
                 "top_dirs": [
                     {"tree": self._serialize_node_dir(node[0], True), "owner": node[1]}
-                    for node in self.forest[1][0]
+                    for node in self.forest[forest][0]
+                    if keep(node[1])
                 ],
                 "top_files": [
                     {"tree": self._serialize_node_file(node[0], True), "owner": node[1]}
-                    for node in self.forest[1][1]
+                    for node in self.forest[forest][1]
+                    if keep(node[1])
                 ],
-            },
+            }
+            for forest, forest_name in enumerate(("USER", "SYSTEM"))
         }
-        return json.dumps(dict_, indent=2)
+
+    def to_json(self) -> str:
+        return json.dumps(self.to_dict(), indent=2)
 
     @staticmethod
-    def _deserialize_dir_node(data: Dict, parent_path: str = "") -> Dir:
-        full_path = os.path.join(parent_path, data["name"])
-        path = Path(full_path)
+    def _deserialize_dir_node(
+        data: Dict, parent_path: str = "", parent: Optional[Path] = None
+    ) -> Dir:
+        if parent is None:
+            path = Path(os.path.join(parent_path, data["name"]))
+        else:
+            path = Path.child(parent, data["name"])
 
         node = Dir(path, False)
         for subdir in data.get("subdirs", []):
-            child = FileSystem._deserialize_dir_node(subdir, full_path)
+            child = FileSystem._deserialize_dir_node(subdir, parent=path)
             node.subdirs[child.name] = child
         for file in data.get("files", []):
-            child = FileSystem._deserialize_file_node(file, full_path)
+            child = FileSystem._deserialize_file_node(file, parent=path)
             node.files[child.name] = child
         return node
 
     @staticmethod
-    def _deserialize_file_node(data: Dict, parent_path: str = "") -> File:
-        full_path = os.path.join(parent_path, data["name"])
-        path = Path(full_path)
+    def _deserialize_file_node(
+        data: Dict, parent_path: str = "", parent: Optional[Path] = None
+    ) -> File:
+        if parent is None:
+            path = Path(os.path.join(parent_path, data["name"]))
+        else:
+            path = Path.child(parent, data["name"])
         return File(path, data["blocks"])
 
     @classmethod
     def from_json(
         cls, json_str: str, if_hook: bool = False, local: bool = False
+    ) -> "FileSystem":
+        return cls.from_dict(json.loads(json_str), if_hook=if_hook, local=local)
+
+    @classmethod
+    def from_dict(
+        cls, data: Dict, if_hook: bool = False, local: bool = False
     ) -> "FileSystem":
         fs = FileSystem(if_hook=if_hook, local=local)
         fs.forest = (([], []), ([], []))
-        data = json.loads(json_str)
         for top_dir in data["USER"].get("top_dirs", []):
             node = cls._deserialize_dir_node(top_dir["tree"], USERPATH)
             fs.forest[0][0].append((node, top_dir["owner"]))
+            fs._index_top(node, top_dir["owner"])
         for top_file in data["USER"].get("top_files", []):
             node = cls._deserialize_file_node(top_file["tree"], USERPATH)
             fs.forest[0][1].append((node, top_file["owner"]))
+            fs._index_top(node, top_file["owner"])
         for top_dir in data["SYSTEM"].get("top_dirs", []):
             node = cls._deserialize_dir_node(top_dir["tree"], SYSTEMPATH)
             fs.forest[1][0].append((node, top_dir["owner"]))
+            fs._index_top(node, top_dir["owner"])
         for top_file in data["SYSTEM"].get("top_files", []):
             node = cls._deserialize_file_node(top_file["tree"], SYSTEMPATH)
             fs.forest[1][1].append((node, top_file["owner"]))
+            fs._index_top(node, top_file["owner"])
+        fs.dirty_owners = set()
         return fs
 
     def __repr__(self) -> str:
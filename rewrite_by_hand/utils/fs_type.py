@@ -1,10 +1,18 @@
-from typing import List, Dict, TypeAlias, Optional
+from typing import List, Dict, TypeAlias, Optional, Tuple
 import os
+import stat
 import sys
+from concurrent.futures import ThreadPoolExecutor
 from enum import Enum
 
 from rewrite_by_hand.data.variables import USERPATH, SYSTEMPATH, REPOPATH
 from rewrite_by_hand.cli.output import output_manager
+from rewrite_by_hand.utils.exclude import ExcludeMatcher
+from rewrite_by_hand.utils.scan_cache import scan_cache
+
+
+# upper bound on threads listing directories in parallel in Dir.materialize
+SCAN_WORKERS = min(32, (os.cpu_count() or 1) + 4)
 
 
 class FileType(Enum):
@@ -15,39 +23,160 @@ class FileType(Enum):
 Owner: TypeAlias = str
 
 
+class SyscallCounter:
+    # counts the stat calls made by Path, so benchmarks can assert how many
+    # syscalls an operation such as FileSystem.add or if_exists costs
+    def __init__(self) -> None:
+        self.count = 0
+
+    def reset(self) -> None:
+        self.count = 0
+
+
+syscall_counter = SyscallCounter()
+
+
+def _list_directory(path: str) -> Optional[List[Tuple[str, bool]]]:
+    # None tells Dir.materialize the directory could not be read
+    try:
+        return scan_cache.list_directory(path)
+    except PermissionError:
+        return None
+
+
+def _stat_path(path: str) -> Optional[os.stat_result]:
+    # one lstat per path; symlinks are followed with a second stat so a path
+    # exists and is a directory exactly when os.path.exists/isdir would say so
+    syscall_counter.count += 1
+    try:
+        st = os.lstat(path)
+    except OSError:
+        return None
+    if stat.S_ISLNK(st.st_mode):
+        syscall_counter.count += 1
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+    return st
+
+
 class Path:
-    def __init__(self, path: str):
-        self.path = os.path.abspath(os.path.expanduser(path))
-        if not os.path.exists(self.path):
-            output_manager.err("Path_Not_Exist", path=path)
-            sys.exit(1)
-        if REPOPATH.startswith(self.path):
+    # Paths are interned: Path(p) returns the one shared instance for the
+    # absolute path p, so repeated lookups of a location reuse its stat and
+    # parts. Instances are immutable and live for the whole command; the only
+    # files a command deletes are in the repo, whose paths are not interned
+    # apart from its two roots.
+    __slots__ = (
+        "path",
+        "stat_result",
+        "file_id",
+        "type",
+        "relative_path",
+        "is_dir",
+        "cut_path",
+        "name",
+        "_hash",
+    )
+    _interned: Dict[str, "Path"] = {}
+
+    path: str
+    stat_result: os.stat_result
+    file_id: Tuple[int, int]
+    type: FileType
+    relative_path: str
+    is_dir: bool
+    cut_path: Tuple[str, ...]
+    name: str
+
+    def __new__(cls, path: str) -> "Path":
+        abs_path = os.path.abspath(os.path.expanduser(path))
+        interned = cls._interned.get(abs_path)
+        if interned is not None:
+            return interned
+        if REPOPATH.startswith(abs_path):
             output_manager.err("Use_Path_Contain_REPOPATH", REPOPATH=REPOPATH)
             sys.exit(1)
-        self.type = FileType.USER if self.path.startswith(USERPATH) else FileType.SYSTEM
-        self.relative_path = (
-            os.path.relpath(self.path, USERPATH)
-            if self.type == FileType.USER
-            else os.path.relpath(self.path, SYSTEMPATH)
+        type_ = FileType.USER if abs_path.startswith(USERPATH) else FileType.SYSTEM
+        relative_path = (
+            os.path.relpath(abs_path, USERPATH)
+            if type_ == FileType.USER
+            else os.path.relpath(abs_path, SYSTEMPATH)
+        )
+        cut_path = tuple(p for p in relative_path.split(os.sep) if p)
+        return cls._create(abs_path, path, type_, relative_path, cut_path)
+
+    @classmethod
+    def child(cls, parent: "Path", name: str) -> "Path":
+        # the entry name of a directory, without normalizing the joined path
+        # or recomputing the parts of the parent again
+        abs_path = os.path.join(parent.path, name)
+        interned = cls._interned.get(abs_path)
+        if interned is not None:
+            return interned
+        if parent.relative_path == ".":
+            return cls._create(abs_path, abs_path, parent.type, name, (name,))
+        return cls._create(
+            abs_path,
+            abs_path,
+            parent.type,
+            parent.relative_path + os.sep + name,
+            parent.cut_path + (name,),
         )
-        self.is_dir = os.path.isdir(self.path)
-        self.cut_path = self._normalize_path(self.relative_path.split(os.sep))
-        self.name = self.cut_path[-1] if self.cut_path else ""
 
-    def _normalize_path(self, parts: List[str]) -> List[str]:
-        return [p for p in parts if p]
+    @classmethod
+    def _create(
+        cls,
+        abs_path: str,
+        raw_path: str,
+        type_: FileType,
+        relative_path: str,
+        cut_path: Tuple[str, ...],
+    ) -> "Path":
+        st = _stat_path(abs_path)
+        if st is None:
+            output_manager.err("Path_Not_Exist", path=raw_path)
+            sys.exit(1)
+        self = object.__new__(cls)
+        init = object.__setattr__
+        init(self, "path", abs_path)
+        init(self, "stat_result", st)
+        init(self, "file_id", (st.st_dev, st.st_ino))
+        init(self, "type", type_)
+        init(self, "relative_path", relative_path)
+        init(self, "is_dir", stat.S_ISDIR(st.st_mode))
+        init(self, "cut_path", cut_path)
+        init(self, "name", cut_path[-1] if cut_path else "")
+        init(self, "_hash", hash(abs_path))
+        cls._interned[abs_path] = self
+        return self
+
+    def __setattr__(self, name: str, value: object) -> None:
+        raise AttributeError("Path is immutable")
 
     def __eq__(self, other: object) -> bool:
+        if self is other:
+            return True
         if isinstance(other, Path):
-            return os.path.samefile(self.path, other.path)
+            return self.path == other.path
         return False
 
+    def __hash__(self) -> int:
+        return self._hash
+
+    def samefile(self, other: "Path") -> bool:
+        # the same file, possibly reached through another path, like
+        # os.path.samefile but with the stat captured at construction
+        return self.file_id == other.file_id
+
     def is_proper_subtree_of(self, other: "Path") -> bool:
-        other_parts = other.cut_path
-        self_parts = self.cut_path
+        # prefix test on the relative path, same result as comparing the
+        # leading parts of cut_path without slicing a new tuple
+        own, theirs = self.relative_path, other.relative_path
         return (
-            len(self_parts) > len(other_parts)
-            and self_parts[: len(other_parts)] == other_parts
+            len(own) > len(theirs)
+            and own.startswith(theirs)
+            and own[len(theirs)] == os.sep
         )
 
 
@@ -57,12 +186,7 @@ class Node:
         self.name = path.name
 
     def is_proper_subtree_of(self, other: Path) -> bool:
-        other_parts = other.cut_path
-        self_parts = self.path.cut_path
-        return (
-            len(self_parts) > len(other_parts)
-            and self_parts[: len(other_parts)] == other_parts
-        )
+        return self.path.is_proper_subtree_of(other)
 
 
 class File(Node):
@@ -77,25 +201,71 @@ class File(Node):
 
 
 class Dir(Node):
-    def __init__(self, path: Path, auto_fill: bool = True):
+    def __init__(
+        self,
+        path: Path,
+        auto_fill: bool = True,
+        exclude: Optional[ExcludeMatcher] = None,
+    ):
         if not path.is_dir:
             output_manager.err("Dir_Is_A_File", path=path.path)
             sys.exit(1)
         super().__init__(path)
-        self.subdirs: Dict[str, Dir] = {}
-        self.files: Dict[str, File] = {}
-        if auto_fill:
-            self._fill_contents()
+        self._subdirs: Dict[str, Dir] = {}
+        self._files: Dict[str, File] = {}
+        # with auto_fill the real directory is only walked when subdirs or
+        # files are first used, so a Dir that gets rejected or replaced never
+        # touches the disk
+        self._loaded = not auto_fill
+        self._exclude = exclude
 
-    def _fill_contents(self) -> None:
-        try:
-            for name in os.listdir(self.path.path):
-                full_path = os.path.join(self.path.path, name)
-                path = Path(full_path)
-                if path.is_dir:
-                    self.subdirs[name] = Dir(path)
+    @property
+    def subdirs(self) -> Dict[str, "Dir"]:
+        if not self._loaded:
+            self.materialize()
+        return self._subdirs
+
+    @property
+    def files(self) -> Dict[str, File]:
+        if not self._loaded:
+            self.materialize()
+        return self._files
+
+    def materialize(self, max_workers: int = SCAN_WORKERS) -> None:
+        # breadth-first, one level at a time: wide levels are listed on a
+        # thread pool while nodes are built here in listing order, so the tree
+        # matches a sequential walk. Excluded entries are dropped before they
+        # are listed, and directories whose mtime did not move are served from
+        # scan_cache.
+        if self._loaded:
+            return
+        self._loaded = True
+        exclude = self._exclude
+        self._exclude = None
+        level: List[Dir] = [self]
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            while level:
+                if len(level) == 1:
+                    listings = [_list_directory(level[0].path.path)]
                 else:
-                    self.files[name] = File(path)
-        except PermissionError:
-            output_manager.err("Permission_Denied", path=self.path.path)
-            sys.exit(1)
+                    listings = list(
+                        pool.map(_list_directory, [d.path.path for d in level])
+                    )
+                next_level: List[Dir] = []
+                for current, entries in zip(level, listings):
+                    if entries is None:
+                        output_manager.err("Permission_Denied", path=current.path.path)
+                        sys.exit(1)
+                    for name, is_dir in entries:
+                        if exclude and exclude.is_excluded(
+                            "/".join(current.path.cut_path + (name,)), is_dir
+                        ):
+                            continue
+                        path = Path.child(current.path, name)
+                        if path.is_dir:
+                            subdir = Dir(path, auto_fill=False)
+                            current._subdirs[name] = subdir
+                            next_level.append(subdir)
+                        else:
+                            current._files[name] = File(path)
+                level = next_level
@@ -1,3 +1,5 @@
+from typing import Iterable, List, Set, Tuple
+import heapq
 import os
 from rewrite_by_hand.cli.output import output_manager
 
@@ -9,3 +11,35 @@ def ensure_dir_exists(path: str) -> bool:
     except OSError:
         output_manager.err("Ensure_Dir_Exists_Failed", path=path, error=OSError)
         return False
+
+
+def find_empty_dirs(removed: Iterable[str], roots: Iterable[str]) -> List[str]:
+    # the directories strictly below one of roots that are empty once every
+    # path of removed is gone, deepest first. Each candidate is listed with a
+    # single scandir, after all its candidate children, so a batch of
+    # removals sharing parents climbs each directory once.
+    gone = {os.path.normpath(path) for path in removed}
+    prefixes = tuple(os.path.normpath(root) + os.sep for root in roots)
+    heap: List[Tuple[int, str]] = []
+    for parent in {os.path.dirname(path) for path in gone}:
+        if parent.startswith(prefixes):
+            heapq.heappush(heap, (-parent.count(os.sep), parent))
+    seen: Set[str] = set()
+    empty: List[str] = []
+    while heap:
+        _, directory = heapq.heappop(heap)
+        if directory in seen:
+            continue
+        seen.add(directory)
+        try:
+            with os.scandir(directory) as entries:
+                if any(entry.path not in gone for entry in entries):
+                    continue
+        except (FileNotFoundError, NotADirectoryError):
+            continue
+        gone.add(directory)
+        empty.append(directory)
+        parent = os.path.dirname(directory)
+        if parent.startswith(prefixes):
+            heapq.heappush(heap, (-parent.count(os.sep), parent))
+    return empty
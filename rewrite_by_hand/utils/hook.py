@@ -1,13 +1,23 @@
-from typing import List
+from typing import TYPE_CHECKING, List, Optional, Tuple
 import shutil
 import os
 import sys
 
-from rewrite_by_hand.utils.fs_utils import ensure_dir_exists
+from rewrite_by_hand.utils.fs_utils import ensure_dir_exists, find_empty_dirs
 from rewrite_by_hand.utils.fs_type import Path, FileType, Dir
-from rewrite_by_hand.data.variables import REPO_USER_PATH, REPO_SYSTEM_PATH
+from rewrite_by_hand.utils.exclude import ExcludeMatcher
+from rewrite_by_hand.utils.copy_engine import copy_file, copy_files
+from rewrite_by_hand.data.variables import (
+    REPO_USER_PATH,
+    REPO_SYSTEM_PATH,
+    COPY_VERIFY_HASH,
+    COPY_JOBS,
+)
 from rewrite_by_hand.cli.output import output_manager
 
+if TYPE_CHECKING:
+    from rewrite_by_hand.core.journal import Journal
+
 
 REPOUSERPATH = Path(REPO_USER_PATH)
 REPOSYSTEMPATH = Path(REPO_SYSTEM_PATH)
@@ -15,7 +25,11 @@ REPOSYSTEMPATH = Path(REPO_SYSTEM_PATH)
 
 class Hooker:
     def __init__(self):
-        pass
+        # set by ConfigManager.transaction: repo changes are recorded in the
+        # journal and applied when the transaction commits
+        self.journal: Optional["Journal"] = None
+        # repo paths removed by remove_top whose parents are not pruned yet
+        self.removed: List[str] = []
 
     def add_file(self, path: Path):
         source_path = path.path
@@ -23,97 +37,130 @@ class Hooker:
             REPOUSERPATH.path if path.type == FileType.USER else REPOSYSTEMPATH.path
         )
         target_path = os.path.join(repo_dir, path.relative_path)
+        if self.journal is not None:
+            self.journal.record(
+                {"op": "copy", "source": source_path, "target": target_path}
+            )
+            return
         if not ensure_dir_exists(os.path.dirname(target_path)):
             sys.exit(1)
-        if os.path.exists(target_path):
-            return
         try:
-            shutil.copy2(source_path, target_path)
+            # up to date targets are skipped, stale ones are copied again
+            copy_file(source_path, target_path, verify_hash=COPY_VERIFY_HASH)
         except PermissionError:
             output_manager.err("Hooker_Add_File_Failed", path=source_path)
             sys.exit(1)
 
-    def add_dir(self, path: Path, merge_list: List[Dir]):
-        source_path = path.path
+    def add_dir(
+        self,
+        path: Path,
+        merge_list: List[Dir],
+        exclude: Optional[ExcludeMatcher] = None,
+    ):
         repo_dir = (
             REPOUSERPATH.path if path.type == FileType.USER else REPOSYSTEMPATH.path
         )
-        for merge in merge_list:
-            if path == merge.path:
-                merge_list.remove(merge)
-                return
-        target_path = os.path.join(repo_dir, path.relative_path)
-        if not ensure_dir_exists(target_path):
-            sys.exit(1)
-        for name in os.listdir(source_path):
-            full_path = os.path.join(source_path, name)
-            if os.path.isdir(full_path):
-                dir_path = Path(full_path)
-                self.add_dir(dir_path, merge_list)
-            else:
-                file_path = Path(full_path)
-                self.add_file(file_path)
+        dirs, copies = self._list_dir(path, repo_dir, merge_list, exclude)
+        if self.journal is not None:
+            for target_path in dirs:
+                self.journal.record({"op": "mkdir", "path": target_path})
+            for source_path, target_path in copies:
+                self.journal.record(
+                    {"op": "copy", "source": source_path, "target": target_path}
+                )
+            return
+        for target_path in dirs:
+            if not ensure_dir_exists(target_path):
+                sys.exit(1)
+        for source_path, error in copy_files(copies, COPY_JOBS, COPY_VERIFY_HASH):
+            output_manager.err("Hooker_Copy_Failed", path=source_path, error=error)
+
+    def _list_dir(
+        self,
+        path: Path,
+        repo_dir: str,
+        merge_list: List[Dir],
+        exclude: Optional[ExcludeMatcher],
+    ) -> Tuple[List[str], List[Tuple[str, str]]]:
+        # listing phase of add_dir: the repo directories to create, parents
+        # before children, and the (source, target) files to copy into them.
+        # Directories in merge_list are already in the repo and are skipped.
+        merged = {merge.path.path: merge for merge in merge_list}
+        dirs: List[str] = []
+        copies: List[Tuple[str, str]] = []
+        stack = [(path.path, path.cut_path)]
+        while stack:
+            source_dir, parts = stack.pop()
+            if source_dir in merged:
+                merge_list.remove(merged.pop(source_dir))
+                continue
+            target_dir = os.path.join(repo_dir, *parts)
+            dirs.append(target_dir)
+            try:
+                entries = list(os.scandir(source_dir))
+            except PermissionError:
+                output_manager.err("Permission_Denied", path=source_dir)
+                continue
+            for entry in entries:
+                entry_parts = parts + (entry.name,)
+                isdir = entry.is_dir()
+                if exclude and exclude.is_excluded("/".join(entry_parts), isdir):
+                    continue
+                if isdir:
+                    stack.append((entry.path, entry_parts))
+                elif entry.is_file() or entry.is_symlink():
+                    copies.append(
+                        (entry.path, os.path.join(target_dir, entry.name))
+                    )
+        return dirs, copies
 
     def remove(self, path: Path):
         repo_dir = (
             REPOUSERPATH.path if path.type == FileType.USER else REPOSYSTEMPATH.path
         )
         target_path = os.path.join(repo_dir, path.relative_path)
-        if os.path.exists(target_path):
-            if os.path.isdir(target_path):
-                try:
-                    shutil.rmtree(target_path)
-                    return
-                except OSError as e:
-                    output_manager.err(
-                        "Hooker_Remove_Failed", path=target_path, error=e
-                    )
-                    sys.exit(1)
-            try:
-                os.remove(target_path)
-                return
-            except OSError as e:
-                output_manager.err("Hooker_Remove_Failed", path=target_path, error=e)
-                sys.exit(1)
-        output_manager.err("Hooker_Remove_Failed_File_Not_Found", path=target_path)
-        sys.exit(1)
+        if not os.path.exists(target_path):
+            output_manager.err("Hooker_Remove_Failed_File_Not_Found", path=target_path)
+            sys.exit(1)
+        self._remove_path(target_path)
 
     def remove_top(self, path: Path):
         repo_dir = (
             REPOUSERPATH.path if path.type == FileType.USER else REPOSYSTEMPATH.path
         )
         target_path = os.path.join(repo_dir, path.relative_path)
-        if os.path.exists(target_path):
-            biggest_path = Path(target_path)
-            while self.remove_parent_or_not(biggest_path):
-                biggest_path = Path(os.path.dirname(biggest_path.path))
-            if os.path.isdir(biggest_path.path):
-                try:
-                    shutil.rmtree(biggest_path.path)
-                    return
-                except OSError as e:
-                    output_manager.err(
-                        "Hooker_Remove_Failed", path=biggest_path.path, error=e
-                    )
-                    sys.exit(1)
-            try:
-                os.remove(biggest_path.path)
-                return
-            except OSError as e:
-                output_manager.err(
-                    "Hooker_Remove_Failed", path=biggest_path.path, error=e
-                )
-                sys.exit(1)
-        output_manager.err("Hooker_Remove_Failed_File_Not_Found", path=target_path)
-        sys.exit(1)
+        if not os.path.exists(target_path):
+            output_manager.err("Hooker_Remove_Failed_File_Not_Found", path=target_path)
+            sys.exit(1)
+        self._remove_path(target_path)
+        # the directories left empty are pruned once for the whole batch, at
+        # the end of the transaction, or right away without one
+        self.removed.append(target_path)
+        if self.journal is None:
+            self.prune()
 
-    def remove_parent_or_not(self, path: Path) -> bool:
-        if len(path.cut_path) <= 3:
-            return False
-        parent_path = os.path.dirname(path.path)
-        if len(os.listdir(parent_path)) == 1:
-            return True
-        return False
+    def prune(self):
+        # remove the repo directories the removed top trees leave empty; only
+        # the outermost ones, since removing them takes the rest along
+        empty = find_empty_dirs(self.removed, [REPOUSERPATH.path, REPOSYSTEMPATH.path])
+        self.removed = []
+        pruned = set(empty)
+        for directory in empty:
+            if os.path.dirname(directory) not in pruned:
+                self._remove_path(directory)
+
+    def _remove_path(self, target_path: str):
+        if self.journal is not None:
+            self.journal.record({"op": "remove", "path": target_path})
+            return
+        try:
+            if os.path.isdir(target_path):
+                shutil.rmtree(target_path)
+            else:
+                os.remove(target_path)
+        except OSError as e:
+            output_manager.err("Hooker_Remove_Failed", path=target_path, error=e)
+            sys.exit(1)
 
 
 if __name__ == "__main__":
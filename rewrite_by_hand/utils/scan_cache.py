@@ -0,0 +1,84 @@
+from typing import Dict, List, Tuple
+import json
+import os
+import threading
+import time
+
+from rewrite_by_hand.data.variables import REPOPATH, REPO_SCAN_CACHE_PATH
+
+# do not trust listings of directories changed within the last mtime tick or so
+RACY_WINDOW_NS = 2_000_000_000
+
+
+def list_entries(path: str) -> List[Tuple[str, bool]]:
+    # sockets, fifos and device nodes can not be stored in the repo
+    listing = []
+    with os.scandir(path) as it:
+        for entry in it:
+            if entry.is_dir():
+                listing.append((entry.name, True))
+            elif entry.is_file() or entry.is_symlink():
+                listing.append((entry.name, False))
+    return listing
+
+
+class ScanCache:
+    """
+    Persisted (dev, inode, mtime_ns, entries) per directory. A directory whose
+    stat still matches is not listed again, only re-listed when its mtime moved.
+    list_directory is called from the threads of Dir.materialize, so the
+    entries and counters are only changed under the lock.
+    """
+
+    def __init__(self):
+        self.entries: Dict[str, list] | None = None
+        self.dirty = False
+        self._lock = threading.Lock()
+        self.skipped = 0
+        self.relisted = 0
+
+    def _load(self) -> Dict[str, list]:
+        with self._lock:
+            if self.entries is None:
+                entries = {}
+                try:
+                    with open(REPO_SCAN_CACHE_PATH, "r") as cache_file:
+                        entries = json.load(cache_file)
+                except (OSError, json.JSONDecodeError):
+                    # the cache is only an optimization, start over if it is unusable
+                    pass
+                self.entries = entries
+            return self.entries
+
+    def reset_stats(self) -> None:
+        self.skipped = 0
+        self.relisted = 0
+
+    def list_directory(self, path: str) -> List[Tuple[str, bool]]:
+        entries = self._load()
+        st = os.stat(path)
+        cached = entries.get(path)
+        if cached is not None and cached[:3] == [st.st_dev, st.st_ino, st.st_mtime_ns]:
+            with self._lock:
+                self.skipped += 1
+            return [(name, is_dir) for name, is_dir in cached[3]]
+        listing = list_entries(path)
+        with self._lock:
+            self.relisted += 1
+            if time.time_ns() - st.st_mtime_ns > RACY_WINDOW_NS:
+                entries[path] = [st.st_dev, st.st_ino, st.st_mtime_ns, listing]
+                self.dirty = True
+        return listing
+
+    def save(self) -> None:
+        if not self.dirty or not os.path.isdir(REPOPATH):
+            return
+        try:
+            with open(REPO_SCAN_CACHE_PATH, "w") as cache_file:
+                json.dump(self.entries, cache_file)
+            self.dirty = False
+        except OSError:
+            pass
+
+
+scan_cache = ScanCache()
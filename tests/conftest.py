@@ -0,0 +1,10 @@
+import os
+import tempfile
+
+# rewrite_by_hand reads its paths from HOME at import time, so point HOME at
+# a scratch directory before any test module imports it
+_home = tempfile.mkdtemp(prefix="dot-test-home-")
+os.makedirs(os.path.join(_home, ".dotfiles", "user"))
+os.makedirs(os.path.join(_home, ".dotfiles", "system"))
+os.environ["HOME"] = _home
+os.environ.setdefault("DOT_LANGUAGE", "en")
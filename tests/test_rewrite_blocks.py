@@ -0,0 +1,51 @@
+import pytest
+
+from rewrite_by_hand.data.variables import MAGIC_STRING
+from rewrite_by_hand.utils.blocks import blocks_manager
+
+M = MAGIC_STRING
+
+WELL_FORMED = [
+    ("plain\ntext\n", [("plain\ntext\n", None)]),
+    (
+        f"x /* {M}: a\nfoo\n{M}: a */ y\n/*{M}:b\nbar\n\t{M} : b\t*/\n",
+        [
+            ("x ", None),
+            (f"/* {M}: a\nfoo\n{M}: a */", "a"),
+            (" y\n", None),
+            (f"/*{M}:b\nbar\n\t{M} : b\t*/", "b"),
+        ],
+    ),
+    (f"a\n/* {M}: a */\nb\n", [("a\n", None), (f"/* {M}: a */", "a"), ("\nb\n", None)]),
+    # a magic string that is not a marker is plain text
+    (f"{M}: x /*", [(f"{M}: x /*", None)]),
+    (f"// {M}: a\n", [(f"// {M}: a\n", None)]),
+    (
+        f"/* {M}: a\n{M}:{M}: a */\n",
+        [(f"/* {M}: a\n{M}:{M}: a */", "a")],
+    ),
+]
+
+MALFORMED = [
+    # markers do not span lines, so this end marker has no start
+    f"/*\n{M}: a\nfoo\n{M}: a */\n",
+    f"/* {M}\n: a\nfoo\n{M}: a */\n",
+    f"{M}: a */ /* {M}: a\n",
+    f"{M}: a *//* {M}: a\n",
+    f"/* {M}: a\nfoo\n",
+    f"/* {M}: a\n/* {M}: b\n{M}: b */\n{M}: a */\n",
+    f"/* {M}: a\nfoo\n{M}: b */\n",
+    f"{M}:{M}: a */\n",
+]
+
+
+@pytest.mark.parametrize("content, expected", WELL_FORMED)
+def test_cut_well_formed(content, expected):
+    blocks = blocks_manager.cut(content)
+    assert [(block.content, block.mark) for block in blocks] == expected
+
+
+@pytest.mark.parametrize("content", MALFORMED)
+def test_cut_malformed(content):
+    with pytest.raises(SystemExit):
+        blocks_manager.cut(content)
@@ -0,0 +1,28 @@
+import json
+import os
+
+from rewrite_by_hand.data.variables import REPO_EXCLUDE_PATH, USERPATH
+from rewrite_by_hand.utils.exclude import exclude_manager
+from rewrite_by_hand.utils.file_system import FileSystem
+
+
+def test_add_dir_keeps_absorbed_excluded_top_file():
+    cfg = os.path.join(USERPATH, ".cfg")
+    os.makedirs(cfg, exist_ok=True)
+    for name in ("a.log", "b.conf"):
+        with open(os.path.join(cfg, name), "w") as f:
+            f.write(name)
+    with open(REPO_EXCLUDE_PATH, "w") as f:
+        json.dump({"global": [], "software": {"cfg": ["*.log"]}}, f)
+    exclude_manager.rules = None
+    exclude_manager.matchers.clear()
+
+    fs = FileSystem()
+    fs.add(os.path.join(cfg, "a.log"), "cfg")
+    fs.add(cfg, "cfg")
+
+    user = fs.to_dict()["USER"]
+    assert user["top_files"] == []
+    assert len(user["top_dirs"]) == 1
+    names = sorted(f["name"] for f in user["top_dirs"][0]["tree"]["files"])
+    assert names == ["a.log", "b.conf"]